@@ -2,7 +2,24 @@ from .cos_client import CosS3Client
 from .cos_client import CosConfig
 from .cos_exception import CosServiceError
 from .cos_exception import CosClientError
+from .cos_exception import CosCircuitOpenError
 from .cos_auth import CosS3Auth
+from .cos_auth import CosSigner
+from .cos_credential import Credential
+from .cos_credential import CredentialProvider
+from .cos_credential import RefreshingCredentialProvider
+from .cos_retry import RetryPolicy
+from .cos_endpoint import EndpointPool
+from .cos_dns import DnsCache
+from .cos_metrics import MetricsRegistry
+from .cos_hedge import HedgePolicy
+from .cos_timeout import TimeoutPolicy
+from .cos_ratelimit import RateLimiter
+from .cos_breaker import CircuitBreaker
+from .cos_listing import ObjectRecord
+from .cos_listing import ListObjectsStream
+from .cos_listing import ObjectListing
+from .cos_paginator import Paginator
 from .cos_comm import get_date
 
 import logging
@@ -0,0 +1,168 @@
+# -*- coding=utf-8
+
+import threading
+import time
+from requests.adapters import HTTPAdapter, DEFAULT_POOLBLOCK
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from .cos_dns import is_ip
+
+
+class ConnectionStats(object):
+    """统计连接池新建的连接数和发出的请求数,用于确认keep-alive是否生效"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._new_connections = 0
+        self._requests = 0
+        self._local = threading.local()
+
+    def on_new_connection(self):
+        with self._lock:
+            self._new_connections += 1
+
+    def on_request(self):
+        with self._lock:
+            self._requests += 1
+
+    def on_connect(self, cost):
+        """记录当前线程新建连接的耗时,连接在发送请求的线程中建立"""
+        self._local.connect_time = getattr(self._local, 'connect_time', 0) + cost
+
+    def pop_connect_time(self):
+        """获取并清空当前线程新建连接的耗时,复用连接时为0"""
+        cost = getattr(self._local, 'connect_time', 0)
+        self._local.connect_time = 0
+        return cost
+
+    def snapshot(self):
+        """获取统计信息
+
+        :return(dict): requests为请求数,new_connections为新建的连接数,reused_connections为复用连接的请求数.
+        """
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'new_connections': self._new_connections,
+                'reused_connections': max(self._requests - self._new_connections, 0)
+            }
+
+
+def _connection_class(base, stats, dns_cache):
+    """生成统计建连耗时的连接类,设置了dns_cache时从DnsCache获取ip,Host头部和https的SNI仍然使用域名"""
+    class CosConnection(base):
+        def connect(self):
+            start = time.time()
+            try:
+                return base.connect(self)
+            finally:
+                stats.on_connect(time.time() - start)
+
+        def _new_conn(self):
+            host = getattr(self, '_dns_host', None)
+            if dns_cache is None or host is None or is_ip(host):
+                return base._new_conn(self)
+            self._dns_host = dns_cache.choose(host)
+            try:
+                return base._new_conn(self)
+            except Exception:
+                dns_cache.invalidate(host)  # ip可能已经失效,下次新建连接时重新解析
+                raise
+            finally:
+                self._dns_host = host
+    return CosConnection
+
+
+def _counting_pool_class(base, stats, dns_cache=None):
+    """生成新建连接时计数的连接池类"""
+    class CountingConnectionPool(base):
+        ConnectionCls = _connection_class(base.ConnectionCls, stats, dns_cache)
+
+        def _new_conn(self):
+            stats.on_new_connection()
+            return base._new_conn(self)
+    return CountingConnectionPool
+
+
+def _grow_pool(pool, maxsize):
+    """原地扩大连接池,新增的空位放在队列底部,已有的空闲连接仍然优先被复用"""
+    queue = getattr(pool, 'pool', None)
+    if queue is None or not hasattr(queue, 'mutex'):  # 连接池已经关闭
+        return
+    with queue.mutex:
+        added = maxsize - queue.maxsize
+        if added <= 0:
+            return
+        queue.maxsize = maxsize
+        queue.queue[0:0] = [None] * added
+        queue.not_empty.notify(added)  # 唤醒pool_block时等待连接的线程
+
+
+def _grow_manager(manager, maxsize):
+    """扩大PoolManager下所有连接池的最大连接数
+
+    新版本urllib3中maxsize是连接池key的一部分,已有的连接池需要换成新的key,否则之后的请求会新建连接池而不再复用已有的连接;
+    urllib3内部结构不可用时只对之后新建的连接池生效,已有的连接池和空闲连接保持不变
+    """
+    pools = manager.pools
+    container = getattr(pools, '_container', None)
+    lock = getattr(pools, 'lock', None)
+    if container is None or lock is None:
+        manager.connection_pool_kw['maxsize'] = maxsize
+        return
+    with lock:
+        manager.connection_pool_kw['maxsize'] = maxsize
+        for key in list(container.keys()):
+            pool = container.pop(key)
+            _grow_pool(pool, maxsize)
+            if 'key_maxsize' in getattr(key, '_fields', ()):  # 旧版本urllib3的key不包含maxsize
+                key = key._replace(key_maxsize=maxsize)
+            container[key] = pool
+
+
+class CosHTTPAdapter(HTTPAdapter):
+    """CosS3Client使用的HTTPAdapter,支持连接统计,按并发数扩大连接池以及DNS缓存"""
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=DEFAULT_POOLBLOCK, dns_cache=None, **kwargs):
+        self._stats = ConnectionStats()
+        self._pool_classes = {
+            'http': _counting_pool_class(HTTPConnectionPool, self._stats, dns_cache),
+            'https': _counting_pool_class(HTTPSConnectionPool, self._stats, dns_cache),
+        }
+        self._resize_lock = threading.Lock()
+        super(CosHTTPAdapter, self).__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block, **kwargs)
+
+    @property
+    def pool_maxsize(self):
+        return self._pool_maxsize
+
+    @property
+    def stats(self):
+        return self._stats
+
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs):
+        super(CosHTTPAdapter, self).init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = self._pool_classes
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        new_manager = proxy not in self.proxy_manager
+        manager = super(CosHTTPAdapter, self).proxy_manager_for(proxy, **proxy_kwargs)
+        # socks代理使用自己的连接池类
+        if new_manager and not proxy.lower().startswith('socks'):
+            manager.pool_classes_by_scheme = self._pool_classes
+        return manager
+
+    def send(self, request, **kwargs):
+        self._stats.on_request()
+        return super(CosHTTPAdapter, self).send(request, **kwargs)
+
+    def resize(self, maxsize):
+        """扩大每个host的最大连接数,已有的连接池原地扩容,其他线程的空闲keep-alive连接继续保留
+
+        :param maxsize(int): 新的最大连接数,小于等于当前值时不做任何处理.
+        :return(bool): 是否进行了扩容.
+        """
+        with self._resize_lock:
+            if maxsize <= self._pool_maxsize:
+                return False
+            self._pool_maxsize = maxsize
+            for manager in [self.poolmanager] + list(self.proxy_manager.values()):
+                _grow_manager(manager, maxsize)
+        return True
@@ -0,0 +1,730 @@
+# -*- coding=utf-8
+"""基于asyncio的COS客户端,需要python3.5+以及aiohttp"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+import zlib
+import aiohttp
+import yarl
+from six.moves.urllib.parse import urlencode, urlsplit
+from .cos_auth import CosS3Auth
+from .cos_comm import *
+from .cos_dns import is_ip
+from .cos_exception import CosClientError
+from .cos_exception import CosServiceError
+from .cos_retry import RetryPolicy
+from .cos_timeout import get_transfer_size
+from .version import __version__
+
+logger = logging.getLogger(__name__)
+# 连接断开,超时,读取body失败等网络错误可以重试
+_RETRYABLE_ERRORS = (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, asyncio.TimeoutError)
+
+
+def _headers_to_dict(rt):
+    """保留服务端返回的头部大小写,与CosS3Client返回的dict一致"""
+    return dict([(k.decode('latin-1'), v.decode('latin-1')) for k, v in rt.raw_headers])
+
+
+class AsyncStreamBody(object):
+    """get_object返回的异步文件流,用法与StreamBody一致,读取的接口为协程"""
+    def __init__(self, rt):
+        self._rt = rt
+
+    def get_raw_stream(self):
+        """获取aiohttp的StreamReader"""
+        return self._rt.content
+
+    def get_stream(self, chunk_size=1024):
+        """获取按块读取的异步迭代器,使用async for遍历"""
+        return self._rt.content.iter_chunked(chunk_size)
+
+    async def read(self):
+        """读取全部内容"""
+        return await self._rt.read()
+
+    def close(self):
+        """释放连接"""
+        self._rt.release()
+
+    async def get_stream_to_file(self, file_name, auto_decompress=False):
+        use_chunked = False
+        if 'Content-Length' in self._rt.headers:
+            content_len = int(self._rt.headers['Content-Length'])
+        elif 'Transfer-Encoding' in self._rt.headers and self._rt.headers['Transfer-Encoding'] == "chunked":
+            use_chunked = True
+        else:
+            raise IOError("download failed without Content-Length header or Transfer-Encoding header")
+        decompressor = None
+        content_encoding = self._rt.headers.get('Content-Encoding', '')
+        if auto_decompress and content_encoding == 'gzip':
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif auto_decompress and content_encoding == 'deflate':
+            decompressor = zlib.decompressobj()
+
+        recv_len = 0
+        tmp_file_name = "{file_name}_{uuid}".format(file_name=file_name, uuid=uuid.uuid4().hex)
+        try:
+            with open(tmp_file_name, 'wb') as fp:
+                async for chunk in self._rt.content.iter_chunked(1024*64):
+                    recv_len += len(chunk)
+                    if decompressor is not None:
+                        chunk = decompressor.decompress(chunk)
+                    fp.write(chunk)
+                if decompressor is not None:
+                    fp.write(decompressor.flush())
+        finally:
+            self._rt.release()
+        if not use_chunked and recv_len != content_len:
+            if os.path.exists(tmp_file_name):
+                os.remove(tmp_file_name)
+            raise IOError("download failed with incomplete file")
+        if os.path.exists(file_name):
+            os.remove(file_name)
+        os.rename(tmp_file_name, file_name)
+
+
+class _CachingDnsResolver(aiohttp.abc.AbstractResolver):
+    """使用CosConfig中DnsCache的aiohttp解析器,缓存未命中时在线程池中解析,不阻塞事件循环"""
+    def __init__(self, dns_cache):
+        self._dns_cache = dns_cache
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        if is_ip(host):
+            addresses = [host]
+        else:
+            loop = asyncio.get_event_loop()
+            addresses = await loop.run_in_executor(None, self._dns_cache.resolve, host)
+        return [{'hostname': host, 'host': ip, 'port': port, 'family': socket.AF_INET,
+                 'proto': 0, 'flags': socket.AI_NUMERICHOST} for ip in addresses]
+
+    async def close(self):
+        pass
+
+
+class AsyncCosS3Client(object):
+    """cos异步客户端类,接口与CosS3Client一致,所有请求接口均为协程
+
+    .. code-block:: python
+
+        from qcloud_cos import CosConfig
+        from qcloud_cos.cos_async_client import AsyncCosS3Client
+
+        async def main():
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            async with AsyncCosS3Client(config) as client:
+                response = await client.put_object(Bucket='bucket', Body=b'abc', Key='test.txt')
+                response = await client.get_object(Bucket='bucket', Key='test.txt')
+                data = await response['Body'].read()
+    """
+    def __init__(self, conf, retry=1, session=None, max_connections=100, retry_policy=None):
+        """初始化client对象
+
+        :param conf(CosConfig): 用户的配置.
+        :param retry(int): 失败重试的次数.
+        :param session(aiohttp.ClientSession): http session,为空时在第一次请求时创建.
+        :param max_connections(int): 自动创建的session的最大连接数.
+        :param retry_policy(RetryPolicy): 重试策略,设置时忽略retry参数.
+        """
+        self._conf = conf
+        if retry_policy is None:
+            retry_policy = RetryPolicy(max_retries=retry)
+        self._retry_policy = retry_policy
+        self._retry = retry_policy.max_retries
+        self._session = session
+        self._own_session = session is None
+        self._max_connections = max_connections
+        if conf._dns_cache is not None and conf._ip is None and conf._endpoint_pool is None:
+            for bucket in conf._dns_prefetch_buckets:
+                conf._dns_cache.prefetch(urlsplit(conf.uri(bucket)).hostname)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """关闭client自动创建的session"""
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def get_conf(self):
+        """获取配置"""
+        return self._conf
+
+    def get_retry_metrics(self):
+        """获取重试统计"""
+        return self._retry_policy.get_metrics()
+
+    def _get_session(self):
+        if self._session is None:
+            resolver = None
+            if self._conf._dns_cache is not None:
+                resolver = _CachingDnsResolver(self._conf._dns_cache)
+            connector = aiohttp.TCPConnector(limit=self._max_connections, limit_per_host=self._max_connections, resolver=resolver)
+            self._session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+        return self._session
+
+    async def send_request(self, method, url, bucket, timeout=None, stream=False, **kwargs):
+        """封装aiohttp发起http请求,签名和头部的处理与CosS3Client.send_request一致"""
+        explicit_timeout = timeout
+        if self._conf._timeout is not None:  # 用户自定义超时时间
+            timeout = self._conf._timeout
+        elif timeout is None:
+            timeout = 30
+        headers = kwargs.get('headers', {})
+        if self._conf._ua is not None:
+            headers['User-Agent'] = self._conf._ua
+        else:
+            headers['User-Agent'] = 'cos-python-sdk-v' + __version__
+        if bucket is not None:
+            headers['Host'] = self._conf.get_host(bucket)
+        params = kwargs.get('params', {})
+        data = kwargs.get('data')
+        if data is not None:
+            data = to_bytes(data)
+        # 签名只依赖于method和headers,复用同步客户端的CosS3Auth
+        headers['Authorization'] = kwargs['auth'].get_authorization(method, headers)
+        headers = dict([(k, to_unicode(v)) for k, v in format_values(headers).items()])
+        if params:
+            url = url + '?' + urlencode([(k, to_bytes(v)) for k, v in params.items()])
+
+        ssl = None
+        # 配置了多个ip时,请求存储桶的每次重试都重新选择ip
+        pool = self._conf._endpoint_pool if bucket is not None else None
+        if (self._conf._ip is not None or pool is not None) and self._conf._scheme == 'https':
+            ssl = False
+        proxy = None
+        if self._conf._proxies:
+            proxy = self._conf._proxies.get(self._conf._scheme)
+        connect_timeout, read_timeout = timeout, timeout
+        if self._conf._timeout_policy is not None:  # 按需要传输的数据量计算超时时间
+            connect_timeout, read_timeout = self._conf._timeout_policy.get_timeout(get_transfer_size(headers, data), explicit_timeout)
+        client_timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        session = self._get_session()
+        policy = self._retry_policy
+        # 文件等body重试前回退到起始位置,不支持seek的流不重试
+        body_position = get_body_position(data)
+        retryable_body = body_position is not None
+        for j in range(policy.max_retries + 1):
+            if j > 0:
+                rewind_body(data, body_position)
+            node = None
+            request_url = url
+            if pool is not None:
+                node = pool.acquire()
+                request_url = node.rewrite_url(url)
+            start_time = time.time()
+            try:
+                res = await session.request(method, yarl.URL(request_url, encoded=True), data=data, headers=headers, timeout=client_timeout, ssl=ssl, proxy=proxy)
+                if res.status >= 400 or not stream:
+                    await res.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:  # 捕获aiohttp抛出的如timeout等客户端错误,转化为客户端错误
+                if node is not None:
+                    pool.release(node, False, time.time() - start_time)
+                logger.exception('url:%s, retry_time:%d exception:%s', request_url, j, e)
+                retryable = isinstance(e, _RETRYABLE_ERRORS) and not isinstance(e, aiohttp.ClientSSLError)
+                if retryable and retryable_body and policy.allow_retry(j + 1, isinstance(e, asyncio.TimeoutError)):
+                    await asyncio.sleep(policy.get_delay(j + 1))
+                    continue
+                policy.record_call(j + 1, False)
+                raise CosClientError(str(e))
+            if node is not None:
+                # 503 SlowDown是存储桶级别的限流,与节点的健康状态无关
+                pool.release(node, res.status < 500 or res.status == 503, time.time() - start_time)
+            if res.status < 400:  # 2xx和3xx都认为是成功的
+                policy.record_call(j + 1, True)
+                return res
+            content = await res.read()
+            msg = await res.text()
+            res.release()
+            if not (retryable_body and policy.is_retryable_response(res.status, content) and policy.allow_retry(j + 1)):
+                break
+            logger.warning('url:%s, retry_time:%d status_code:%d', request_url, j, res.status)
+            await asyncio.sleep(policy.get_delay(j + 1))
+        policy.record_call(j + 1, False)
+
+        if method == 'HEAD' and res.status == 404:   # Head 需要处理
+            info = dict()
+            info['code'] = 'NoSuchResource'
+            info['message'] = 'The Resource You Head Not Exist'
+            info['resource'] = str(url)
+            if 'x-cos-request-id' in res.headers:
+                info['requestid'] = res.headers['x-cos-request-id']
+            if 'x-cos-trace-id' in res.headers:
+                info['traceid'] = res.headers['x-cos-trace-id']
+            logger.error(info)
+            raise CosServiceError(method, info, res.status)
+        if msg == u'':  # 服务器没有返回Error Body时 给出头部的信息
+            msg = _headers_to_dict(res)
+        logger.error(msg)
+        raise CosServiceError(method, msg, res.status)
+
+    # s3 object interface begin
+    async def put_object(self, Bucket, Body, Key, EnableMD5=False, **kwargs):
+        """单文件上传接口，适用于小文件，最大不得超过5GB
+
+        :param Bucket(string): 存储桶名称.
+        :param Body(file|string): 上传的文件内容，类型为文件流或字节流.
+        :param Key(string): COS路径.
+        :param EnableMD5(bool): 是否需要SDK计算Content-MD5，打开此开关会增加上传耗时.
+        :kwargs(dict): 设置上传的headers.
+        :return(dict): 上传成功返回的结果，包含ETag等信息.
+        """
+        check_object_content_length(Body)
+        headers = mapped(kwargs)
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("put object, url=:%s ,headers=:%s", url, headers)
+        if EnableMD5:
+            md5_str = get_content_md5(Body)
+            if md5_str:
+                headers['Content-MD5'] = md5_str
+        rt = await self.send_request(
+            method='PUT',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf, Key),
+            data=Body,
+            headers=headers)
+        return _headers_to_dict(rt)
+
+    async def get_object(self, Bucket, Key, **kwargs):
+        """单文件下载接口
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param kwargs(dict): 设置下载的headers.
+        :return(dict): 下载成功返回的结果,包含Body对应的AsyncStreamBody,可以获取文件流或下载文件到本地.
+        """
+        headers = mapped(kwargs)
+        final_headers = {}
+        params = {}
+        for key in headers:
+            if key.startswith("response"):
+                params[key] = headers[key]
+            else:
+                final_headers[key] = headers[key]
+        headers = final_headers
+
+        if 'versionId' in headers:
+            params['versionId'] = headers['versionId']
+            del headers['versionId']
+        params = format_values(params)
+
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("get object, url=:%s ,headers=:%s, params=:%s", url, headers, params)
+        rt = await self.send_request(
+            method='GET',
+            url=url,
+            bucket=Bucket,
+            stream=True,
+            auth=CosS3Auth(self._conf, Key, params=params),
+            params=params,
+            headers=headers)
+
+        response = _headers_to_dict(rt)
+        response['Body'] = AsyncStreamBody(rt)
+        return response
+
+    async def delete_object(self, Bucket, Key, **kwargs):
+        """单文件删除接口
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param kwargs(dict): 设置请求headers.
+        :return: dict.
+        """
+        headers = mapped(kwargs)
+        params = {}
+        if 'versionId' in headers:
+            params['versionId'] = headers['versionId']
+            del headers['versionId']
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("delete object, url=:%s ,headers=:%s", url, headers)
+        rt = await self.send_request(
+            method='DELETE',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf, Key),
+            headers=headers,
+            params=params)
+        return _headers_to_dict(rt)
+
+    async def delete_objects(self, Bucket, Delete={}, **kwargs):
+        """文件批量删除接口,单次最多支持1000个object
+
+        :param Bucket(string): 存储桶名称.
+        :param Delete(dict): 批量删除的object信息.
+        :param kwargs(dict): 设置请求headers.
+        :return(dict): 批量删除的结果.
+        """
+        lst = ['<Object>', '</Object>']  # 类型为list的标签
+        xml_config = format_xml(data=Delete, root='Delete', lst=lst)
+        headers = mapped(kwargs)
+        headers['Content-MD5'] = get_md5(xml_config)
+        headers['Content-Type'] = 'application/xml'
+        params = {'delete': ''}
+        params = format_values(params)
+        url = self._conf.uri(bucket=Bucket)
+        logger.info("delete objects, url=:%s ,headers=:%s", url, headers)
+        rt = await self.send_request(
+            method='POST',
+            url=url,
+            bucket=Bucket,
+            data=xml_config,
+            auth=CosS3Auth(self._conf, params=params),
+            headers=headers,
+            params=params)
+        data = xml_to_dict(await rt.read())
+        format_dict(data, ['Deleted', 'Error'])
+        return data
+
+    async def head_object(self, Bucket, Key, **kwargs):
+        """获取文件信息
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param kwargs(dict): 设置请求headers.
+        :return(dict): 文件的metadata信息.
+        """
+        headers = mapped(kwargs)
+        params = {}
+        if 'versionId' in headers:
+            params['versionId'] = headers['versionId']
+            del headers['versionId']
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("head object, url=:%s ,headers=:%s", url, headers)
+        rt = await self.send_request(
+            method='HEAD',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf, Key, params=params),
+            headers=headers,
+            params=params)
+        return _headers_to_dict(rt)
+
+    async def create_multipart_upload(self, Bucket, Key, **kwargs):
+        """创建分块上传，适用于大文件上传
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param kwargs(dict): 设置请求headers.
+        :return(dict): 初始化分块上传返回的结果，包含UploadId等信息.
+        """
+        headers = mapped(kwargs)
+        params = {'uploads': ''}
+        params = format_values(params)
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("create multipart upload, url=:%s ,headers=:%s", url, headers)
+        rt = await self.send_request(
+            method='POST',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf, Key, params=params),
+            headers=headers,
+            params=params)
+        return xml_to_dict(await rt.read())
+
+    async def upload_part(self, Bucket, Key, Body, PartNumber, UploadId, EnableMD5=False, **kwargs):
+        """上传分块，单个大小不得超过5GB
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param Body(file|string): 上传分块的内容,可以为文件流或者字节流.
+        :param PartNumber(int): 上传分块的编号.
+        :param UploadId(string): 分块上传创建的UploadId.
+        :param EnableMD5(bool): 是否需要SDK计算Content-MD5，打开此开关会增加上传耗时.
+        :param kwargs(dict): 设置请求headers.
+        :return(dict): 上传成功返回的结果，包含单个分块ETag等信息.
+        """
+        check_object_content_length(Body)
+        headers = mapped(kwargs)
+        params = {'partNumber': PartNumber, 'uploadId': UploadId}
+        params = format_values(params)
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("upload part, url=:%s ,headers=:%s, params=:%s", url, headers, params)
+        if EnableMD5:
+            md5_str = get_content_md5(Body)
+            if md5_str:
+                headers['Content-MD5'] = md5_str
+        rt = await self.send_request(
+            method='PUT',
+            url=url,
+            bucket=Bucket,
+            headers=headers,
+            params=params,
+            auth=CosS3Auth(self._conf, Key, params=params),
+            data=Body)
+        return _headers_to_dict(rt)
+
+    async def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload={}, **kwargs):
+        """完成分片上传,除最后一块分块块大小必须大于等于1MB,否则会返回错误.
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param UploadId(string): 分块上传创建的UploadId.
+        :param MultipartUpload(dict): 所有分块的信息,包含Etag和PartNumber.
+        :param kwargs(dict): 设置请求headers.
+        :return(dict): 上传成功返回的结果，包含整个文件的ETag等信息.
+        """
+        headers = mapped(kwargs)
+        params = {'uploadId': UploadId}
+        params = format_values(params)
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("complete multipart upload, url=:%s ,headers=:%s", url, headers)
+        rt = await self.send_request(
+            method='POST',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf, Key, params=params),
+            data=dict_to_xml(MultipartUpload),
+            timeout=1200,  # 分片上传大文件的时间比较长，设置为20min
+            headers=headers,
+            params=params)
+        content = await rt.read()
+        body = xml_to_dict(content)
+        # 分块上传文件返回200OK并不能代表文件上传成功,返回的body里面如果没有ETag则认为上传失败
+        if 'ETag' not in body:
+            logger.error(content)
+            raise CosServiceError('POST', content, 200)
+        data = _headers_to_dict(rt)
+        data.update(body)
+        return data
+
+    async def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        """放弃一个已经存在的分片上传任务，删除所有已经存在的分片.
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param UploadId(string): 分块上传创建的UploadId.
+        :param kwargs(dict): 设置请求headers.
+        :return: None.
+        """
+        headers = mapped(kwargs)
+        params = {'uploadId': UploadId}
+        params = format_values(params)
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("abort multipart upload, url=:%s ,headers=:%s", url, headers)
+        await self.send_request(
+            method='DELETE',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf, Key, params=params),
+            headers=headers,
+            params=params)
+        return None
+
+    async def list_parts(self, Bucket, Key, UploadId, EncodingType='', MaxParts=1000, PartNumberMarker=0, **kwargs):
+        """列出已上传的分片.
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param UploadId(string): 分块上传创建的UploadId.
+        :param EncodingType(string): 设置返回结果编码方式,只能设置为url.
+        :param MaxParts(int): 设置单次返回最大的分块数量,最大为1000.
+        :param PartNumberMarker(int): 设置返回的开始处,从PartNumberMarker下一个分块开始列出.
+        :param kwargs(dict): 设置请求headers.
+        :return(dict): 分块的相关信息，包括Etag和PartNumber等信息.
+        """
+        headers = mapped(kwargs)
+        decodeflag = True
+        params = {
+            'uploadId': UploadId,
+            'part-number-marker': PartNumberMarker,
+            'max-parts': MaxParts}
+        if EncodingType:
+            if EncodingType != 'url':
+                raise CosClientError('EncodingType must be url')
+            params['encoding-type'] = EncodingType
+            decodeflag = False
+        else:
+            params['encoding-type'] = 'url'
+        params = format_values(params)
+        url = self._conf.uri(bucket=Bucket, path=Key)
+        logger.info("list multipart upload parts, url=:%s ,headers=:%s", url, headers)
+        rt = await self.send_request(
+            method='GET',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf, Key, params=params),
+            headers=headers,
+            params=params)
+        data = xml_to_dict(await rt.read())
+        format_dict(data, ['Part'])
+        if decodeflag:
+            decode_result(data, ['Key'], [])
+        return data
+
+    # s3 bucket interface begin
+    async def create_bucket(self, Bucket, **kwargs):
+        """创建一个bucket
+
+        :param Bucket(string): 存储桶名称.
+        :param kwargs(dict): 设置请求headers.
+        :return: None.
+        """
+        headers = mapped(kwargs)
+        url = self._conf.uri(bucket=Bucket)
+        logger.info("create bucket, url=:%s ,headers=:%s", url, headers)
+        await self.send_request(
+            method='PUT',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf),
+            headers=headers)
+        return None
+
+    async def delete_bucket(self, Bucket, **kwargs):
+        """删除一个bucket，bucket必须为空
+
+        :param Bucket(string): 存储桶名称.
+        :param kwargs(dict): 设置请求headers.
+        :return: None.
+        """
+        headers = mapped(kwargs)
+        url = self._conf.uri(bucket=Bucket)
+        logger.info("delete bucket, url=:%s ,headers=:%s", url, headers)
+        await self.send_request(
+            method='DELETE',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf),
+            headers=headers)
+        return None
+
+    async def head_bucket(self, Bucket, **kwargs):
+        """确认bucket是否存在
+
+        :param Bucket(string): 存储桶名称.
+        :param kwargs(dict): 设置请求headers.
+        :return: None.
+        """
+        headers = mapped(kwargs)
+        url = self._conf.uri(bucket=Bucket)
+        logger.info("head bucket, url=:%s ,headers=:%s", url, headers)
+        await self.send_request(
+            method='HEAD',
+            url=url,
+            bucket=Bucket,
+            auth=CosS3Auth(self._conf),
+            headers=headers)
+        return None
+
+    async def list_objects(self, Bucket, Prefix="", Delimiter="", Marker="", MaxKeys=1000, EncodingType="", **kwargs):
+        """获取文件列表
+
+        :param Bucket(string): 存储桶名称.
+        :param Prefix(string): 设置匹配文件的前缀.
+        :param Delimiter(string): 分隔符.
+        :param Marker(string): 从marker开始列出条目.
+        :param MaxKeys(int): 设置单次返回最大的数量,最大为1000.
+        :param EncodingType(string): 设置返回结果编码方式,只能设置为url.
+        :param kwargs(dict): 设置请求headers.
+        :return(dict): 文件的相关信息，包括Etag等信息.
+        """
+        decodeflag = True  # 是否需要对结果进行decode
+        headers = mapped(kwargs)
+        url = self._conf.uri(bucket=Bucket)
+        logger.info("list objects, url=:%s ,headers=:%s", url, headers)
+        params = {
+            'prefix': Prefix,
+            'delimiter': Delimiter,
+            'marker': Marker,
+            'max-keys': MaxKeys
+            }
+        if EncodingType:
+            if EncodingType != 'url':
+                raise CosClientError('EncodingType must be url')
+            decodeflag = False  # 用户自己设置了EncodingType不需要去decode
+            params['encoding-type'] = EncodingType
+        else:
+            params['encoding-type'] = 'url'
+        params = format_values(params)
+        rt = await self.send_request(
+            method='GET',
+            url=url,
+            bucket=Bucket,
+            params=params,
+            headers=headers,
+            auth=CosS3Auth(self._conf, params=params))
+        data = xml_to_dict(await rt.read())
+        format_dict(data, ['Contents', 'CommonPrefixes'])
+        if decodeflag:
+            decode_result(
+                data,
+                [
+                    'Prefix',
+                    'Marker',
+                    'NextMarker'
+                ],
+                [
+                    ['Contents', 'Key'],
+                    ['CommonPrefixes', 'Prefix']
+                ]
+            )
+        return data
+
+    async def list_multipart_uploads(self, Bucket, Prefix="", Delimiter="", KeyMarker="", UploadIdMarker="", MaxUploads=1000, EncodingType="", **kwargs):
+        """获取Bucket中正在进行的分块上传
+
+        :param Bucket(string): 存储桶名称.
+        :param Prefix(string): 设置匹配文件的前缀.
+        :param Delimiter(string): 分隔符.
+        :param KeyMarker(string): 从KeyMarker指定的Key开始列出条目.
+        :param UploadIdMarker(string): 从UploadIdMarker指定的UploadID开始列出条目.
+        :param MaxUploads(int): 设置单次返回最大的数量,最大为1000.
+        :param EncodingType(string): 设置返回结果编码方式,只能设置为url.
+        :param kwargs(dict): 设置请求headers.
+        :return(dict): 文件的相关信息，包括Etag等信息.
+        """
+        headers = mapped(kwargs)
+        decodeflag = True
+        url = self._conf.uri(bucket=Bucket)
+        logger.info("get multipart uploads, url=:%s ,headers=:%s", url, headers)
+        params = {
+            'uploads': '',
+            'prefix': Prefix,
+            'delimiter': Delimiter,
+            'key-marker': KeyMarker,
+            'upload-id-marker': UploadIdMarker,
+            'max-uploads': MaxUploads
+            }
+        if EncodingType:
+            if EncodingType != 'url':
+                raise CosClientError('EncodingType must be url')
+            decodeflag = False
+            params['encoding-type'] = EncodingType
+        else:
+            params['encoding-type'] = 'url'
+        params = format_values(params)
+        rt = await self.send_request(
+            method='GET',
+            url=url,
+            bucket=Bucket,
+            params=params,
+            headers=headers,
+            auth=CosS3Auth(self._conf, params=params))
+        data = xml_to_dict(await rt.read())
+        format_dict(data, ['Upload', 'CommonPrefixes'])
+        if decodeflag:
+            decode_result(
+                data,
+                [
+                    'Prefix',
+                    'KeyMarker',
+                    'NextKeyMarker',
+                    'UploadIdMarker',
+                    'NextUploadIdMarker'
+                ],
+                [
+                    ['Upload', 'Key'],
+                    ['CommonPrefixes', 'Prefix']
+                ]
+            )
+        return data
@@ -23,67 +23,152 @@ def filter_headers(data):
     return headers
 
 
+class CosSigner(object):
+    """计算V5签名,只需要method,path,params和headers,不需要构造requests的Request
+
+    签名密钥sign_key只与SecretKey和key-time有关,key-time按照key_time_window对齐后,
+    同一个时间窗口内的请求复用sign_key,每次签名少计算一次HMAC
+
+    .. code-block:: python
+
+        signer = CosSigner(secret_id, secret_key)
+        auth_string = signer.sign('GET', '/test.txt', headers={'Host': 'bucket-1250000000.cos.ap-guangzhou.myqcloud.com'})
+    """
+    def __init__(self, secret_id, secret_key, key_time_window=600):
+        """
+        :param secret_id(string): 秘钥SecretId.
+        :param secret_key(string): 秘钥SecretKey.
+        :param key_time_window(int): key-time的对齐粒度,单位为s,为0时每次签名使用当前时间.
+        """
+        self._secret_id = to_unicode(secret_id)
+        self._secret_key = to_unicode(secret_key)
+        self._key_time_window = key_time_window
+        self._key_time = (None, None, None)  # (窗口起始时间, expire, key_time)
+        self._sign_key = (None, None)  # (key_time, sign_key),整体替换保证多线程下的一致性
+
+    def get_key_time(self, expire, exact=False):
+        """计算签名的有效时间
+
+        :param expire(int): 签名的有效时间,单位为s.
+        :param exact(bool): 为True时从当前时间开始计算,用于有效期需要精确控制的预签名url.
+        :return(string): start;end格式的时间,开始时间提前60s兼容时钟误差.
+        """
+        now = int(time.time())
+        window = self._key_time_window
+        if exact or not window:
+            return u"{bg_time};{ed_time}".format(bg_time=now - 60, ed_time=now + expire)
+        # 对齐到时间窗口,窗口内的任意时刻签名都至少还有expire秒有效期
+        start = now - now % window
+        cached_start, cached_expire, key_time = self._key_time
+        if cached_start != start or cached_expire != expire:
+            key_time = u"{bg_time};{ed_time}".format(bg_time=start - 60, ed_time=start + window + expire)
+            self._key_time = (start, expire, key_time)
+        return key_time
+
+    def get_sign_key(self, key_time):
+        """获取key_time对应的签名密钥,与上一次的key_time相同时直接返回缓存"""
+        cached_time, sign_key = self._sign_key
+        if cached_time != key_time:
+            sign_key = hmac.new(to_bytes(self._secret_key), to_bytes(key_time), hashlib.sha1).hexdigest()
+            self._sign_key = (key_time, sign_key)
+        return sign_key
+
+    def sign(self, method, path=None, params=None, headers=None, expire=10000, key_time=None):
+        """计算Authorization
+
+        :param method(string): http method,如'PUT','GET'.
+        :param path(string): 请求的路径,即对象的Key.
+        :param params(dict): 签名中的http params.
+        :param headers(dict): 签名中的http headers.
+        :param expire(int): 签名有效时间,单位为s.
+        :param key_time(string): 指定签名的有效时间,为空时根据expire计算.
+        :return(string): 计算出的V5签名.
+        """
+        return self._sign_path(self._prepare(method, params, headers, expire, key_time), path)
+
+    def sign_paths(self, method, paths, params=None, headers=None, expire=10000, key_time=None):
+        """对一批路径使用相同的method,params,headers和key-time签名,除路径外的部分只计算一次
+
+        :param method(string): http method,如'PUT','GET'.
+        :param paths(iterable): 请求的路径列表,可以是生成器.
+        :param params(dict): 签名中的http params.
+        :param headers(dict): 签名中的http headers.
+        :param expire(int): 签名有效时间,单位为s.
+        :param key_time(string): 指定签名的有效时间,为空时根据expire计算.
+        :return(generator): 按paths的顺序生成每个路径的签名.
+        """
+        prepared = self._prepare(method, params, headers, expire, key_time)
+        for path in paths:
+            yield self._sign_path(prepared, path)
+
+    def _prepare(self, method, params, headers, expire, key_time):
+        """计算签名中与路径无关的部分"""
+        if key_time is None:
+            key_time = self.get_key_time(expire)
+        uri_params = sorted([(k.lower(), v) for k, v in params.items()]) if params else []
+        # reserved keywords in headers urlencode are -_.~, notice that / should be encoded and space should not be encoded to plus sign(+)
+        headers = sorted([(k.lower(), quote(to_bytes(v), '-_.~')) for k, v in headers.items()]) if headers else []  # headers中的key转换为小写，value进行encode
+        format_head = method.lower() + u"\n"
+        format_tail = u"\n{params}\n{headers}\n".format(
+            params=urlencode(uri_params).replace('+', '%20').replace('%7E', '~') if uri_params else '',
+            headers='&'.join(["%s=%s" % kv for kv in headers])
+        )
+        sign_tpl = "q-sign-algorithm=sha1&q-ak={ak}&q-sign-time={sign_time}&q-key-time={key_time}&q-header-list={headers}&q-url-param-list={params}&q-signature="
+        sign_head = sign_tpl.format(
+            ak=self._secret_id,
+            sign_time=key_time,
+            key_time=key_time,
+            params=';'.join([k for k, v in uri_params]),
+            headers=';'.join([k for k, v in headers])
+        )
+        str_head = "sha1\n{time}\n".format(time=key_time)
+        return format_head, format_tail, str_head, to_bytes(self.get_sign_key(key_time)), sign_head
+
+    def _sign_path(self, prepared, path):
+        format_head, format_tail, str_head, sign_key, sign_head = prepared
+        if path:
+            path = to_unicode(path)
+            if path[0] != u'/':
+                path = u'/' + path
+        else:
+            path = u'/'
+        format_str = format_head + path + format_tail
+        logger.debug("format str: %s", format_str)
+
+        str_to_sign = str_head + hashlib.sha1(to_bytes(format_str)).hexdigest() + "\n"
+        logger.debug('str_to_sign: %s', str_to_sign)
+        sign = hmac.new(sign_key, to_bytes(str_to_sign), hashlib.sha1).hexdigest()
+        logger.debug('sign: %s', sign)
+        return sign_head + sign
+
+
 class CosS3Auth(AuthBase):
 
     def __init__(self, conf, key=None, params={}, expire=10000):
-        self._secret_id = conf._secret_id
-        self._secret_key = conf._secret_key
+        self._conf = conf
         self._anonymous = conf._anonymous
         self._expire = expire
         self._params = params
-        if key:
-            key = to_unicode(key)
-            if key[0] == u'/':
-                self._path = key
-            else:
-                self._path = u'/' + key
-        else:
-            self._path = u'/'
+        self._path = key
 
     def __call__(self, r):
-        path = self._path
-        uri_params = self._params
-        headers = filter_headers(r.headers)
-        uri_params = dict([(k.lower(), v) for k, v in uri_params.items()])
-        # reserved keywords in headers urlencode are -_.~, notice that / should be encoded and space should not be encoded to plus sign(+)
-        headers = dict([(k.lower(), quote(to_bytes(v), '-_.~')) for k, v in headers.items()])  # headers中的key转换为小写，value进行encode
-        uri_params = dict([(k.lower(), v) for k, v in uri_params.items()])
-        format_str = u"{method}\n{host}\n{params}\n{headers}\n".format(
-            method=r.method.lower(),
-            host=path,
-            params=urlencode(sorted(uri_params.items())).replace('+', '%20').replace('%7E', '~'),
-            headers='&'.join(map(lambda tupl: "%s=%s" % (tupl[0], tupl[1]), sorted(headers.items())))
-        )
-        logger.debug("format str: " + format_str)
-
-        start_sign_time = int(time.time())
-        sign_time = "{bg_time};{ed_time}".format(bg_time=start_sign_time-60, ed_time=start_sign_time+self._expire)
-        sha1 = hashlib.sha1()
-        sha1.update(to_bytes(format_str))
-
-        str_to_sign = "sha1\n{time}\n{sha1}\n".format(time=sign_time, sha1=sha1.hexdigest())
-        logger.debug('str_to_sign: ' + str(str_to_sign))
-        sign_key = hmac.new(to_bytes(self._secret_key), to_bytes(sign_time), hashlib.sha1).hexdigest()
-        sign = hmac.new(to_bytes(sign_key), to_bytes(str_to_sign), hashlib.sha1).hexdigest()
-        logger.debug('sign_key: ' + str(sign_key))
-        logger.debug('sign: ' + str(sign))
-        sign_tpl = "q-sign-algorithm=sha1&q-ak={ak}&q-sign-time={sign_time}&q-key-time={key_time}&q-header-list={headers}&q-url-param-list={params}&q-signature={sign}"
-
-        r.headers['Authorization'] = sign_tpl.format(
-            ak=self._secret_id,
-            sign_time=sign_time,
-            key_time=sign_time,
-            params=';'.join(sorted(map(lambda k: k.lower(), uri_params.keys()))),
-            headers=';'.join(sorted(headers.keys())),
-            sign=sign
-        )
-        if self._anonymous:
-            r.headers['Authorization'] = ""
-        logger.debug("sign_key" + str(sign_key))
+        r.headers['Authorization'] = self.get_authorization(r.method, r.headers)
         logger.debug(r.headers['Authorization'])
-        logger.debug("request headers: " + str(r.headers))
+        logger.debug("request headers: %s", r.headers)
         return r
 
+    def get_authorization(self, method, headers):
+        """不构造Request直接计算请求的Authorization,匿名访问时为空
+
+        使用临时秘钥时同时在headers中设置对应的token,token与签名取自同一组秘钥
+        """
+        if self._anonymous:
+            return ""
+        credential = self._conf.get_credential()
+        if credential.token is not None:
+            headers['x-cos-security-token'] = credential.token
+        return credential.signer.sign(method, self._path, self._params, filter_headers(headers), self._expire)
+
 
 if __name__ == "__main__":
     pass
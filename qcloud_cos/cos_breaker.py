@@ -0,0 +1,172 @@
+# -*- coding=utf-8
+
+import threading
+import time
+from collections import deque
+from requests.exceptions import ConnectionError, Timeout, ChunkedEncodingError
+from .cos_exception import CosCircuitOpenError
+
+
+class _Circuit(object):
+    """单个节点的熔断状态,按时间分桶统计滑动窗口内的请求数和失败数"""
+    def __init__(self):
+        self.state = CircuitBreaker.CLOSED
+        self.buckets = deque()  # [分桶起始时间, 请求数, 失败数]
+        self.opened_at = 0
+        self.probes = 0
+        self.probe_successes = 0
+        self.trips = 0
+        self.rejected = 0
+
+    def counts(self):
+        requests = sum(b[1] for b in self.buckets)
+        failures = sum(b[2] for b in self.buckets)
+        return requests, failures
+
+
+class CircuitBreaker(object):
+    """按访问节点熔断,节点在滑动窗口内的错误率超过阈值后打开熔断器,请求直接抛出CosCircuitOpenError,
+    不再占用重试次数和超时时间;open_timeout秒后进入半开状态,放行half_open_requests个探测请求,
+    探测全部成功后关闭熔断器,任一失败则重新打开
+
+    网络错误和500,502,504认为是失败,503 SlowDown是存储桶级别的限流,不触发熔断
+
+    .. code-block:: python
+
+        breaker = CircuitBreaker(failure_rate=0.5, window=10, min_requests=20, open_timeout=30)
+        config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+        client = CosS3Client(config, circuit_breaker=breaker)
+        if client.is_circuit_open('bucket'):
+            pass  # 节点不可用,暂停调度
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    failure_exceptions = (ConnectionError, Timeout, ChunkedEncodingError)
+    failure_status = (500, 502, 504)
+
+    def __init__(self, failure_rate=0.5, window=10, min_requests=20, open_timeout=30, half_open_requests=1, buckets=10):
+        """
+        :param failure_rate(float): 打开熔断器的错误率阈值.
+        :param window(float): 统计错误率的滑动窗口,单位为s.
+        :param min_requests(int): 窗口内请求数达到min_requests才计算错误率,避免少量请求失败就熔断.
+        :param open_timeout(float): 熔断器打开后进入半开状态的等待时间,单位为s.
+        :param half_open_requests(int): 半开状态下放行的探测请求数.
+        :param buckets(int): 滑动窗口的分桶数.
+        """
+        self.failure_rate = failure_rate
+        self.window = float(window)
+        self.min_requests = min_requests
+        self.open_timeout = open_timeout
+        self.half_open_requests = half_open_requests
+        self._bucket_width = self.window / buckets
+        self._lock = threading.Lock()
+        self._circuits = dict()
+
+    def _get_circuit(self, key):
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = _Circuit()
+        return circuit
+
+    def _expire(self, circuit, now):
+        while circuit.buckets and circuit.buckets[0][0] <= now - self.window:
+            circuit.buckets.popleft()
+
+    def _retry_after(self, circuit, now):
+        return max(circuit.opened_at + self.open_timeout - now, 0)
+
+    def before_request(self, key):
+        """发起请求前检查熔断器,熔断器打开或者半开状态的探测请求已满时抛出CosCircuitOpenError
+
+        :param key(string): 节点,如域名或者ip:port.
+        """
+        now = time.time()
+        with self._lock:
+            circuit = self._get_circuit(key)
+            if circuit.state == self.OPEN and self._retry_after(circuit, now) <= 0:
+                circuit.state = self.HALF_OPEN
+                circuit.probes = 0
+                circuit.probe_successes = 0
+            if circuit.state == self.CLOSED:
+                return
+            if circuit.state == self.HALF_OPEN and circuit.probes < self.half_open_requests:
+                circuit.probes += 1
+                return
+            circuit.rejected += 1
+            retry_after = self._retry_after(circuit, now)
+        raise CosCircuitOpenError(key, retry_after)
+
+    def after_request(self, key, success=None):
+        """记录请求结果,每次before_request通过后都需要调用
+
+        :param key(string): 节点.
+        :param success(bool): 请求是否成功,为None时表示与节点健康无关的错误,不计入统计.
+        """
+        now = time.time()
+        with self._lock:
+            circuit = self._get_circuit(key)
+            if circuit.state == self.HALF_OPEN:
+                if success is None:  # 释放探测名额
+                    circuit.probes -= 1
+                elif not success:
+                    self._open(circuit, now)
+                else:
+                    circuit.probe_successes += 1
+                    if circuit.probe_successes >= self.half_open_requests:
+                        circuit.state = self.CLOSED
+                        circuit.buckets.clear()
+                return
+            if success is None or circuit.state == self.OPEN:
+                return
+            self._expire(circuit, now)
+            if not circuit.buckets or circuit.buckets[-1][0] + self._bucket_width <= now:
+                circuit.buckets.append([now, 0, 0])
+            circuit.buckets[-1][1] += 1
+            if not success:
+                circuit.buckets[-1][2] += 1
+                requests, failures = circuit.counts()
+                if requests >= self.min_requests and failures >= self.failure_rate * requests:
+                    self._open(circuit, now)
+
+    def _open(self, circuit, now):
+        circuit.state = self.OPEN
+        circuit.opened_at = now
+        circuit.trips += 1
+        circuit.buckets.clear()
+
+    def record_exception(self, key, exception):
+        """记录请求抛出的异常,只有网络错误计入失败"""
+        self.after_request(key, False if isinstance(exception, self.failure_exceptions) else None)
+
+    def record_response(self, key, status_code):
+        """记录服务端返回的状态码"""
+        self.after_request(key, status_code not in self.failure_status)
+
+    def get_state(self, key=None):
+        """获取熔断器状态
+
+        :param key(string): 节点,为空时返回全部节点.
+        :return(dict): 节点对应的状态,窗口内的请求数和失败数,打开次数,拒绝的请求数以及进入半开状态还需要等待的时间.
+        """
+        now = time.time()
+        with self._lock:
+            keys = [key] if key is not None else list(self._circuits)
+            result = dict()
+            for k in keys:
+                circuit = self._get_circuit(k)
+                self._expire(circuit, now)
+                requests, failures = circuit.counts()
+                state = circuit.state
+                if state == self.OPEN and self._retry_after(circuit, now) <= 0:
+                    state = self.HALF_OPEN  # 下一个请求会作为探测请求放行
+                result[k] = {
+                    'state': state,
+                    'requests': requests,
+                    'failures': failures,
+                    'trips': circuit.trips,
+                    'rejected': circuit.rejected,
+                    'retry_after': self._retry_after(circuit, now) if state == self.OPEN else 0
+                }
+            return result
@@ -7,21 +7,40 @@ import base64
 import os
 import sys
 import copy
+import itertools
 import json
+import time
+import uuid
 import xml.dom.minidom
 import xml.etree.ElementTree
 from requests import Request, Session
+from requests.exceptions import Timeout
 from datetime import datetime
-from six.moves.urllib.parse import quote, unquote, urlencode
+from six.moves import zip as izip
+from six.moves.urllib.parse import quote, unquote, urlencode, urlsplit
 from hashlib import md5
-from dicttoxml import dicttoxml
 from .streambody import StreamBody
 from .xml2dict import Xml2Dict
-from .cos_auth import CosS3Auth
+from .cos_auth import CosS3Auth, filter_headers
+from .cos_credential import Credential
+from .cos_listing import ListObjectsStream, ObjectListing
+from .cos_paginator import Paginator, PAGINATED_OPERATIONS, next_page_markers
+from . import cos_xml
 from .cos_comm import *
 from .cos_threadpool import SimpleThreadPool
+from .cos_process import SimpleProcessPool, RESULT_LIST
+from .cos_adapter import CosHTTPAdapter
+from .cos_endpoint import EndpointPool
+from .cos_hooks import Hooks, HookContext, TimedAuth
+from .cos_metrics import MetricsRegistry
+from .cos_hedge import hedged_call
+from .cos_timeout import TimeoutPolicy, get_transfer_size
+from .cos_ratelimit import ThrottledBody
+from .cos_breaker import CircuitBreaker
+from .cos_retry import RetryPolicy
 from .cos_exception import CosClientError
 from .cos_exception import CosServiceError
+from .cos_exception import CosCircuitOpenError
 from .version import __version__
 
 logger = logging.getLogger(__name__)
@@ -29,9 +48,13 @@ logger = logging.getLogger(__name__)
 
 class CosConfig(object):
     """config类，保存用户相关信息"""
+    max_cached_buckets = 1024  # 缓存url前缀和Host的存储桶数量上限
+
     def __init__(self, Appid=None, Region=None, SecretId=None, SecretKey=None, Token=None, Scheme=None, Timeout=None,
                  Access_id=None, Access_key=None, Secret_id=None, Secret_key=None,
-                 Endpoint=None, IP=None, Port=None, Anonymous=None, UA=None, Proxies=None):
+                 Endpoint=None, IP=None, Port=None, Anonymous=None, UA=None, Proxies=None,
+                 PoolConnections=10, PoolMaxSize=10, PoolBlock=False, RetryBufferSize=None,
+                 DnsCache=None, DnsPrefetchBuckets=None, TimeoutPolicy=None, CredentialProvider=None, LazyResponse=False):
         """初始化，保存用户的信息
 
         :param Appid(string): 用户APPID.
@@ -40,28 +63,47 @@ class CosConfig(object):
         :param SecretKey(string): 秘钥SecretKey.
         :param Token(string): 临时秘钥使用的token.
         :param Scheme(string): http/https
-        :param Timeout(int): http超时时间.
+        :param Timeout(int): http超时时间,设置TimeoutPolicy时不生效.
         :param Access_id(string): 秘钥AccessId(兼容).
         :param Access_key(string): 秘钥AccessKey(兼容).
         :param Secret_id(string): 秘钥SecretId(兼容).
         :param Secret_key(string): 秘钥SecretKey(兼容).
         :param Endpoint(string): endpoint.
-        :param IP(string): 访问COS的ip
+        :param IP(string|list|EndpointPool): 访问COS的ip,指定多个ip时请求在这些ip之间负载均衡
         :param Port(int):  访问COS的port
         :param Anonymous(bool):  是否使用匿名访问COS
         :param UA(string):  使用自定义的UA来访问COS
         :param Proxies(dict):  使用代理来访问COS
+        :param PoolConnections(int):  连接池缓存的host数量
+        :param PoolMaxSize(int):  每个host缓存的最大连接数,upload_file等并发接口会自动扩大到并发线程数
+        :param PoolBlock(bool):  连接数达到PoolMaxSize时是否阻塞等待空闲连接,为True时PoolMaxSize即为每个host的连接上限
+        :param RetryBufferSize(int):  缓存不支持seek的Body用于重试时占用的最大内存,单位为字节,超过的部分写入临时文件,为空时这类请求不重试
+        :param DnsCache(DnsCache):  新建连接时使用的DNS缓存,多个配置可以共用同一个DnsCache
+        :param DnsPrefetchBuckets(list):  创建client时在后台预先解析这些存储桶的域名,需要同时设置DnsCache
+        :param TimeoutPolicy(TimeoutPolicy):  分别设置连接和读超时,读超时按照上传,下载和拷贝的数据量计算
+        :param CredentialProvider(CredentialProvider):  秘钥提供者,每次签名时从中获取秘钥,设置后不需要传入SecretId和SecretKey
+        :param LazyResponse(bool):  list_objects,get_bucket_*等接口返回兼容dict的结果,第一次访问时才解析xml,
+            解析前json.dumps等直接读取dict内部存储的函数会得到空的dict
         """
         self._appid = to_unicode(Appid)
         self._token = to_unicode(Token)
         self._timeout = Timeout
         self._region = Region
         self._endpoint = format_endpoint(Endpoint, Region)
-        self._ip = to_unicode(IP)
-        self._port = Port
+        self.set_ip_port(IP, Port)
         self._anonymous = Anonymous
         self._ua = UA
         self._proxies = Proxies
+        self._pool_connections = PoolConnections
+        self._pool_maxsize = PoolMaxSize
+        self._pool_block = PoolBlock
+        self._retry_buffer_size = RetryBufferSize
+        self._dns_cache = DnsCache
+        self._dns_prefetch_buckets = DnsPrefetchBuckets or []
+        self._timeout_policy = TimeoutPolicy
+        self._credential_provider = CredentialProvider
+        self._credential = None
+        self._lazy_response = LazyResponse
 
         if Scheme is None:
             Scheme = u'https'
@@ -80,8 +122,10 @@ class CosConfig(object):
         elif(Access_id and Access_key):
             self._secret_id = to_unicode(Access_id)
             self._secret_key = to_unicode(Access_key)
-        else:
+        elif CredentialProvider is None:
             raise CosClientError('SecretId and SecretKey is Required!')
+        if CredentialProvider is None:
+            self._credential = Credential(self._secret_id, self._secret_key, self._token)
 
     def uri(self, bucket, path=None, endpoint=None):
         """拼接url
@@ -90,6 +134,24 @@ class CosConfig(object):
         :param path(string): 请求COS的路径.
         :return(string): 请求COS的URL地址.
         """
+        prefix = self._get_url_prefix(bucket, endpoint)
+        if path is not None:
+            if not path:
+                raise CosClientError("Key is required not empty")
+            path = to_unicode(path)
+            if path[0] == u'/':
+                path = path[1:]
+            path = quote(to_bytes(path), '/-_.~')
+            path = path.replace('./', '.%2F')
+            return prefix + to_unicode(path)
+        return prefix
+
+    def _get_url_prefix(self, bucket, endpoint=None):
+        """获取存储桶请求url中path之前的部分,结果按存储桶缓存,避免每次请求都校验存储桶名称"""
+        cache_key = (bucket, endpoint)
+        prefix = self._url_prefix_cache.get(cache_key) if isinstance(bucket, string_types) else None
+        if prefix is not None:
+            return prefix
         bucket = format_bucket(bucket, self._appid)
         scheme = self._scheme
         if endpoint is None:
@@ -102,43 +164,72 @@ class CosConfig(object):
             url = self._ip
             if self._port is not None:
                 url = u"{ip}:{port}".format(ip=self._ip, port=self._port)
-
-        if path is not None:
-            if not path:
-                raise CosClientError("Key is required not empty")
-            path = to_unicode(path)
-            if path[0] == u'/':
-                path = path[1:]
-            path = quote(to_bytes(path), '/-_.~')
-            path = path.replace('./', '.%2F')
-            request_url = u"{scheme}://{url}/{path}".format(
-                scheme=to_unicode(scheme),
-                url=to_unicode(url),
-                path=to_unicode(path)
-            )
-        else:
-            request_url = u"{scheme}://{url}/".format(
-                scheme=to_unicode(scheme),
-                url=to_unicode(url)
-            )
-        return request_url
+        prefix = u"{scheme}://{url}/".format(
+            scheme=to_unicode(scheme),
+            url=to_unicode(url)
+        )
+        if len(self._url_prefix_cache) >= self.max_cached_buckets:
+            self._url_prefix_cache.clear()
+        self._url_prefix_cache[cache_key] = prefix
+        return prefix
 
     def get_host(self, Bucket):
         """传入bucket名称,根据endpoint获取Host名称
         :param Bucket(string): bucket名称
         :return (string): Host名称
         """
-        return u"{bucket}.{endpoint}".format(bucket=format_bucket(Bucket, self._appid), endpoint=self._endpoint)
+        host = self._host_cache.get(Bucket) if isinstance(Bucket, string_types) else None
+        if host is None:
+            host = u"{bucket}.{endpoint}".format(bucket=format_bucket(Bucket, self._appid), endpoint=self._endpoint)
+            if len(self._host_cache) >= self.max_cached_buckets:
+                self._host_cache.clear()
+            self._host_cache[Bucket] = host
+        return host
 
     def set_ip_port(self, IP, Port=None):
         """设置直接访问的ip:port,可以不指定Port,http默认为80,https默认为443
-        :param IP(string): 访问COS的ip
-        :param Port(int):  访问COS的port
+        :param IP(string|list|EndpointPool): 访问COS的ip,可以是ip或者ip:port的列表,也可以是自定义的EndpointPool
+        :param Port(int):  访问COS的port,IP为列表时作为未指定端口的ip的默认端口
         :return None
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            # 请求在多个ip之间轮询,连续失败的ip会被暂时摘除
+            config.set_ip_port(['10.0.0.1', '10.0.0.2', '10.0.0.3:8080'], 80)
         """
+        self._url_prefix_cache = dict()
+        self._host_cache = dict()
+        self._endpoint_pool = None
+        if isinstance(IP, EndpointPool):
+            self._endpoint_pool = IP
+            IP = None
+        elif isinstance(IP, (list, tuple)):
+            self._endpoint_pool = EndpointPool(IP, default_port=Port)
+            IP = None
         self._ip = to_unicode(IP)
         self._port = Port
 
+    def __getstate__(self):
+        """多进程传输时配置被复制到子进程,连接池,DNS缓存等进程内的状态不复制,子进程重新创建"""
+        state = self.__dict__.copy()
+        state['_url_prefix_cache'] = dict()
+        state['_host_cache'] = dict()
+        state['_dns_cache'] = None
+        if self._endpoint_pool is not None:
+            state['_endpoint_pool'] = [node['address'] for node in self._endpoint_pool.get_stats()]
+        policy = self._timeout_policy
+        if policy is not None:
+            state['_timeout_policy'] = (policy.connect_timeout, policy.read_timeout, policy.min_throughput, policy.max_read_timeout)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._endpoint_pool is not None:
+            self._endpoint_pool = EndpointPool(self._endpoint_pool)
+        if self._timeout_policy is not None:
+            self._timeout_policy = TimeoutPolicy(*self._timeout_policy)
+
     def set_credential(self, SecretId, SecretKey, Token=None):
         """设置访问的身份,包括secret_id,secret_key,临时秘钥token默认为空
         :param SecretId(string): 秘钥SecretId.
@@ -148,28 +239,212 @@ class CosConfig(object):
         self._secret_id = to_unicode(SecretId)
         self._secret_key = to_unicode(SecretKey)
         self._token = to_unicode(Token)
+        # 整体替换秘钥,正在签名的请求使用的仍是完整的旧秘钥
+        self._credential = Credential(self._secret_id, self._secret_key, self._token)
+        self._credential_provider = None
+
+    def get_credential(self):
+        """获取当前使用的秘钥,设置了CredentialProvider时由其提供
+        :return(Credential): 当前使用的秘钥.
+        """
+        if self._credential_provider is not None:
+            return self._credential_provider.get_credential()
+        return self._credential
 
 
 class CosS3Client(object):
     """cos客户端类，封装相应请求"""
-    def __init__(self, conf, retry=1, session=None):
+    def __init__(self, conf, retry=1, session=None, retry_policy=None, hedge_policy=None, rate_limiter=None, circuit_breaker=None):
         """初始化client对象
 
         :param conf(CosConfig): 用户的配置.
         :param retry(int): 失败重试的次数.
         :param session(object): http session.
+        :param retry_policy(RetryPolicy): 重试策略,设置时忽略retry参数.
+        :param hedge_policy(HedgePolicy): get_object,head_object等读请求的对冲策略,为空时不对冲.
+        :param rate_limiter(RateLimiter): 上传和下载的带宽限制,所有线程共用,单次调用可以通过RateLimiter参数覆盖.
+        :param circuit_breaker(CircuitBreaker): 按访问节点熔断,节点异常时请求直接失败,为空时不熔断.
         """
         self._conf = conf
-        self._retry = retry  # 重试的次数，分片上传时可适当增大
+        self._hedge_policy = hedge_policy
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+        if retry_policy is None:
+            retry_policy = RetryPolicy(max_retries=retry)
+        self._retry_policy = retry_policy
+        self._retry = retry_policy.max_retries  # 重试的次数，分片上传时可适当增大
+        self._adapter = None
         if session is None:
             self._session = requests.session()
+            self._adapter = CosHTTPAdapter(
+                pool_connections=conf._pool_connections,
+                pool_maxsize=conf._pool_maxsize,
+                pool_block=conf._pool_block,
+                dns_cache=conf._dns_cache)
+            self._session.mount('http://', self._adapter)
+            self._session.mount('https://', self._adapter)
         else:
             self._session = session
+        self._hooks = Hooks()
+        if conf._dns_cache is not None and conf._ip is None and conf._endpoint_pool is None:
+            for bucket in conf._dns_prefetch_buckets:
+                conf._dns_cache.prefetch(urlsplit(conf.uri(bucket)).hostname)
 
     def get_conf():
         """获取配置"""
         return self._conf
 
+    def get_connection_stats(self):
+        """获取连接池的统计信息,用于确认连接是否被复用,使用自定义session时返回None
+
+        :return(dict): 请求数,新建连接数,复用连接的请求数以及每个host的最大连接数.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            response = client.get_connection_stats()
+            print (response['new_connections'], response['reused_connections'])
+        """
+        if self._adapter is None:
+            return None
+        stats = self._adapter.stats.snapshot()
+        stats['pool_maxsize'] = self._adapter.pool_maxsize
+        return stats
+
+    def get_endpoint_stats(self):
+        """获取多个ip时每个ip的健康状态和延迟统计,没有配置多个ip时返回None
+
+        :return(list): 每个ip的地址,健康状态,并发数,请求数,失败数,被摘除次数以及延迟统计.
+        """
+        if self._conf._endpoint_pool is None:
+            return None
+        return self._conf._endpoint_pool.get_stats()
+
+    def get_retry_metrics(self):
+        """获取重试统计,包括调用次数,请求次数,重试次数和每次调用请求次数的分布
+
+        :return(dict): 重试策略的统计信息.
+        """
+        return self._retry_policy.get_metrics()
+
+    def get_hedge_metrics(self):
+        """获取读请求对冲的统计,没有设置hedge_policy时返回None
+
+        :return(dict): 调用次数,对冲次数,对冲请求先返回的次数,原请求先返回的次数以及当前的对冲等待时间.
+        """
+        if self._hedge_policy is None:
+            return None
+        return self._hedge_policy.get_metrics()
+
+    def _get_circuit_key(self, url, bucket=None):
+        """熔断器按照请求的节点统计,存储桶域名去掉存储桶名称,同一个地域的存储桶共用一个熔断器"""
+        host = urlsplit(url).netloc
+        if bucket is not None:
+            prefix = format_bucket(bucket, self._conf._appid) + u'.'
+            if host.startswith(prefix):
+                host = host[len(prefix):]
+        return host
+
+    def get_circuit_state(self, Bucket=None):
+        """获取熔断器的状态,没有设置circuit_breaker时返回None
+
+        :param Bucket(string): 存储桶名称,为空时返回所有节点的状态.
+        :return(dict): 节点的状态(closed,open,half_open),窗口内的请求数和失败数,打开次数,拒绝的请求数以及进入半开状态还需要等待的时间.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config, circuit_breaker=CircuitBreaker())
+            response = client.get_circuit_state('bucket')
+            if response['state'] == 'open':
+                print (response['retry_after'])
+        """
+        if self._circuit_breaker is None:
+            return None
+        if Bucket is None:
+            return self._circuit_breaker.get_state()
+        key = self._get_circuit_key(self._conf.uri(bucket=Bucket), Bucket)
+        return self._circuit_breaker.get_state(key)[key]
+
+    def is_circuit_open(self, Bucket):
+        """判断存储桶所在节点的熔断器是否打开,调度方可以据此提前暂停提交请求
+
+        :param Bucket(string): 存储桶名称.
+        :return(bool): 熔断器打开时返回True.
+        """
+        state = self.get_circuit_state(Bucket)
+        return state is not None and state['state'] == CircuitBreaker.OPEN
+
+    def warm_up(self, Bucket, connections=10):
+        """预先建立到存储桶的keep-alive连接并放入连接池,第一批请求不再等待TCP和TLS握手
+
+        :param Bucket(string): 存储桶名称.
+        :param connections(int): 需要建立的连接数,连接池会扩大到该大小,配置了多个ip时平均分配到每个ip.
+        :return(dict): requested为请求的连接数,established为新建立的连接数,already_connected为连接池中已有的连接数,failed为建立失败的连接数.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 服务启动时预先建立20个连接
+            response = client.warm_up(Bucket='bucket', connections=20)
+            print (response['established'])
+        """
+        self._ensure_pool_size(connections)
+        url = self._conf.uri(bucket=Bucket)
+        urls = [url]
+        if self._conf._endpoint_pool is not None:
+            urls = self._conf._endpoint_pool.rewrite_urls(url)
+        verify = None
+        if (self._conf._ip is not None or self._conf._endpoint_pool is not None) and self._conf._scheme == 'https':
+            verify = False
+        timeout = self._conf._timeout if self._conf._timeout is not None else 30
+        conns = []
+        for i in range(connections):
+            # 与send_request使用相同的证书和代理配置,保证取到的是同一个连接池
+            request = Request('HEAD', urls[i % len(urls)]).prepare()
+            settings = self._session.merge_environment_settings(request.url, self._conf._proxies or {}, None, verify, None)
+            adapter = self._session.get_adapter(request.url)
+            if hasattr(adapter, 'get_connection_with_tls_context'):
+                pool = adapter.get_connection_with_tls_context(request, settings['verify'], proxies=settings['proxies'], cert=settings['cert'])
+            else:
+                pool = adapter.get_connection(request.url, settings['proxies'])
+            conns.append((pool, pool._get_conn()))
+
+        def connect(conn):
+            if getattr(conn, 'sock', None) is not None:  # 连接池中已有的空闲连接
+                return False
+            conn.timeout = timeout
+            conn.connect()
+            return True
+
+        thread_pool = SimpleThreadPool(min(connections, 32))
+        for pool, conn in conns:
+            thread_pool.add_task(connect, conn)
+        thread_pool.wait_completion()
+        result = {'requested': connections, 'established': 0, 'already_connected': 0, 'failed': 0}
+        for succ, fail, rets in thread_pool.get_result()['detail']:
+            for ret in rets:
+                if isinstance(ret, Exception):
+                    result['failed'] += 1
+                elif ret:
+                    result['established'] += 1
+                else:
+                    result['already_connected'] += 1
+        # 连接放回连接池,失败的连接关闭后放回,使用时重新建立
+        for pool, conn in conns:
+            if getattr(conn, 'sock', None) is None:
+                conn.close()
+            pool._put_conn(conn)
+        logger.info("warm up, url=:%s, result=:%s", url, result)
+        return result
+
+    def _ensure_pool_size(self, size):
+        """保证连接池的大小不小于并发数,避免并发请求时连接被丢弃后重新握手"""
+        if self._adapter is not None and self._adapter.resize(size):
+            logger.info("resize connection pool, pool_maxsize=%s", size)
+
     def get_auth(self, Method, Bucket, Key, Expired=300, Headers={}, Params={}):
         """获取签名
 
@@ -196,47 +471,127 @@ class CosS3Client(object):
                 )
             print (auth_string)
         """
-        url = self._conf.uri(bucket=Bucket, path=Key)
-        r = Request(Method, url, headers=Headers, params=Params)
-        auth = CosS3Auth(self._conf, Key, Params, Expired)
-        return auth(r).headers['Authorization']
+        if self._conf._anonymous:
+            return ""
+        # 校验存储桶名称和Key
+        self._conf.uri(bucket=Bucket, path=Key)
+        signer = self._conf.get_credential().signer
+        # 签名的有效期从当前时间开始计算,不按时间窗口对齐
+        key_time = signer.get_key_time(Expired, exact=True)
+        return signer.sign(Method, Key, Params, filter_headers(Headers), key_time=key_time)
+
+    def send_request(self, method, url, bucket, timeout=None, operation=None, **kwargs):
+        """封装request库发起http请求
 
-    def send_request(self, method, url, bucket, timeout=30, **kwargs):
-        """封装request库发起http请求"""
+        :param timeout(int): 接口指定的超时时间,默认为30s;配置了TimeoutPolicy时作为读超时的下限.
+        :param operation(string): 发起请求的接口名,用于hook,监控指标和对冲.
+        """
+        explicit_timeout = timeout
         if self._conf._timeout is not None:  # 用户自定义超时时间
             timeout = self._conf._timeout
+        elif timeout is None:
+            timeout = 30
         if self._conf._ua is not None:
             kwargs['headers']['User-Agent'] = self._conf._ua
         else:
             kwargs['headers']['User-Agent'] = 'cos-python-sdk-v' + __version__
-        if self._conf._token is not None:
-            kwargs['headers']['x-cos-security-token'] = self._conf._token
         if bucket is not None:
             kwargs['headers']['Host'] = self._conf.get_host(bucket)
         kwargs['headers'] = format_values(kwargs['headers'])
+        if 'params' in kwargs and not kwargs['params']:  # 空的params在requests中也要经过一次编码
+            del kwargs['params']
+        rate_limiter = kwargs.pop('rate_limiter', None)
         if 'data' in kwargs:
             kwargs['data'] = to_bytes(kwargs['data'])
-        if self._conf._ip is not None and self._conf._scheme == 'https':
+        # 配置了多个ip时,请求存储桶的每次重试都重新选择ip
+        pool = self._conf._endpoint_pool if bucket is not None else None
+        if (self._conf._ip is not None or pool is not None) and self._conf._scheme == 'https':
             kwargs['verify'] = False
-        for j in range(self._retry + 1):
+        policy = self._retry_policy
+        # 记录body的起始位置,重试前回退到该位置重新发送;不支持seek的流只有配置了RetryBufferSize才缓存后重试
+        body_position = get_body_position(kwargs.get('data'))
+        if body_position is None and self._conf._retry_buffer_size is not None and policy.max_retries > 0:
+            kwargs['data'] = SpooledBody(kwargs['data'], self._conf._retry_buffer_size)
+            body_position = 0
+        retryable_body = body_position is not None
+        if rate_limiter is not None and kwargs.get('data') and retryable_body:  # 不支持seek的流需要设置RetryBufferSize才能限速
+            kwargs['data'] = ThrottledBody(kwargs['data'], rate_limiter)
+        timeout_policy = self._conf._timeout_policy
+        if timeout_policy is not None:  # 按需要传输的数据量计算超时时间
+            transfer_size = get_transfer_size(kwargs['headers'], kwargs.get('data'))
+            timeout = timeout_policy.get_timeout(transfer_size, explicit_timeout)
+        context = None
+        if self._hooks.enabled:  # 没有注册hook时不创建上下文
+            context = HookContext(operation, method, url, bucket, kwargs['headers'], kwargs.get('data'), kwargs.get('stream', False))
+            kwargs['auth'] = TimedAuth(kwargs['auth'], self._hooks, context)
+        breaker = self._circuit_breaker
+        circuit_key = self._get_circuit_key(url, bucket) if breaker is not None else None
+        hedge = False
+        if self._hedge_policy is not None and method in ('GET', 'HEAD'):
+            hedge = operation in self._hedge_policy.operations
+        for j in range(policy.max_retries + 1):
+            if j > 0:
+                rewind_body(kwargs.get('data'), body_position)
+            if breaker is not None:
+                try:  # 熔断器打开时不再发起请求,也不再重试
+                    breaker.before_request(circuit_key)
+                except CosCircuitOpenError as e:
+                    logger.warning('url:%s, retry_time:%d rejected: %s', url, j, e)
+                    self._raise_error(context, e)
+            node = None
+            request_url = url
+            if pool is not None:
+                node = pool.acquire()
+                request_url = node.rewrite_url(url)
+            if context is not None:
+                context.attempt = j + 1
+                self._hooks.emit('before_send', context)
+                if self._adapter is not None:
+                    self._adapter.stats.pop_connect_time()
+            start_time = time.time()
             try:
-                if method == 'POST':
-                    res = self._session.post(url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
+                if hedge:
+                    res = self._send_hedged(method, request_url, url, pool, timeout, kwargs, context)
+                elif method == 'POST':
+                    res = self._session.post(request_url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
                 elif method == 'GET':
-                    res = self._session.get(url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
+                    res = self._session.get(request_url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
                 elif method == 'PUT':
-                    res = self._session.put(url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
+                    res = self._session.put(request_url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
                 elif method == 'DELETE':
-                    res = self._session.delete(url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
+                    res = self._session.delete(request_url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
                 elif method == 'HEAD':
-                    res = self._session.head(url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
-                if res.status_code < 400:  # 2xx和3xx都认为是成功的
-                    return res
+                    res = self._session.head(request_url, timeout=timeout, proxies=self._conf._proxies, **kwargs)
             except Exception as e:  # 捕获requests抛出的如timeout等客户端错误,转化为客户端错误
-                logger.exception('url:%s, retry_time:%d exception:%s' % (url, j, str(e)))
-                if j < self._retry:
+                if node is not None:
+                    pool.release(node, False, time.time() - start_time)
+                if breaker is not None:
+                    breaker.record_exception(circuit_key, e)
+                logger.exception('url:%s, retry_time:%d exception:%s', request_url, j, e)
+                # 只有网络错误可以重试,重试前按照退避时间等待
+                if retryable_body and policy.is_retryable_exception(e) and policy.allow_retry(j + 1, isinstance(e, Timeout)):
+                    self._sleep_before_retry(context, policy.get_delay(j + 1), e)
                     continue
-                raise CosClientError(str(e))
+                policy.record_call(j + 1, False)
+                self._raise_error(context, CosClientError(str(e)))
+            if node is not None:
+                # 503 SlowDown是存储桶级别的限流,与节点的健康状态无关
+                pool.release(node, res.status_code < 500 or res.status_code == 503, time.time() - start_time)
+            if breaker is not None:
+                breaker.record_response(circuit_key, res.status_code)
+            if context is not None:
+                self._emit_response_hooks(context, res, start_time)
+            if res.status_code < 400:  # 2xx和3xx都认为是成功的
+                policy.record_call(j + 1, True)
+                if timeout_policy is not None and kwargs.get('data') is not None:
+                    timeout_policy.record_transfer(transfer_size, time.time() - start_time)
+                return res
+            # 403,404等错误重试也不会成功,5xx和SlowDown等错误退避后重试
+            if not (retryable_body and policy.is_retryable_response(res.status_code, res.content) and policy.allow_retry(j + 1)):
+                break
+            logger.warning('url:%s, retry_time:%d status_code:%d', request_url, j, res.status_code)
+            self._sleep_before_retry(context, policy.get_delay(j + 1))
+        policy.record_call(j + 1, False)
 
         if res.status_code >= 400:  # 所有的4XX,5XX都认为是COSServiceError
             if method == 'HEAD' and res.status_code == 404:   # Head 需要处理
@@ -249,16 +604,136 @@ class CosS3Client(object):
                 if 'x-cos-trace-id' in res.headers:
                     info['traceid'] = res.headers['x-cos-trace-id']
                 logger.error(info)
-                raise CosServiceError(method, info, res.status_code)
+                self._raise_error(context, CosServiceError(method, info, res.status_code))
             else:
                 msg = res.text
                 if msg == u'':  # 服务器没有返回Error Body时 给出头部的信息
                     msg = res.headers
                 logger.error(msg)
-                raise CosServiceError(method, msg, res.status_code)
+                self._raise_error(context, CosServiceError(method, msg, res.status_code))
 
         return None
 
+    def _send_hedged(self, method, request_url, url, pool, timeout, kwargs, context):
+        """发起对冲的读请求,配置了多个ip时对冲请求重新选择ip
+
+        两个请求都以stream方式发送,后返回的请求收到响应头后直接关闭连接,不再读取body
+        """
+        primary_kwargs = dict(kwargs, stream=True)
+        hedge_kwargs = dict(primary_kwargs)
+        if context is not None:  # 对冲请求在另一个线程中签名和发送,使用独立的上下文
+            hedge_kwargs['auth'] = kwargs['auth'].with_context(context.copy())
+
+        def send(index):
+            if index == 0:
+                return self._session.request(method, request_url, timeout=timeout, proxies=self._conf._proxies, **primary_kwargs)
+            if pool is None:
+                return self._session.request(method, request_url, timeout=timeout, proxies=self._conf._proxies, **hedge_kwargs)
+            node = pool.acquire()
+            start_time = time.time()
+            try:
+                res = self._session.request(method, node.rewrite_url(url), timeout=timeout, proxies=self._conf._proxies, **hedge_kwargs)
+            except Exception:
+                pool.release(node, False, time.time() - start_time)
+                raise
+            pool.release(node, res.status_code < 500 or res.status_code == 503, time.time() - start_time)
+            return res
+        res = hedged_call(self._hedge_policy, send)
+        if not kwargs.get('stream', False):
+            res.content  # 非stream方式在返回前读取body
+        return res
+
+    def _emit_response_hooks(self, context, res, start_time):
+        """收到响应后触发response_headers,非stream方式时body已经读取完成,同时触发response_body_done"""
+        context.status_code = res.status_code
+        context.response_headers = res.headers
+        context.timings['connect'] = self._adapter.stats.pop_connect_time() if self._adapter is not None else 0
+        context.timings['ttfb'] = res.elapsed.total_seconds()
+        self._hooks.emit('response_headers', context)
+        res.hook_context = context
+        if not context.stream:
+            context.bytes_received = len(res.content)
+            context.timings['body'] = max(time.time() - start_time - context.timings['ttfb'], 0)
+            self._hooks.emit('response_body_done', context)
+
+    def _sleep_before_retry(self, context, delay, error=None):
+        if context is not None:
+            context.retry_delay = delay
+            context.error = error
+            self._hooks.emit('retry', context)
+        time.sleep(delay)
+
+    def _raise_error(self, context, error):
+        if context is not None:
+            context.error = error
+            context.timings['total'] = context.elapsed()
+            self._hooks.emit('error', context)
+        raise error
+
+    def _xml_result(self, parse, *args):
+        """返回xml解析后的结果,配置了LazyResponse时第一次访问结果才调用parse"""
+        if self._conf._lazy_response:
+            return LazyDict(parse, *args)
+        return parse(*args)
+
+    def _parse_xml(self, rt, origin_str="", replace_str=""):
+        """解析返回的xml,注册了hook时触发parsed"""
+        context = getattr(rt, 'hook_context', None)
+        if context is None:
+            return xml_to_dict(rt.content, origin_str, replace_str)
+        start = time.time()
+        data = xml_to_dict(rt.content, origin_str, replace_str)
+        context.timings['parse'] = time.time() - start
+        context.timings['total'] = context.elapsed()
+        self._hooks.emit('parsed', context)
+        return data
+
+    def register_hook(self, event, handler):
+        """注册请求各个阶段的事件,用于接入自定义的tracing或者统计
+
+        :param event(string): 事件名称,包括before_sign,after_sign,before_send,response_headers,response_body_done,parsed,retry,error.
+        :param handler(function): 事件触发时调用的函数,参数为(event, HookContext),HookContext中包含操作名,各阶段耗时和收发的字节数.
+        :return: None.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+
+            def on_body_done(event, ctx):
+                print (ctx.operation, ctx.status_code, ctx.timings, ctx.bytes_sent, ctx.bytes_received)
+            client.register_hook('response_body_done', on_body_done)
+        """
+        self._hooks.register(event, handler)
+
+    def unregister_hook(self, event, handler):
+        """取消注册的事件
+
+        :param event(string): 事件名称.
+        :param handler(function): register_hook注册的函数.
+        :return: None.
+        """
+        self._hooks.unregister(event, handler)
+
+    def enable_metrics(self, registry=None):
+        """开启按操作的指标统计,包括调用次数,错误码,重试次数,收发字节数和延迟直方图
+
+        :param registry(MetricsRegistry): 指标注册表,多个client可以共用,为空时创建新的注册表.
+        :return(MetricsRegistry): 可以通过snapshot获取统计,通过render_prometheus输出prometheus格式的文本.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            metrics = client.enable_metrics()
+            response = client.list_objects(Bucket='bucket')
+            print (metrics.snapshot()['list_objects']['latency']['p99'])
+        """
+        if registry is None:
+            registry = MetricsRegistry()
+        registry.attach(self)
+        return registry
+
     #  s3 object interface begin
     def put_object(self, Bucket, Body, Key, EnableMD5=False, **kwargs):
         """单文件上传接口，适用于小文件，最大不得超过5GB
@@ -267,7 +742,7 @@ class CosS3Client(object):
         :param Body(file|string): 上传的文件内容，类型为文件流或字节流.
         :param Key(string): COS路径.
         :param EnableMD5(bool): 是否需要SDK计算Content-MD5，打开此开关会增加上传耗时.
-        :kwargs(dict): 设置上传的headers.
+        :kwargs(dict): 设置上传的headers,TrafficLimit为服务端限速(bit/s),RateLimiter为客户端限速.
         :return(dict): 上传成功返回的结果，包含ETag等信息.
 
         .. code-block:: python
@@ -284,22 +759,23 @@ class CosS3Client(object):
                 print (response['ETag'])
         """
         check_object_content_length(Body)
+        rate_limiter = kwargs.pop('RateLimiter', None) or self._rate_limiter
         headers = mapped(kwargs)
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("put object, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put object, url=:%s ,headers=:%s", url, headers)
         if EnableMD5:
             md5_str = get_content_md5(Body)
             if md5_str:
                 headers['Content-MD5'] = md5_str
         rt = self.send_request(
+            operation='put_object',
             method='PUT',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, Key),
             data=Body,
-            headers=headers)
+            headers=headers,
+            rate_limiter=rate_limiter)
 
         response = dict(**rt.headers)
         return response
@@ -309,7 +785,7 @@ class CosS3Client(object):
 
         :param Bucket(string): 存储桶名称.
         :param Key(string): COS路径.
-        :param kwargs(dict): 设置下载的headers.
+        :param kwargs(dict): 设置下载的headers,TrafficLimit为服务端限速(bit/s),RateLimiter为客户端限速.
         :return(dict): 下载成功返回的结果,包含Body对应的StreamBody,可以获取文件流或下载文件到本地.
 
         .. code-block:: python
@@ -323,6 +799,7 @@ class CosS3Client(object):
             )
             response['Body'].get_stream_to_file('local_file.txt')
         """
+        rate_limiter = kwargs.pop('RateLimiter', None) or self._rate_limiter
         headers = mapped(kwargs)
         final_headers = {}
         params = {}
@@ -339,11 +816,9 @@ class CosS3Client(object):
         params = format_values(params)
 
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("get object, url=:{url} ,headers=:{headers}, params=:{params}".format(
-            url=url,
-            headers=headers,
-            params=params))
+        logger.info("get object, url=:%s ,headers=:%s, params=:%s", url, headers, params)
         rt = self.send_request(
+                operation='get_object',
                 method='GET',
                 url=url,
                 bucket=Bucket,
@@ -353,7 +828,7 @@ class CosS3Client(object):
                 headers=headers)
 
         response = dict(**rt.headers)
-        response['Body'] = StreamBody(rt)
+        response['Body'] = StreamBody(rt, rate_limiter)
 
         return response
 
@@ -408,6 +883,39 @@ class CosS3Client(object):
         """
         return self.get_presigned_url(Bucket, Key, 'GET', Expired, Params, Headers)
 
+    def get_presigned_urls(self, Bucket, Keys, Method='GET', Expired=300, Params={}, Headers={}):
+        """批量生成预签名的url,所有url共用同一个签名有效期和签名密钥,按Keys的顺序逐个生成
+
+        :param Bucket(string): 存储桶名称.
+        :param Keys(iterable): COS路径列表,可以是生成器,迭代时逐个读取并检查.
+        :param Method(string): HTTP请求的方法, 'PUT'|'POST'|'GET'|'DELETE'|'HEAD'
+        :param Expired(int): 签名过期时间.
+        :param Params(dict): 签入签名的参数
+        :param Headers(dict): 签入签名的头部
+        :return(generator): 预先签名的URL,Bucket不合法时调用即抛出异常,Key不合法时在迭代到该Key时抛出异常.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 批量获取预签名下载链接
+            keys = ['test1.txt', 'test2.txt']
+            for key, url in zip(keys, client.get_presigned_urls(Bucket='bucket', Keys=keys)):
+                print(key, url)
+        """
+        conf = self._conf
+        conf.uri(bucket=Bucket)  # 调用时检查Bucket,Keys可能很多,在迭代时逐个处理
+        query = '&' + urlencode(Params) if Params else ''
+        if conf._anonymous:
+            keys, signs = Keys, itertools.repeat('')
+        else:
+            # 有效期在调用时确定,所有url的签名使用同一组秘钥和key-time,只有路径部分需要逐个计算
+            signer = conf.get_credential().signer
+            key_time = signer.get_key_time(Expired, exact=True)
+            keys, sign_keys = itertools.tee(Keys)  # 两个迭代器同步前进,只缓存当前的key
+            signs = signer.sign_paths(Method, sign_keys, Params, filter_headers(Headers), Expired, key_time)
+        return (conf.uri(bucket=Bucket, path=key) + '?' + sign + query for key, sign in izip(keys, signs))
+
     def delete_object(self, Bucket, Key, **kwargs):
         """单文件删除接口
 
@@ -432,10 +940,9 @@ class CosS3Client(object):
             params['versionId'] = headers['versionId']
             del headers['versionId']
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("delete object, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete object, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+                operation='delete_object',
                 method='DELETE',
                 url=url,
                 bucket=Bucket,
@@ -482,10 +989,9 @@ class CosS3Client(object):
         params = {'delete': ''}
         params = format_values(params)
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete objects, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete objects, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_objects',
             method='POST',
             url=url,
             bucket=Bucket,
@@ -493,9 +999,12 @@ class CosS3Client(object):
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['Deleted', 'Error'])
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['Deleted', 'Error'])
+            return data
+        return self._xml_result(parse)
 
     def head_object(self, Bucket, Key, **kwargs):
         """获取文件信息
@@ -521,10 +1030,9 @@ class CosS3Client(object):
             params['versionId'] = headers['versionId']
             del headers['versionId']
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("head object, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("head object, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='head_object',
             method='HEAD',
             url=url,
             bucket=Bucket,
@@ -561,16 +1069,15 @@ class CosS3Client(object):
             raise CosClientError('CopyStatus must be Copy or Replaced')
         headers['x-cos-metadata-directive'] = CopyStatus
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("copy object, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("copy object, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='copy_object',
             method='PUT',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, Key),
             headers=headers)
-        body = xml_to_dict(rt.content)
+        body = self._parse_xml(rt)
         if 'ETag' not in body:
             logger.error(rt.content)
             raise CosServiceError('PUT', rt.content, 200)
@@ -610,17 +1117,16 @@ class CosS3Client(object):
         params = {'partNumber': PartNumber, 'uploadId': UploadId}
         params = format_values(params)
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("upload part copy, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("upload part copy, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+                operation='upload_part_copy',
                 method='PUT',
                 url=url,
                 bucket=Bucket,
                 headers=headers,
                 params=params,
                 auth=CosS3Auth(self._conf, Key, params=params))
-        body = xml_to_dict(rt.content)
+        body = self._parse_xml(rt)
         data = dict(**rt.headers)
         data.update(body)
         return data
@@ -647,10 +1153,9 @@ class CosS3Client(object):
         params = {'uploads': ''}
         params = format_values(params)
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("create multipart upload, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("create multipart upload, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+                operation='create_multipart_upload',
                 method='POST',
                 url=url,
                 bucket=Bucket,
@@ -658,8 +1163,7 @@ class CosS3Client(object):
                 headers=headers,
                 params=params)
 
-        data = xml_to_dict(rt.content)
-        return data
+        return self._xml_result(self._parse_xml, rt)
 
     def upload_part(self, Bucket, Key, Body, PartNumber, UploadId, EnableMD5=False, **kwargs):
         """上传分块，单个大小不得超过5GB
@@ -669,7 +1173,7 @@ class CosS3Client(object):
         :param Body(file|string): 上传分块的内容,可以为文件流或者字节流.
         :param PartNumber(int): 上传分块的编号.
         :param UploadId(string): 分块上传创建的UploadId.
-        :param kwargs(dict): 设置请求headers.
+        :param kwargs(dict): 设置请求headers,TrafficLimit为服务端限速(bit/s),RateLimiter为客户端限速.
         :param EnableMD5(bool): 是否需要SDK计算Content-MD5，打开此开关会增加上传耗时.
         :return(dict): 上传成功返回的结果，包含单个分块ETag等信息.
 
@@ -687,26 +1191,26 @@ class CosS3Client(object):
                 )
         """
         check_object_content_length(Body)
+        rate_limiter = kwargs.pop('RateLimiter', None) or self._rate_limiter
         headers = mapped(kwargs)
         params = {'partNumber': PartNumber, 'uploadId': UploadId}
         params = format_values(params)
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("upload part, url=:{url} ,headers=:{headers}, params=:{params}".format(
-            url=url,
-            headers=headers,
-            params=params))
+        logger.info("upload part, url=:%s ,headers=:%s, params=:%s", url, headers, params)
         if EnableMD5:
             md5_str = get_content_md5(Body)
             if md5_str:
                 headers['Content-MD5'] = md5_str
         rt = self.send_request(
+                operation='upload_part',
                 method='PUT',
                 url=url,
                 bucket=Bucket,
                 headers=headers,
                 params=params,
                 auth=CosS3Auth(self._conf, Key, params=params),
-                data=Body)
+                data=Body,
+                rate_limiter=rate_limiter)
         response = dict(**rt.headers)
         return response
 
@@ -736,10 +1240,9 @@ class CosS3Client(object):
         params = {'uploadId': UploadId}
         params = format_values(params)
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("complete multipart upload, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("complete multipart upload, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+                operation='complete_multipart_upload',
                 method='POST',
                 url=url,
                 bucket=Bucket,
@@ -748,14 +1251,21 @@ class CosS3Client(object):
                 timeout=1200,  # 分片上传大文件的时间比较长，设置为20min
                 headers=headers,
                 params=params)
-        body = xml_to_dict(rt.content)
         # 分块上传文件返回200OK并不能代表文件上传成功,返回的body里面如果没有ETag则认为上传失败
-        if 'ETag' not in body:
+        # 延迟解析时直接检查原始内容,失败的请求仍然立即抛出异常
+        if self._conf._lazy_response and b'<ETag>' not in rt.content:
             logger.error(rt.content)
             raise CosServiceError('POST', rt.content, 200)
-        data = dict(**rt.headers)
-        data.update(body)
-        return data
+
+        def parse():
+            body = self._parse_xml(rt)
+            if 'ETag' not in body:
+                logger.error(rt.content)
+                raise CosServiceError('POST', rt.content, 200)
+            data = dict(**rt.headers)
+            data.update(body)
+            return data
+        return self._xml_result(parse)
 
     def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
         """放弃一个已经存在的分片上传任务，删除所有已经存在的分片.
@@ -781,10 +1291,9 @@ class CosS3Client(object):
         params = {'uploadId': UploadId}
         params = format_values(params)
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("abort multipart upload, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("abort multipart upload, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+                operation='abort_multipart_upload',
                 method='DELETE',
                 url=url,
                 bucket=Bucket,
@@ -831,21 +1340,23 @@ class CosS3Client(object):
             params['encoding-type'] = 'url'
         params = format_values(params)
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("list multipart upload parts, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("list multipart upload parts, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+                operation='list_parts',
                 method='GET',
                 url=url,
                 bucket=Bucket,
                 auth=CosS3Auth(self._conf, Key, params=params),
                 headers=headers,
                 params=params)
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['Part'])
-        if decodeflag:
-            decode_result(data, ['Key'], [])
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['Part'])
+            if decodeflag:
+                decode_result(data, ['Key'], [])
+            return data
+        return self._xml_result(parse)
 
     def put_object_acl(self, Bucket, Key, AccessControlPolicy={}, **kwargs):
         """设置object ACL
@@ -877,10 +1388,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'acl': ''}
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("put object acl, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put object acl, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_object_acl',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -911,22 +1421,24 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'acl': ''}
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("get object acl, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get object acl, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_object_acl',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, Key, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content, "type", "Type")
-        if data['AccessControlList'] is not None and isinstance(data['AccessControlList']['Grant'], dict):
-            lst = []
-            lst.append(data['AccessControlList']['Grant'])
-            data['AccessControlList']['Grant'] = lst
-        return data
+
+        def parse():
+            data = self._parse_xml(rt, "type", "Type")
+            if data['AccessControlList'] is not None and isinstance(data['AccessControlList']['Grant'], dict):
+                lst = []
+                lst.append(data['AccessControlList']['Grant'])
+                data['AccessControlList']['Grant'] = lst
+            return data
+        return self._xml_result(parse)
 
     def restore_object(self, Bucket, Key, RestoreRequest={}, **kwargs):
         """取回沉降到CAS中的object到COS
@@ -943,11 +1455,10 @@ class CosS3Client(object):
             params['versionId'] = headers['versionId']
             headers.pop('versionId')
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("restore_object, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("restore_object, url=:%s ,headers=:%s", url, headers)
         xml_config = format_xml(data=RestoreRequest, root='RestoreRequest')
         rt = self.send_request(
+            operation='restore_object',
             method='POST',
             url=url,
             bucket=Bucket,
@@ -976,10 +1487,9 @@ class CosS3Client(object):
         """
         headers = mapped(kwargs)
         url = self._conf.uri(bucket=Bucket)
-        logger.info("create bucket, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("create bucket, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+                operation='create_bucket',
                 method='PUT',
                 url=url,
                 bucket=Bucket,
@@ -1005,10 +1515,9 @@ class CosS3Client(object):
         """
         headers = mapped(kwargs)
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+                operation='delete_bucket',
                 method='DELETE',
                 url=url,
                 bucket=Bucket,
@@ -1040,12 +1549,111 @@ class CosS3Client(object):
                 Delimiter='/'
             )
         """
-        decodeflag = True  # 是否需要对结果进行decode
         headers = mapped(kwargs)
         url = self._conf.uri(bucket=Bucket)
-        logger.info("list objects, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("list objects, url=:%s ,headers=:%s", url, headers)
+        params, decodeflag = self._list_objects_params(Prefix, Delimiter, Marker, MaxKeys, EncodingType)
+        rt = self.send_request(
+                operation='list_objects',
+                method='GET',
+                url=url,
+                bucket=Bucket,
+                params=params,
+                headers=headers,
+                auth=CosS3Auth(self._conf, params=params))
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['Contents', 'CommonPrefixes'])
+            if decodeflag:
+                decode_result(
+                    data,
+                    [
+                        'Prefix',
+                        'Marker',
+                        'NextMarker'
+                    ],
+                    [
+                        ['Contents', 'Key'],
+                        ['CommonPrefixes', 'Prefix']
+                    ]
+                )
+            return data
+        return self._xml_result(parse)
+
+    def list_objects_stream(self, Bucket, Prefix="", Delimiter="", Marker="", MaxKeys=1000, EncodingType="", **kwargs):
+        """流式获取文件列表,边接收边解析,每解析完一个文件立即返回,不构造整页结果的dict
+
+        :param Bucket(string): 存储桶名称.
+        :param Prefix(string): 设置匹配文件的前缀.
+        :param Delimiter(string): 分隔符.
+        :param Marker(string): 从marker开始列出条目.
+        :param MaxKeys(int): 设置单次返回最大的数量,最大为1000.
+        :param EncodingType(string): 设置返回结果编码方式,只能设置为url,设置后返回的key不进行decode.
+        :param kwargs(dict): 设置请求headers.
+        :return(ListObjectsStream): 迭代得到ObjectRecord(key, size, etag, last_modified, storage_class),
+            迭代结束后可以获取is_truncated,next_marker和common_prefixes.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 流式列出bucket
+            stream = client.list_objects_stream(
+                Bucket='bucket',
+                Prefix='中文'
+            )
+            for record in stream:
+                print(record.key, record.size)
+            print(stream.is_truncated, stream.next_marker)
+        """
+        headers = mapped(kwargs)
+        url = self._conf.uri(bucket=Bucket)
+        logger.info("list objects stream, url=:%s ,headers=:%s", url, headers)
+        params, decodeflag = self._list_objects_params(Prefix, Delimiter, Marker, MaxKeys, EncodingType)
+        rt = self.send_request(
+                operation='list_objects_stream',
+                method='GET',
+                url=url,
+                bucket=Bucket,
+                stream=True,
+                params=params,
+                headers=headers,
+                auth=CosS3Auth(self._conf, params=params))
+        return ListObjectsStream(rt, decodeflag)
+
+    def list_all_objects(self, Bucket, Prefix="", Marker="", **kwargs):
+        """列出前缀下的所有文件,结果按列紧凑存储,适合在内存中分析文件数量很多的存储桶
+
+        :param Bucket(string): 存储桶名称.
+        :param Prefix(string): 设置匹配文件的前缀.
+        :param Marker(string): 从marker开始列出条目.
+        :param kwargs(dict): 设置请求headers.
+        :return(ObjectListing): 所有文件的key,size,mtime和storage class.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 列出bucket中的所有文件,导出超过1GB的文件
+            listing = client.list_all_objects(
+                Bucket='bucket',
+                Prefix='logs/'
+            )
+            listing.filter(min_size=1024 * 1024 * 1024).to_csv('large.csv')
+        """
+        # 下一页的marker要在这一页解析完成后才能确定,每页解析时直接写入listing,不缓存中间结果
+        listing = ObjectListing()
+        while True:
+            with self.list_objects_stream(Bucket=Bucket, Prefix=Prefix, Marker=Marker, **kwargs) as stream:
+                listing.extend(stream)
+            if not stream.is_truncated:
+                return listing
+            Marker = stream.next_marker
+
+    def _list_objects_params(self, Prefix, Delimiter, Marker, MaxKeys, EncodingType):
+        """list_objects的请求参数,以及是否需要对结果进行decode"""
+        decodeflag = True
         params = {
             'prefix': Prefix,
             'delimiter': Delimiter,
@@ -1059,30 +1667,7 @@ class CosS3Client(object):
             params['encoding-type'] = EncodingType
         else:
             params['encoding-type'] = 'url'
-        params = format_values(params)
-        rt = self.send_request(
-                method='GET',
-                url=url,
-                bucket=Bucket,
-                params=params,
-                headers=headers,
-                auth=CosS3Auth(self._conf, params=params))
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['Contents', 'CommonPrefixes'])
-        if decodeflag:
-            decode_result(
-                data,
-                [
-                    'Prefix',
-                    'Marker',
-                    'NextMarker'
-                ],
-                [
-                    ['Contents', 'Key'],
-                    ['CommonPrefixes', 'Prefix']
-                ]
-            )
-        return data
+        return format_values(params), decodeflag
 
     def list_objects_versions(self, Bucket, Prefix="", Delimiter="", KeyMarker="", VersionIdMarker="", MaxKeys=1000, EncodingType="", **kwargs):
         """获取文件列表
@@ -1112,9 +1697,7 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         decodeflag = True
         url = self._conf.uri(bucket=Bucket)
-        logger.info("list objects versions, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("list objects versions, url=:%s ,headers=:%s", url, headers)
         params = {
             'versions': '',
             'prefix': Prefix,
@@ -1132,31 +1715,35 @@ class CosS3Client(object):
             params['encoding-type'] = 'url'
         params = format_values(params)
         rt = self.send_request(
+                operation='list_objects_versions',
                 method='GET',
                 url=url,
                 bucket=Bucket,
                 params=params,
                 headers=headers,
                 auth=CosS3Auth(self._conf, params=params))
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['Version', 'DeleteMarker', 'CommonPrefixes'])
-        if decodeflag:
-            decode_result(
-                data,
-                [
-                    'Prefix',
-                    'KeyMarker',
-                    'NextKeyMarker',
-                    'VersionIdMarker',
-                    'NextVersionIdMarker'
-                ],
-                [
-                    ['Version', 'Key'],
-                    ['CommonPrefixes', 'Prefix'],
-                    ['DeleteMarker', 'Key']
-                ]
-            )
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['Version', 'DeleteMarker', 'CommonPrefixes'])
+            if decodeflag:
+                decode_result(
+                    data,
+                    [
+                        'Prefix',
+                        'KeyMarker',
+                        'NextKeyMarker',
+                        'VersionIdMarker',
+                        'NextVersionIdMarker'
+                    ],
+                    [
+                        ['Version', 'Key'],
+                        ['CommonPrefixes', 'Prefix'],
+                        ['DeleteMarker', 'Key']
+                    ]
+                )
+            return data
+        return self._xml_result(parse)
 
     def list_multipart_uploads(self, Bucket, Prefix="", Delimiter="", KeyMarker="", UploadIdMarker="", MaxUploads=1000, EncodingType="", **kwargs):
         """获取Bucket中正在进行的分块上传
@@ -1186,9 +1773,7 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         decodeflag = True
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get multipart uploads, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get multipart uploads, url=:%s ,headers=:%s", url, headers)
         params = {
             'uploads': '',
             'prefix': Prefix,
@@ -1206,6 +1791,7 @@ class CosS3Client(object):
             params['encoding-type'] = 'url'
         params = format_values(params)
         rt = self.send_request(
+                operation='list_multipart_uploads',
                 method='GET',
                 url=url,
                 bucket=Bucket,
@@ -1213,24 +1799,127 @@ class CosS3Client(object):
                 headers=headers,
                 auth=CosS3Auth(self._conf, params=params))
 
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['Upload', 'CommonPrefixes'])
-        if decodeflag:
-            decode_result(
-                data,
-                [
-                    'Prefix',
-                    'KeyMarker',
-                    'NextKeyMarker',
-                    'UploadIdMarker',
-                    'NextUploadIdMarker'
-                ],
-                [
-                    ['Upload', 'Key'],
-                    ['CommonPrefixes', 'Prefix']
-                ]
-            )
-        return data
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['Upload', 'CommonPrefixes'])
+            if decodeflag:
+                decode_result(
+                    data,
+                    [
+                        'Prefix',
+                        'KeyMarker',
+                        'NextKeyMarker',
+                        'UploadIdMarker',
+                        'NextUploadIdMarker'
+                    ],
+                    [
+                        ['Upload', 'Key'],
+                        ['CommonPrefixes', 'Prefix']
+                    ]
+                )
+            return data
+        return self._xml_result(parse)
+
+    def paginate(self, Operation, Prefetch=1, **kwargs):
+        """自动翻页获取列举结果,调用方处理当前页时由后台线程预取后面的页
+
+        :param Operation(string): 列举操作,'list_objects'|'list_objects_versions'|'list_multipart_uploads'|'list_parts'.
+        :param Prefetch(int): 后台线程最多预取的页数,为0时不预取.
+        :param kwargs(dict): 列举操作的参数,marker参数指定从哪里开始列举.
+        :return(Paginator): 迭代得到每一页的结果,与对应列举操作的返回值相同.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 按页列出bucket中的文件和目录
+            for page in client.paginate('list_objects', Bucket='bucket', Prefix='中文', Delimiter='/', Prefetch=2):
+                for prefix in page.get('CommonPrefixes', []):
+                    print(prefix['Prefix'])
+        """
+        if Operation not in PAGINATED_OPERATIONS:
+            raise CosClientError('Operation must be one of {0}'.format(', '.join(sorted(PAGINATED_OPERATIONS))))
+        method = getattr(self, Operation)
+
+        def fetch(**markers):
+            params = dict(kwargs)
+            params.update(markers)
+            return method(**params)
+        return Paginator(fetch, lambda page: next_page_markers(Operation, page), prefetch=Prefetch)
+
+    def iter_objects(self, Bucket, Prefetch=1, **kwargs):
+        """自动翻页依次返回list_objects结果中的每个文件
+
+        :param Bucket(string): 存储桶名称.
+        :param Prefetch(int): 后台线程最多预取的页数,为0时不预取.
+        :param kwargs(dict): list_objects的其他参数.
+        :return(generator): Contents中的每个文件.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 列出bucket中的所有文件
+            for content in client.iter_objects(Bucket='bucket', Prefix='中文'):
+                print(content['Key'], content['Size'])
+        """
+        return self.paginate('list_objects', Prefetch, Bucket=Bucket, **kwargs).items('Contents')
+
+    def iter_objects_versions(self, Bucket, Prefetch=1, **kwargs):
+        """自动翻页依次返回list_objects_versions结果中的每个版本
+
+        :param Bucket(string): 存储桶名称.
+        :param Prefetch(int): 后台线程最多预取的页数,为0时不预取.
+        :param kwargs(dict): list_objects_versions的其他参数.
+        :return(generator): 每一页先返回Version中的版本,再返回DeleteMarker中的删除标记,删除标记没有ETag和Size.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 列出bucket中的所有版本
+            for version in client.iter_objects_versions(Bucket='bucket', Prefix='中文'):
+                print(version['Key'], version['VersionId'])
+        """
+        return self.paginate('list_objects_versions', Prefetch, Bucket=Bucket, **kwargs).items('Version', 'DeleteMarker')
+
+    def iter_multipart_uploads(self, Bucket, Prefetch=1, **kwargs):
+        """自动翻页依次返回list_multipart_uploads结果中的每个分块上传
+
+        :param Bucket(string): 存储桶名称.
+        :param Prefetch(int): 后台线程最多预取的页数,为0时不预取.
+        :param kwargs(dict): list_multipart_uploads的其他参数.
+        :return(generator): Upload中的每个分块上传.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 终止所有未完成的分块上传
+            for upload in client.iter_multipart_uploads(Bucket='bucket'):
+                client.abort_multipart_upload(Bucket='bucket', Key=upload['Key'], UploadId=upload['UploadId'])
+        """
+        return self.paginate('list_multipart_uploads', Prefetch, Bucket=Bucket, **kwargs).items('Upload')
+
+    def iter_parts(self, Bucket, Key, UploadId, Prefetch=1, **kwargs):
+        """自动翻页依次返回list_parts结果中的每个分块
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param UploadId(string): 分块上传创建的UploadId.
+        :param Prefetch(int): 后台线程最多预取的页数,为0时不预取.
+        :param kwargs(dict): list_parts的其他参数.
+        :return(generator): Part中的每个分块.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 列出所有已上传的分块
+            for part in client.iter_parts(Bucket='bucket', Key='multipartfile.txt', UploadId='uploadid'):
+                print(part['PartNumber'], part['ETag'])
+        """
+        return self.paginate('list_parts', Prefetch, Bucket=Bucket, Key=Key, UploadId=UploadId, **kwargs).items('Part')
 
     def head_bucket(self, Bucket, **kwargs):
         """确认bucket是否存在
@@ -1250,10 +1939,9 @@ class CosS3Client(object):
         """
         headers = mapped(kwargs)
         url = self._conf.uri(bucket=Bucket)
-        logger.info("head bucket, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("head bucket, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='head_bucket',
             method='HEAD',
             url=url,
             bucket=Bucket,
@@ -1289,10 +1977,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'acl': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket acl, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket acl, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_acl',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -1321,22 +2008,24 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'acl': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket acl, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket acl, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_acl',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content, "type", "Type")
-        if data['AccessControlList'] is not None and not isinstance(data['AccessControlList']['Grant'], list):
-            lst = []
-            lst.append(data['AccessControlList']['Grant'])
-            data['AccessControlList']['Grant'] = lst
-        return data
+
+        def parse():
+            data = self._parse_xml(rt, "type", "Type")
+            if data['AccessControlList'] is not None and not isinstance(data['AccessControlList']['Grant'], list):
+                lst = []
+                lst.append(data['AccessControlList']['Grant'])
+                data['AccessControlList']['Grant'] = lst
+            return data
+        return self._xml_result(parse)
 
     def put_bucket_cors(self, Bucket, CORSConfiguration={}, **kwargs):
         """设置bucket CORS
@@ -1385,10 +2074,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'cors': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket cors, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket cors, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_cors',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -1417,30 +2105,32 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'cors': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket cors, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket cors, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_cors',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        if 'CORSRule' in data and not isinstance(data['CORSRule'], list):
-            lst = []
-            lst.append(data['CORSRule'])
-            data['CORSRule'] = lst
-        if 'CORSRule' in data:
-            allow_lst = ['AllowedOrigin', 'AllowedMethod', 'AllowedHeader', 'ExposeHeader']
-            for rule in data['CORSRule']:
-                for text in allow_lst:
-                    if text in rule and not isinstance(rule[text], list):
-                        lst = []
-                        lst.append(rule[text])
-                        rule[text] = lst
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            if 'CORSRule' in data and not isinstance(data['CORSRule'], list):
+                lst = []
+                lst.append(data['CORSRule'])
+                data['CORSRule'] = lst
+            if 'CORSRule' in data:
+                allow_lst = ['AllowedOrigin', 'AllowedMethod', 'AllowedHeader', 'ExposeHeader']
+                for rule in data['CORSRule']:
+                    for text in allow_lst:
+                        if text in rule and not isinstance(rule[text], list):
+                            lst = []
+                            lst.append(rule[text])
+                            rule[text] = lst
+            return data
+        return self._xml_result(parse)
 
     def delete_bucket_cors(self, Bucket, **kwargs):
         """删除bucket CORS
@@ -1461,10 +2151,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'cors': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket cors, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket cors, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_bucket_cors',
             method='DELETE',
             url=url,
             bucket=Bucket,
@@ -1518,10 +2207,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'lifecycle': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket lifecycle, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket lifecycle, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_lifecycle',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -1550,24 +2238,26 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'lifecycle': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket lifecycle, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket lifecycle, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_lifecycle',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['Rule'])
-        if 'Rule' in data:
-            for rule in data['Rule']:
-                format_dict(rule, ['Transition', 'NoncurrentVersionTransition'])
-                if 'Filter' in rule:
-                    format_dict(rule['Filter'], ['Tag'])
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['Rule'])
+            if 'Rule' in data:
+                for rule in data['Rule']:
+                    format_dict(rule, ['Transition', 'NoncurrentVersionTransition'])
+                    if 'Filter' in rule:
+                        format_dict(rule['Filter'], ['Tag'])
+            return data
+        return self._xml_result(parse)
 
     def delete_bucket_lifecycle(self, Bucket, **kwargs):
         """删除bucket LifeCycle
@@ -1588,10 +2278,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'lifecycle': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket lifecycle, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket lifecycle, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_bucket_lifecycle',
             method='DELETE',
             url=url,
             bucket=Bucket,
@@ -1621,15 +2310,14 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'versioning': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket versioning, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket versioning, url=:%s ,headers=:%s", url, headers)
         if Status != 'Enabled' and Status != 'Suspended':
             raise CosClientError('versioning status must be set to Enabled or Suspended!')
         config = dict()
         config['Status'] = Status
         xml_config = format_xml(data=config, root='VersioningConfiguration')
         rt = self.send_request(
+            operation='put_bucket_versioning',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -1658,18 +2346,16 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'versioning': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket versioning, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket versioning, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_versioning',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        return data
+        return self._xml_result(self._parse_xml, rt)
 
     def get_bucket_location(self, Bucket, **kwargs):
         """查询bucket所属地域
@@ -1691,17 +2377,16 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'location': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket location, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket location, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_location',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        root = xml.etree.ElementTree.fromstring(rt.content)
+        root = cos_xml.fromstring(rt.content)
         data = dict()
         data['LocationConstraint'] = root.text
         return data
@@ -1744,10 +2429,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'replication': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket replication, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket replication, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_replication',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -1776,19 +2460,21 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'replication': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket replication, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket replication, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_replication',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['Rule'])
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['Rule'])
+            return data
+        return self._xml_result(parse)
 
     def delete_bucket_replication(self, Bucket, **kwargs):
         """删除bucket 跨区域复制配置
@@ -1809,10 +2495,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'replication': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket replication, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket replication, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_bucket_replication',
             method='DELETE',
             url=url,
             bucket=Bucket,
@@ -1872,10 +2557,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'website': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket website, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket website, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_website',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -1904,24 +2588,26 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'website': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket website, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket website, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_website',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        if 'RoutingRules' in data and not isinstance(data['RoutingRules']['RoutingRule'], list):
-            lst = []
-            lst.append(data['RoutingRules']['RoutingRule'])
-            data['RoutingRules']['RoutingRule'] = lst
-        if 'RoutingRules' in data:
-            data['RoutingRules'] = data['RoutingRules']['RoutingRule']
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            if 'RoutingRules' in data and not isinstance(data['RoutingRules']['RoutingRule'], list):
+                lst = []
+                lst.append(data['RoutingRules']['RoutingRule'])
+                data['RoutingRules']['RoutingRule'] = lst
+            if 'RoutingRules' in data:
+                data['RoutingRules'] = data['RoutingRules']['RoutingRule']
+            return data
+        return self._xml_result(parse)
 
     def delete_bucket_website(self, Bucket, **kwargs):
         """删除bucket 静态网站配置
@@ -1942,10 +2628,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'website': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket website, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket website, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_bucket_website',
             method='DELETE',
             url=url,
             bucket=Bucket,
@@ -1985,10 +2670,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'logging': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket logging, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket logging, url=:%s ,headers=:%s", url, headers)
         logging_rt = self.send_request(
+            operation='put_bucket_logging',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -2017,18 +2701,16 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'logging': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket logging, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket logging, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_logging',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        return data
+        return self._xml_result(self._parse_xml, rt)
 
     def put_bucket_policy(self, Bucket, Policy, **kwargs):
         """设置bucket policy
@@ -2061,10 +2743,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/json'
         params = {'policy': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket policy, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket policy, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_policy',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -2093,10 +2774,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'policy': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket policy, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket policy, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_policy',
             method='GET',
             url=url,
             bucket=Bucket,
@@ -2141,10 +2821,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'domain': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket domain, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket domain, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_domain',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -2173,21 +2852,23 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'domain': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket domain, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket domain, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_domain',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['DomainRule'])
-        if 'x-cos-domain-txt-verification' in rt.headers:
-            data['x-cos-domain-txt-verification'] = rt.headers['x-cos-domain-txt-verification']
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['DomainRule'])
+            if 'x-cos-domain-txt-verification' in rt.headers:
+                data['x-cos-domain-txt-verification'] = rt.headers['x-cos-domain-txt-verification']
+            return data
+        return self._xml_result(parse)
 
     def delete_bucket_domain(self, Bucket, **kwargs):
         """删除bucket 自定义域名配置
@@ -2208,10 +2889,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'domain': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket domain, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket domain, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_bucket_domain',
             method='DELETE',
             url=url,
             bucket=Bucket,
@@ -2246,10 +2926,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'origin': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket origin, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket origin, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_origin',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -2278,19 +2957,21 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'origin': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket origin, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket origin, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_origin',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        format_dict(data, ['OriginRule'])
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data, ['OriginRule'])
+            return data
+        return self._xml_result(parse)
 
     def delete_bucket_origin(self, Bucket, **kwargs):
         """删除bucket 回源配置
@@ -2311,10 +2992,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'origin': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket origin, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket origin, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_bucket_origin',
             method='DELETE',
             url=url,
             bucket=Bucket,
@@ -2381,10 +3061,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'inventory': '', 'id': Id}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket inventory, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket inventory, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_inventory',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -2414,19 +3093,21 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'inventory': '', 'id': Id}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket inventory, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket inventory, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_inventory',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        format_dict(data['OptionalFields'], ['Field'])
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            format_dict(data['OptionalFields'], ['Field'])
+            return data
+        return self._xml_result(parse)
 
     def delete_bucket_inventory(self, Bucket, Id, **kwargs):
         """删除bucket 回源配置
@@ -2448,10 +3129,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'inventory': '', 'id': Id}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket inventory, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket inventory, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_bucket_inventory',
             method='DELETE',
             url=url,
             bucket=Bucket,
@@ -2495,10 +3175,9 @@ class CosS3Client(object):
         headers['Content-Type'] = 'application/xml'
         params = {'tagging': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("put bucket tagging, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("put bucket tagging, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='put_bucket_tagging',
             method='PUT',
             url=url,
             bucket=Bucket,
@@ -2527,20 +3206,22 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'tagging': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("get bucket tagging, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("get bucket tagging, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='get_bucket_tagging',
             method='GET',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, params=params),
             headers=headers,
             params=params)
-        data = xml_to_dict(rt.content)
-        if 'TagSet' in data:
-            format_dict(data['TagSet'], ['Tag'])
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            if 'TagSet' in data:
+                format_dict(data['TagSet'], ['Tag'])
+            return data
+        return self._xml_result(parse)
 
     def delete_bucket_tagging(self, Bucket, **kwargs):
         """删除bucket 回源配置
@@ -2561,10 +3242,9 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         params = {'tagging': ''}
         url = self._conf.uri(bucket=Bucket)
-        logger.info("delete bucket tagging, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("delete bucket tagging, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='delete_bucket_tagging',
             method='DELETE',
             url=url,
             bucket=Bucket,
@@ -2591,21 +3271,25 @@ class CosS3Client(object):
         headers = mapped(kwargs)
         url = 'http://service.cos.myqcloud.com/'
         rt = self.send_request(
+                operation='list_buckets',
                 method='GET',
                 url=url,
                 bucket=None,
                 headers=headers,
                 auth=CosS3Auth(self._conf),
                 )
-        data = xml_to_dict(rt.content)
-        if data['Buckets'] is not None and not isinstance(data['Buckets']['Bucket'], list):
-            lst = []
-            lst.append(data['Buckets']['Bucket'])
-            data['Buckets']['Bucket'] = lst
-        return data
+
+        def parse():
+            data = self._parse_xml(rt)
+            if data['Buckets'] is not None and not isinstance(data['Buckets']['Bucket'], list):
+                lst = []
+                lst.append(data['Buckets']['Bucket'])
+                data['Buckets']['Bucket'] = lst
+            return data
+        return self._xml_result(parse)
 
     # Advanced interface
-    def _upload_part(self, bucket, key, local_path, offset, size, part_num, uploadid, md5_lst, resumable_flag, already_exist_parts, enable_md5):
+    def _upload_part(self, bucket, key, local_path, offset, size, part_num, uploadid, md5_lst, resumable_flag, already_exist_parts, enable_md5, **kwargs):
         """从本地文件中读取分块, 上传单个分块,将结果记录在md5——list中
 
         :param bucket(string): 存储桶名称.
@@ -2619,16 +3303,16 @@ class CosS3Client(object):
         :param resumable_flag(bool): 是否为断点续传.
         :param already_exist_parts(dict): 断点续传情况下,保存已经上传的块的序号和Etag.
         :param enable_md5(bool): 是否开启md5校验.
+        :param kwargs(dict): 上传分块的参数,如TrafficLimit,RateLimiter.
         :return: None.
         """
         # 如果是断点续传且该分块已经上传了则不用实际上传
         if resumable_flag and part_num in already_exist_parts:
             md5_lst.append({'PartNumber': part_num, 'ETag': already_exist_parts[part_num]})
         else:
+            # 直接从文件中读取分块发送,重试时回退到分块的起始位置
             with open(local_path, 'rb') as fp:
-                fp.seek(offset, 0)
-                data = fp.read(size)
-            rt = self.upload_part(bucket, key, data, part_num, uploadid, enable_md5)
+                rt = self.upload_part(bucket, key, FilePart(fp, offset, size), part_num, uploadid, enable_md5, **kwargs)
             md5_lst.append({'PartNumber': part_num, 'ETag': rt['ETag']})
         return None
 
@@ -2686,24 +3370,8 @@ class CosS3Client(object):
         :param already_exist_parts(dict): 保存已经上传的分块的part_num和Etag
         :return(bool): 本地文件是否通过校验,True为可以进行断点续传,False为不能进行断点续传
         """
-        parts_info = []
-        part_number_marker = 0
-        list_over_status = False
-        while list_over_status is False:
-            response = self.list_parts(
-                Bucket=bucket,
-                Key=key,
-                UploadId=uploadid,
-                PartNumberMarker=part_number_marker
-            )
-            # 已经存在的分块上传,有可能一个分块都没有上传,判断一下
-            if 'Part' in response:
-                parts_info.extend(response['Part'])
-            if response['IsTruncated'] == 'false':
-                list_over_status = True
-            else:
-                part_number_marker = int(response['NextPartNumberMarker'])
-        for part in parts_info:
+        # 已经存在的分块上传,有可能一个分块都没有上传
+        for part in self.iter_parts(Bucket=bucket, Key=key, UploadId=uploadid):
             part_num = int(part['PartNumber'])
             # 如果分块数量大于本地计算出的最大数量,校验失败
             if part_num > parts_num:
@@ -2718,16 +3386,17 @@ class CosS3Client(object):
             already_exist_parts[part_num] = part['ETag']
         return True
 
-    def upload_file(self, Bucket, Key, LocalFilePath, PartSize=1, MAXThread=5, EnableMD5=False, **kwargs):
+    def upload_file(self, Bucket, Key, LocalFilePath, PartSize=1, MAXThread=5, EnableMD5=False, MAXProcess=None, **kwargs):
         """小于等于20MB的文件简单上传，大于20MB的文件使用分块上传
 
         :param Bucket(string): 存储桶名称.
         :param key(string): 分块上传路径名.
         :param LocalFilePath(string): 本地文件路径名.
         :param PartSize(int): 分块的大小设置,单位为MB.
-        :param MAXThread(int): 并发上传的最大线程数.
+        :param MAXThread(int): 并发上传的最大线程数,使用多进程时为每个进程的线程数.
         :param EnableMD5(bool): 是否打开MD5校验.
-        :param kwargs(dict): 设置请求headers.
+        :param MAXProcess(int): 分块上传使用的进程数,为空时只使用线程;MD5校验和HTTPS加密占满单核时可以使用多进程.
+        :param kwargs(dict): 设置请求headers,TrafficLimit(服务端限速,单位bit/s)和RateLimiter(客户端限速)作用于每个分块.
         :return(dict): 成功上传文件的元信息.
 
         .. code-block:: python
@@ -2743,6 +3412,15 @@ class CosS3Client(object):
                 PartSize=10,
                 MAXThread=10,
             )
+            # 4个进程,每个进程10个线程并发上传
+            response = client.upload_file(
+                Bucket='bucket',
+                Key=file_name,
+                LocalFilePath=file_name,
+                PartSize=10,
+                MAXThread=10,
+                MAXProcess=4
+            )
         """
         file_size = os.path.getsize(LocalFilePath)
         if file_size <= 1024*1024*20:
@@ -2750,6 +3428,11 @@ class CosS3Client(object):
                 rt = self.put_object(Bucket=Bucket, Key=Key, Body=fp, EnableMD5=EnableMD5, **kwargs)
             return rt
         else:
+            # 限速参数只作用于上传分块的请求
+            part_kwargs = {}
+            for name in ('TrafficLimit', 'RateLimiter'):
+                if name in kwargs:
+                    part_kwargs[name] = kwargs.pop(name)
             part_size = 1024*1024*PartSize  # 默认按照1MB分块,最大支持10G的文件，超过10G的分块数固定为10000
             last_size = 0  # 最后一块可以小于1MB
             parts_num = file_size // part_size
@@ -2771,29 +3454,40 @@ class CosS3Client(object):
             already_exist_parts = {}
             uploadid = self._get_resumable_uploadid(Bucket, Key)
             if uploadid is not None:
-                logger.info("fetch an existed uploadid in remote cos, uploadid={uploadid}".format(uploadid=uploadid))
+                logger.info("fetch an existed uploadid in remote cos, uploadid=%s", uploadid)
                 # 校验服务端返回的每个块的信息是否和本地的每个块的信息相同,只有校验通过的情况下才可以进行断点续传
                 resumable_flag = self._check_all_upload_parts(Bucket, Key, uploadid, LocalFilePath, parts_num, part_size, last_size, already_exist_parts)
             # 如果不能断点续传,则创建一个新的分块上传
             if not resumable_flag:
                 rt = self.create_multipart_upload(Bucket=Bucket, Key=Key, **kwargs)
                 uploadid = rt['UploadId']
-                logger.info("create a new uploadid in upload_file, uploadid={uploadid}".format(uploadid=uploadid))
+                logger.info("create a new uploadid in upload_file, uploadid=%s", uploadid)
 
             # 上传分块
             offset = 0  # 记录文件偏移量
-            lst = list()  # 记录分块信息
-            pool = SimpleThreadPool(MAXThread)
+            if MAXProcess:
+                if 'RateLimiter' in part_kwargs:
+                    raise CosClientError('RateLimiter can not be shared between processes, use TrafficLimit instead')
+                lst = RESULT_LIST  # 每个进程记录自己上传的分块信息
+                pool = SimpleProcessPool(self._conf, self._retry, MAXProcess, MAXThread)
+            else:
+                lst = list()  # 记录分块信息
+                self._ensure_pool_size(MAXThread)
+                pool = SimpleThreadPool(MAXThread)
 
             for i in range(1, parts_num+1):
                 if i == parts_num:  # 最后一块
-                    pool.add_task(self._upload_part, Bucket, Key, LocalFilePath, offset, file_size-offset, i, uploadid, lst, resumable_flag, already_exist_parts, EnableMD5)
+                    pool.add_task(self._upload_part, Bucket, Key, LocalFilePath, offset, file_size-offset, i, uploadid, lst, resumable_flag, already_exist_parts,
+                                  EnableMD5, **part_kwargs)
                 else:
-                    pool.add_task(self._upload_part, Bucket, Key, LocalFilePath, offset, part_size, i, uploadid, lst, resumable_flag, already_exist_parts, EnableMD5)
+                    pool.add_task(self._upload_part, Bucket, Key, LocalFilePath, offset, part_size, i, uploadid, lst, resumable_flag, already_exist_parts,
+                                  EnableMD5, **part_kwargs)
                     offset += part_size
 
             pool.wait_completion()
             result = pool.get_result()
+            if MAXProcess:
+                lst = result['results']
             if not result['success_all'] or len(lst) != parts_num:
                 raise CosClientError('some upload_part fail after max_retry, please upload_file again')
             lst = sorted(lst, key=lambda x: x['PartNumber'])  # 按PartNumber升序排列
@@ -2802,6 +3496,99 @@ class CosS3Client(object):
             rt = self.complete_multipart_upload(Bucket=Bucket, Key=Key, UploadId=uploadid, MultipartUpload={'Part': lst})
             return rt
 
+    def _download_part(self, bucket, key, local_path, offset, size, part_num, **kwargs):
+        """下载单个分块,写入本地文件的对应位置
+
+        :param bucket(string): 存储桶名称.
+        :param key(string): COS路径.
+        :param local_path(string): 本地文件路径名,需要预先创建.
+        :param offset(int): 分块在文件中的偏移量.
+        :param size(int): 分块的大小.
+        :param part_num(int): 分块的序号.
+        :param kwargs(dict): 下载的参数.
+        :return: None.
+        """
+        rt = self.get_object(bucket, key, Range=gen_copy_source_range(offset, offset + size - 1), **kwargs)
+        file_len = 0
+        with rt['Body'] as body, open(local_path, 'r+b') as fp:  # 读写失败时也要关闭响应,释放连接
+            raw = body.get_raw_stream()
+            fp.seek(offset, 0)
+            chunk = raw.read(DEFAULT_CHUNK_SIZE)
+            while chunk:
+                file_len += len(chunk)
+                fp.write(chunk)
+                chunk = raw.read(DEFAULT_CHUNK_SIZE)
+        if file_len != size:
+            raise CosClientError('download part {part_num} failed with incomplete data'.format(part_num=part_num))
+        return None
+
+    def download_file(self, Bucket, Key, DestFilePath, PartSize=20, MAXThread=5, MAXProcess=None, **kwargs):
+        """小于等于分块大小的文件直接下载,大于分块大小的文件按Range分块并发下载
+
+        :param Bucket(string): 存储桶名称.
+        :param Key(string): COS路径.
+        :param DestFilePath(string): 下载到本地的文件路径名.
+        :param PartSize(int): 分块的大小设置,单位为MB.
+        :param MAXThread(int): 并发下载的最大线程数,使用多进程时为每个进程的线程数.
+        :param MAXProcess(int): 分块下载使用的进程数,为空时只使用线程.
+        :param kwargs(dict): 设置下载的headers,如VersionId,TrafficLimit.
+        :return(dict): 文件的元信息.
+
+        .. code-block:: python
+
+            config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+            client = CosS3Client(config)
+            # 4个进程,每个进程10个线程并发下载
+            response = client.download_file(
+                Bucket='bucket',
+                Key='thread_1GB_test',
+                DestFilePath='local_file',
+                MAXThread=10,
+                MAXProcess=4
+            )
+        """
+        head_kwargs = dict()
+        if 'VersionId' in kwargs:
+            head_kwargs['VersionId'] = kwargs['VersionId']
+        response = self.head_object(Bucket=Bucket, Key=Key, **head_kwargs)
+        file_size = int(response['Content-Length'])
+        part_size = 1024*1024*PartSize
+        if file_size <= part_size:
+            rt = self.get_object(Bucket=Bucket, Key=Key, **kwargs)
+            rt['Body'].get_stream_to_file(DestFilePath)
+            return response
+
+        # 下载过程中文件被覆盖时各个分块可能来自不同的文件,通过ETag保证一致
+        if 'IfMatch' not in kwargs and 'ETag' in response:
+            kwargs['IfMatch'] = response['ETag']
+        tmp_file_name = "{file_name}_{uuid}".format(file_name=DestFilePath, uuid=uuid.uuid4().hex)
+        with open(tmp_file_name, 'wb') as fp:
+            fp.truncate(file_size)
+        if MAXProcess:
+            if 'RateLimiter' in kwargs:
+                raise CosClientError('RateLimiter can not be shared between processes, use TrafficLimit instead')
+            pool = SimpleProcessPool(self._conf, self._retry, MAXProcess, MAXThread)
+        else:
+            self._ensure_pool_size(MAXThread)
+            pool = SimpleThreadPool(MAXThread)
+        offset = 0
+        part_num = 1
+        while offset < file_size:
+            size = min(part_size, file_size - offset)
+            pool.add_task(self._download_part, Bucket, Key, tmp_file_name, offset, size, part_num, **kwargs)
+            offset += size
+            part_num += 1
+
+        pool.wait_completion()
+        result = pool.get_result()
+        if not result['success_all']:
+            os.remove(tmp_file_name)
+            raise CosClientError('some download_part fail after max_retry, please download_file again')
+        if os.path.exists(DestFilePath):
+            os.remove(DestFilePath)
+        os.rename(tmp_file_name, DestFilePath)
+        return response
+
     def _inner_head_object(self, CopySource):
         """查询源文件的长度"""
         bucket, path, endpoint, versionid = get_copy_source_info(CopySource)
@@ -2810,6 +3597,7 @@ class CosS3Client(object):
             params['versionId'] = versionid
         url = self._conf.uri(bucket=bucket, path=path, endpoint=endpoint)
         rt = self.send_request(
+            operation='head_object',
             method='HEAD',
             url=url,
             bucket=bucket,
@@ -2843,7 +3631,7 @@ class CosS3Client(object):
             return True
         return False
 
-    def copy(self, Bucket, Key, CopySource, CopyStatus='Copy', PartSize=10, MAXThread=5, **kwargs):
+    def copy(self, Bucket, Key, CopySource, CopyStatus='Copy', PartSize=10, MAXThread=5, MAXProcess=None, **kwargs):
         """文件拷贝，小于5G的文件调用copy_object，大于等于5G的文件调用分块上传的upload_part_copy
 
         :param Bucket(string): 存储桶名称.
@@ -2851,7 +3639,8 @@ class CosS3Client(object):
         :param CopySource(dict): 拷贝源,包含Appid,Bucket,Region,Key.
         :param CopyStatus(string): 拷贝状态,可选值'Copy'|'Replaced'.
         :param PartSize(int): 分块的大小设置.
-        :param MAXThread(int): 并发上传的最大线程数.
+        :param MAXThread(int): 并发上传的最大线程数,使用多进程时为每个进程的线程数.
+        :param MAXProcess(int): 分块拷贝使用的进程数,为空时只使用线程.
         :param kwargs(dict): 设置请求headers.
         :return(dict): 拷贝成功的结果.
 
@@ -2903,8 +3692,13 @@ class CosS3Client(object):
 
         # 上传分块拷贝
         offset = 0  # 记录文件偏移量
-        lst = list()  # 记录分块信息
-        pool = SimpleThreadPool(MAXThread)
+        if MAXProcess:
+            lst = RESULT_LIST  # 每个进程记录自己拷贝的分块信息
+            pool = SimpleProcessPool(self._conf, self._retry, MAXProcess, MAXThread)
+        else:
+            lst = list()  # 记录分块信息
+            self._ensure_pool_size(MAXThread)
+            pool = SimpleThreadPool(MAXThread)
 
         for i in range(1, parts_num+1):
             if i == parts_num:  # 最后一块
@@ -2917,6 +3711,8 @@ class CosS3Client(object):
 
         pool.wait_completion()
         result = pool.get_result()
+        if MAXProcess:
+            lst = result['results']
         if not result['success_all']:
             raise CosClientError('some upload_part_copy fail after max_retry')
 
@@ -2978,6 +3774,7 @@ class CosS3Client(object):
         MAXQueue = MaxBufferSize//PartSize
         if MAXQueue == 0:
             MAXQueue = 1
+        self._ensure_pool_size(MAXThread)
         pool = SimpleThreadPool(MAXThread, MAXQueue)
         while True:
             if not data:
@@ -3007,24 +3804,25 @@ class CosS3Client(object):
         :param Key(string): COS路径.
         :param Position(int): 追加内容的起始位置.
         :param Data(string): 追加的内容
-        :kwargs(dict): 设置上传的headers.
+        :kwargs(dict): 设置上传的headers,TrafficLimit为服务端限速(bit/s),RateLimiter为客户端限速.
         :return(dict): 上传成功返回的结果，包含ETag等信息.
         """
         check_object_content_length(Data)
+        rate_limiter = kwargs.pop('RateLimiter', None) or self._rate_limiter
         headers = mapped(kwargs)
         params = {'append': '', 'position': Position}
         url = self._conf.uri(bucket=Bucket, path=Key)
-        logger.info("append object, url=:{url} ,headers=:{headers}".format(
-            url=url,
-            headers=headers))
+        logger.info("append object, url=:%s ,headers=:%s", url, headers)
         rt = self.send_request(
+            operation='append_object',
             method='POST',
             url=url,
             bucket=Bucket,
             auth=CosS3Auth(self._conf, Key, params=params),
             data=Data,
             headers=headers,
-            params=params)
+            params=params,
+            rate_limiter=rate_limiter)
         response = dict(**rt.headers)
         return response
 
@@ -3035,7 +3833,7 @@ class CosS3Client(object):
         :param LocalFilePath(string): 上传文件的本地路径.
         :param Key(string): COS路径.
         :param EnableMD5(bool): 是否需要SDK计算Content-MD5，打开此开关会增加上传耗时.
-        :kwargs(dict): 设置上传的headers.
+        :kwargs(dict): 设置上传的headers,TrafficLimit为服务端限速(bit/s),RateLimiter为客户端限速.
         :return(dict): 上传成功返回的结果，包含ETag等信息.
 
         .. code-block:: python
@@ -8,13 +8,12 @@ import os
 import io
 import re
 import sys
-import xml.dom.minidom
+import tempfile
 import xml.etree.ElementTree
 from datetime import datetime
-from dicttoxml import dicttoxml
-from .xml2dict import Xml2Dict
 from .cos_exception import CosClientError
 from .cos_exception import CosServiceError
+from . import cos_xml
 
 SINGLE_UPLOAD_LENGTH = 5*1024*1024*1024  # 单次上传文件最大为5GB
 DEFAULT_CHUNK_SIZE = 1024*1024           # 计算MD5值时,文件单次读取的块大小为1MB
@@ -55,7 +54,8 @@ maplist = {
             'SSECustomerKey': 'x-cos-server-side-encryption-customer-key',
             'SSECustomerKeyMD5': 'x-cos-server-side-encryption-customer-key-MD5',
             'SSEKMSKeyId': 'x-cos-server-side-encryption-cos-kms-key-id',
-            'Referer': 'Referer'
+            'Referer': 'Referer',
+            'TrafficLimit': 'x-cos-traffic-limit'
            }
 
 
@@ -119,58 +119,101 @@ def get_content_md5(body):
 
 
 def dict_to_xml(data):
-    """V5使用xml格式，将输入的dict转换为xml"""
-    doc = xml.dom.minidom.Document()
-    root = doc.createElement('CompleteMultipartUpload')
-    doc.appendChild(root)
-
+    """V5使用xml格式，将CompleteMultipartUpload的dict转换为xml"""
     if 'Part' not in data:
         raise CosClientError("Invalid Parameter, Part Is Required!")
 
+    writer = cos_xml.XmlWriter('CompleteMultipartUpload')
     for i in data['Part']:
-        nodePart = doc.createElement('Part')
-
         if 'PartNumber' not in i:
             raise CosClientError("Invalid Parameter, PartNumber Is Required!")
-
-        nodeNumber = doc.createElement('PartNumber')
-        nodeNumber.appendChild(doc.createTextNode(str(i['PartNumber'])))
-
         if 'ETag' not in i:
             raise CosClientError("Invalid Parameter, ETag Is Required!")
+        writer.start('Part')
+        writer.element('PartNumber', i['PartNumber'])
+        writer.element('ETag', i['ETag'])
+        writer.end('Part')
+    return writer.finish()
 
-        nodeETag = doc.createElement('ETag')
-        nodeETag.appendChild(doc.createTextNode(str(i['ETag'])))
 
-        nodePart.appendChild(nodeNumber)
-        nodePart.appendChild(nodeETag)
-        root.appendChild(nodePart)
-    return doc.toxml('utf-8')
+# 返回的xml中需要去掉的命名空间
+XML_NAMESPACES = (
+    "{http://www.qcloud.com/document/product/436/7751}",
+    "{https://cloud.tencent.com/document/product/436}",
+    "{http://doc.s3.amazonaws.com/2006-03-01}",
+    "{http://s3.amazonaws.com/doc/2006-03-01/}",
+    "{http://www.w3.org/2001/XMLSchema-instance}",
+)
 
 
 def xml_to_dict(data, origin_str="", replace_str=""):
-    """V5使用xml格式，将response中的xml转换为dict"""
-    root = xml.etree.ElementTree.fromstring(data)
-    xmldict = Xml2Dict(root)
-    xmlstr = str(xmldict)
-    xmlstr = xmlstr.replace("{http://www.qcloud.com/document/product/436/7751}", "")
-    xmlstr = xmlstr.replace("{https://cloud.tencent.com/document/product/436}", "")
-    xmlstr = xmlstr.replace("{http://doc.s3.amazonaws.com/2006-03-01}", "")
-    xmlstr = xmlstr.replace("{http://s3.amazonaws.com/doc/2006-03-01/}", "")
-    xmlstr = xmlstr.replace("{http://www.w3.org/2001/XMLSchema-instance}", "")
-    if origin_str:
-        xmlstr = xmlstr.replace(origin_str, replace_str)
-    xmldict = eval(xmlstr)
-    return xmldict
+    """V5使用xml格式，将response中的xml转换为dict
+
+    :param data(bytes): xml内容.
+    :param origin_str(string): 需要替换的字段名称.
+    :param replace_str(string): 替换后的字段名称.
+    :return(dict): 同名的节点合并为list,带属性的节点转换为dict,叶子节点为文本.
+    """
+    root = cos_xml.fromstring(data)
+    return _element_to_dict(root, _XmlNames(origin_str, replace_str))
+
+
+class _XmlNames(dict):
+    """节点和属性名称去掉命名空间并替换后的结果,同一个文档中的名称大量重复,按原始名称缓存"""
+    def __init__(self, origin_str, replace_str):
+        dict.__init__(self)
+        self._origin_str = origin_str
+        self._replace_str = replace_str
+
+    def __missing__(self, name):
+        stripped = name
+        if name[:1] == '{':
+            for ns in XML_NAMESPACES:
+                stripped = stripped.replace(ns, "")
+        if self._origin_str:
+            stripped = stripped.replace(self._origin_str, self._replace_str)
+        self[name] = stripped
+        return stripped
+
+
+def _element_to_dict(parent, names):
+    result = dict()
+    for name, value in parent.items():
+        _add_value(result, names[name], value)
+    for element in parent:
+        if len(element):
+            value = _element_to_dict(element, names)
+        else:
+            attrib = element.items()
+            if attrib:
+                if element.text:
+                    attrib.append((element.tag, element.text))
+                value = dict([(names[k], v) for k, v in attrib])
+            else:
+                value = element.text
+        _add_value(result, names[element.tag], value)
+    return result
+
+
+def _add_value(result, key, value):
+    """同名的节点合并为list,保持与之前Xml2Dict相同的结构和顺序"""
+    if key in result:
+        old = result.pop(key)
+        if type(old) is list:
+            old.append(value)
+            result[key] = old
+        else:
+            result[key] = [old, value]
+    else:
+        result[key] = value
 
 
 def get_id_from_xml(data, name):
     """解析xml中的特定字段"""
-    tree = xml.dom.minidom.parseString(data)
-    root = tree.documentElement
-    result = root.getElementsByTagName(name)
-    # use childNodes to get a list, if has no child get itself
-    return result[0].childNodes[0].nodeValue
+    text = cos_xml.find_texts(cos_xml.fromstring(data), [name]).get(name)
+    if text is None:
+        raise ValueError('{name} not found in xml'.format(name=name))
+    return text
 
 
 def mapped(headers):
@@ -189,14 +232,18 @@ def mapped(headers):
 
 
 def format_xml(data, root, lst=list(), parent_child=False):
-    """将dict转换为xml, xml_config是一个bytes"""
-    if parent_child:
-        xml_config = dicttoxml(data, item_func=lambda x: x[:-1], custom_root=root, attr_type=False)
-    else:
-        xml_config = dicttoxml(data, item_func=lambda x: x, custom_root=root, attr_type=False)
-    for i in lst:
-        xml_config = xml_config.replace(to_bytes(i+i), to_bytes(i))
-    return xml_config
+    """将dict转换为xml, xml_config是一个bytes
+
+    :param data(dict): xml的内容.
+    :param root(string): 根节点名称.
+    :param lst(list): 类型为list的标签,如['<Rule>', '</Rule>'],这些list的每个元素直接作为一个同名节点.
+    :param parent_child(bool): 所有list都以key为父节点,key去掉最后一个字符为子节点.
+    """
+    list_tags = set([tag.strip('</>') for tag in lst])
+    writer = cos_xml.XmlWriter(root)
+    for key, value in data.items():
+        writer.value(key, value, list_tags, parent_child)
+    return writer.finish()
 
 
 def format_values(data):
@@ -370,6 +417,103 @@ def check_object_content_length(data):
     return None
 
 
+def get_body_position(data):
+    """获取请求body的起始位置,用于重试前回退
+
+    :param data(bytes|file): 请求的body.
+    :return(int): bytes等可以重复发送的body返回0,不支持seek的流返回None.
+    """
+    if data is None or isinstance(data, text_type) or isinstance(data, binary_type):
+        return 0
+    if not (hasattr(data, 'seek') and hasattr(data, 'tell')):
+        return None
+    if hasattr(data, 'seekable') and not data.seekable():
+        return None
+    try:
+        return data.tell()
+    except (IOError, OSError):
+        return None
+
+
+def rewind_body(data, position):
+    """重试前将body回退到起始位置"""
+    if data is None or isinstance(data, text_type) or isinstance(data, binary_type):
+        return
+    try:
+        data.seek(position)
+    except (IOError, OSError) as e:
+        raise CosClientError('seek body failed before retry: ' + str(e))
+
+
+class FilePart(object):
+    """文件中[offset, offset+size)范围的只读视图,上传分块时直接从文件读取,不需要把整个分块读入内存"""
+    def __init__(self, fp, offset, size):
+        self._fp = fp
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+        fp.seek(offset, 0)
+
+    def __len__(self):
+        return self._size
+
+    def read(self, size=-1):
+        remain = self._size - self._pos
+        if size is None or size < 0 or size > remain:
+            size = remain
+        if size <= 0:
+            return b''
+        data = self._fp.read(size)
+        self._pos += len(data)
+        return data
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self._size
+        self._pos = min(max(offset, 0), self._size)
+        self._fp.seek(self._offset + self._pos, 0)
+        return self._pos
+
+
+class SpooledBody(object):
+    """缓存不支持seek的流,使其在重试时可以重新发送
+
+    内存中最多保留max_memory_size字节,超过的部分写入临时文件
+    """
+    def __init__(self, data, max_memory_size):
+        self._file = tempfile.SpooledTemporaryFile(max_size=max_memory_size)
+        if hasattr(data, 'read'):
+            chunks = iter(lambda: data.read(DEFAULT_CHUNK_SIZE), b'')
+        else:
+            chunks = iter(data)
+        for chunk in chunks:
+            if not chunk:  # 文本模式打开的文件读到结尾时返回''
+                break
+            self._file.write(to_bytes(chunk))
+        self._size = self._file.tell()
+        self._file.seek(0)
+
+    def __len__(self):
+        return self._size
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def tell(self):
+        return self._file.tell()
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def close(self):
+        self._file.close()
+
+
 def format_dict(data, key_lst):
     """转换返回dict中的可重复字段为list"""
     if not (isinstance(data, dict) and isinstance(key_lst, list)):
@@ -383,6 +527,44 @@ def format_dict(data, key_lst):
     return data
 
 
+class LazyDict(dict):
+    """兼容dict的结果,第一次访问内容时才调用parse生成,之后与普通dict相同
+
+    json.dumps等直接读取dict内部存储的函数在访问前会得到空的dict
+    """
+    def __init__(self, parse, *args):
+        dict.__init__(self)
+        self._parse = parse
+        self._args = args
+
+    def _load(self):
+        parse = self._parse
+        if parse is not None:
+            dict.update(self, parse(*self._args))
+            self._parse = self._args = None  # 释放原始的response
+
+    def __reduce__(self):
+        self._load()
+        return dict, (dict(self),)
+
+
+def _lazy_method(name):
+    method = getattr(dict, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._load()
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in ('__getitem__', '__setitem__', '__delitem__', '__contains__', '__iter__', '__len__', '__repr__', '__eq__', '__ne__',
+              '__reversed__', '__or__', '__ior__', 'get', 'keys', 'values', 'items', 'copy', 'pop', 'popitem', 'setdefault', 'update',
+              'clear', 'has_key', 'iterkeys', 'itervalues', 'iteritems', 'viewkeys', 'viewvalues', 'viewitems'):
+    if hasattr(dict, _name):
+        setattr(LazyDict, _name, _lazy_method(_name))
+
+
 def decode_result(data, key_lst, multi_key_list):
     """decode结果中的字段"""
     for key in key_lst:
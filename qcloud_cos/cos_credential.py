@@ -0,0 +1,119 @@
+# -*- coding=utf-8
+
+import abc
+import logging
+import threading
+import time
+import six
+from .cos_auth import CosSigner
+from .cos_comm import to_unicode
+
+logger = logging.getLogger(__name__)
+
+
+class Credential(object):
+    """一组访问COS的秘钥,创建后不再修改,更换秘钥时整体替换,签名时不会取到新旧混合的秘钥"""
+    def __init__(self, secret_id, secret_key, token=None, expired_time=None):
+        """
+        :param secret_id(string): 秘钥SecretId.
+        :param secret_key(string): 秘钥SecretKey.
+        :param token(string): 临时秘钥使用的token.
+        :param expired_time(int): 临时秘钥的过期时间,unix时间戳,永久秘钥为空.
+        """
+        self.secret_id = to_unicode(secret_id)
+        self.secret_key = to_unicode(secret_key)
+        self.token = to_unicode(token)
+        self.expired_time = expired_time
+        self.signer = CosSigner(self.secret_id, self.secret_key)  # sign_key按秘钥缓存,随秘钥一起替换
+
+
+@six.add_metaclass(abc.ABCMeta)
+class CredentialProvider(object):
+    """秘钥提供者,每次签名前调用get_credential获取当前的秘钥,自定义的秘钥来源继承此类并实现get_credential"""
+    @abc.abstractmethod
+    def get_credential(self):
+        """子类必须实现,返回当前使用的秘钥,会在每次签名时被调用,需要是线程安全的
+
+        :return(Credential): 当前使用的秘钥.
+        """
+
+
+class RefreshingCredentialProvider(CredentialProvider):
+    """临时秘钥提供者,在秘钥过期前由后台线程获取新的秘钥并整体替换
+
+    get_credential只读取当前的秘钥,不会因为刷新阻塞请求;刷新失败时继续使用旧秘钥,并按retry_interval重试
+
+    .. code-block:: python
+
+        def fetch():
+            # 从STS获取临时秘钥
+            response = sts.get_credential()
+            return Credential(response['credentials']['tmpSecretId'], response['credentials']['tmpSecretKey'],
+                              response['credentials']['sessionToken'], response['expiredTime'])
+
+        provider = RefreshingCredentialProvider(fetch, refresh_ahead=300)
+        config = CosConfig(Region=region, CredentialProvider=provider)
+        client = CosS3Client(config)
+    """
+    def __init__(self, fetcher, refresh_ahead=300, retry_interval=10, default_interval=1800):
+        """
+        :param fetcher(function): 获取秘钥的函数,无参数,返回Credential.
+        :param refresh_ahead(int): 在秘钥过期前多少秒开始刷新,单位为s.
+        :param retry_interval(int): 刷新失败后的重试间隔,单位为s.
+        :param default_interval(int): 秘钥没有过期时间时的刷新间隔,单位为s.
+        """
+        self._fetcher = fetcher
+        self._refresh_ahead = refresh_ahead
+        self._retry_interval = retry_interval
+        self._default_interval = default_interval
+        self._credential = fetcher()  # 第一次同步获取,秘钥获取失败时直接抛出异常
+        self._start()
+
+    def _start(self):
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __getstate__(self):
+        """多进程传输时只复制fetcher和当前秘钥,子进程中重新启动刷新线程"""
+        state = self.__dict__.copy()
+        for name in ('_lock', '_closed', '_thread'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._start()
+
+    def get_credential(self):
+        return self._credential
+
+    def refresh(self):
+        """同步获取新的秘钥并替换当前秘钥,失败时抛出异常且保留旧秘钥"""
+        with self._lock:
+            credential = self._fetcher()
+            self._credential = credential
+        logger.info("credential refreshed, expired time: %s", credential.expired_time)
+        return credential
+
+    def close(self):
+        """停止后台刷新线程"""
+        self._closed.set()
+
+    def _next_refresh(self):
+        expired_time = self._credential.expired_time
+        if expired_time is None:
+            return self._default_interval
+        return max(expired_time - self._refresh_ahead - time.time(), 1)
+
+    def _run(self):
+        wait = self._next_refresh()
+        while not self._closed.wait(wait):
+            try:
+                self.refresh()
+                wait = self._next_refresh()
+            except Exception as e:
+                logger.warning("refresh credential failed: %s", e)
+                wait = self._retry_interval
@@ -0,0 +1,180 @@
+# -*- coding=utf-8
+
+import logging
+import random
+import socket
+import threading
+import time
+
+try:
+    import dns.resolver as dns_resolver  # 安装了dnspython时使用DNS记录中的TTL
+except ImportError:
+    dns_resolver = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_ip(host):
+    """判断host是否已经是ip,不需要解析"""
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host.strip('[]'))
+            return True
+        except (socket.error, ValueError, AttributeError):
+            pass
+    return False
+
+
+def system_resolve(host, timeout=None):
+    """解析域名的A记录
+
+    :param host(string): 域名.
+    :param timeout(float): 解析超时时间,只对dnspython生效,单位为s.
+    :return(tuple): ip列表以及ttl,系统解析器无法获取ttl时为None.
+    """
+    if dns_resolver is not None:
+        resolve = getattr(dns_resolver, 'resolve', None) or dns_resolver.query  # dnspython 1.x只有query
+        answer = resolve(host, 'A', lifetime=timeout)
+        return [r.address for r in answer], answer.rrset.ttl
+    addresses = []
+    for info in socket.getaddrinfo(host, 0, socket.AF_INET, socket.SOCK_STREAM):
+        if info[4][0] not in addresses:
+            addresses.append(info[4][0])
+    return addresses, None
+
+
+class _DnsEntry(object):
+    def __init__(self, addresses, expires):
+        self.addresses = addresses
+        self.expires = expires
+
+
+class DnsCache(object):
+    """进程内的DNS缓存,CosS3Client新建连接时使用缓存中的ip,不再每次调用系统解析器
+
+    记录过期后继续返回旧的ip并在后台重新解析(stale-while-revalidate),解析慢或者失败不会阻塞请求;
+    多个client可以共用一个DnsCache,按任务创建的短生命周期client也可以命中缓存
+
+    .. code-block:: python
+
+        dns_cache = DnsCache(min_ttl=30, max_ttl=600)
+        config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, DnsCache=dns_cache,
+                           DnsPrefetchBuckets=['examplebucket-1250000000'])  # 创建client时预先解析存储桶域名
+        client = CosS3Client(config)
+        print (dns_cache.get_stats())
+    """
+    def __init__(self, min_ttl=30, max_ttl=600, default_ttl=60, max_stale=3600, resolve_timeout=5, resolver=None):
+        """
+        :param min_ttl(int): 缓存时间的下限,单位为s,DNS记录的ttl过小时使用该值.
+        :param max_ttl(int): 缓存时间的上限,单位为s.
+        :param default_ttl(int): 解析器无法获取ttl时的缓存时间,单位为s.
+        :param max_stale(int): 记录过期后最多继续使用多久,单位为s,超过后必须同步解析.
+        :param resolve_timeout(float): 解析超时时间,单位为s.
+        :param resolver(function): 自定义解析函数,参数为(host, timeout),返回(ip列表, ttl).
+        """
+        self._min_ttl = min_ttl
+        self._max_ttl = max_ttl
+        self._default_ttl = default_ttl
+        self._max_stale = max_stale
+        self._resolve_timeout = resolve_timeout
+        self._resolver = resolver or system_resolve
+        self._lock = threading.Lock()
+        self._entries = dict()
+        self._refreshing = set()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'errors': 0
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _lookup(self, host):
+        """调用解析器并更新缓存,解析失败时返回仍在max_stale内的旧记录"""
+        try:
+            addresses, ttl = self._resolver(host, self._resolve_timeout)
+            if not addresses:
+                raise socket.gaierror('no address for ' + host)
+        except Exception as e:
+            self._count('errors')
+            with self._lock:
+                entry = self._entries.get(host)
+            if entry is not None and time.time() < entry.expires + self._max_stale:
+                logger.warning('resolve %s failed, use stale addresses: %s', host, e)
+                return entry.addresses
+            raise
+        if ttl is None:
+            ttl = self._default_ttl
+        ttl = min(max(ttl, self._min_ttl), self._max_ttl)
+        with self._lock:
+            self._entries[host] = _DnsEntry(list(addresses), time.time() + ttl)
+        return addresses
+
+    def _refresh(self, host):
+        try:
+            self._lookup(host)
+            self._count('refreshes')
+        except Exception as e:
+            logger.warning('refresh dns of %s failed: %s', host, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(host)
+
+    def _refresh_in_background(self, host):
+        with self._lock:
+            if host in self._refreshing:
+                return
+            self._refreshing.add(host)
+        t = threading.Thread(target=self._refresh, args=(host,))
+        t.daemon = True
+        t.start()
+
+    def resolve(self, host):
+        """获取域名对应的ip列表,优先使用缓存
+
+        :param host(string): 域名.
+        :return(list): ip列表.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and now < entry.expires:
+                self._stats['hits'] += 1
+                return entry.addresses
+            stale = entry is not None and now < entry.expires + self._max_stale
+            self._stats['stale_hits' if stale else 'misses'] += 1
+        if stale:
+            self._refresh_in_background(host)
+            return entry.addresses
+        return self._lookup(host)
+
+    def choose(self, host):
+        """从域名的多个ip中随机选择一个用于新建连接"""
+        return random.choice(self.resolve(host))
+
+    def prefetch(self, host):
+        """在后台预先解析域名,不阻塞调用方"""
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and time.time() < entry.expires:
+                return
+        self._refresh_in_background(host)
+
+    def invalidate(self, host):
+        """删除域名的缓存,连接失败时调用,下次新建连接重新解析"""
+        with self._lock:
+            self._entries.pop(host, None)
+
+    def get_stats(self):
+        """获取缓存统计
+
+        :return(dict): 命中次数,命中过期记录的次数,未命中次数,后台刷新次数,解析失败次数以及缓存的域名数.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['hosts'] = len(self._entries)
+        return stats
@@ -0,0 +1,206 @@
+# -*- coding=utf-8
+
+import socket
+import threading
+import time
+from six.moves.urllib.parse import urlsplit, urlunsplit
+from .cos_comm import to_unicode
+from .cos_exception import CosClientError
+
+
+def resolve_host(host, port=None):
+    """解析域名的全部A记录,可以作为EndpointPool的resolver
+
+    :param host(string): 域名.
+    :param port(int): 端口,为空时使用url中的默认端口.
+    :return(list): ip或者ip:port的列表.
+    """
+    addrs = []
+    for info in socket.getaddrinfo(host, port or 0, socket.AF_INET, socket.SOCK_STREAM):
+        ip = info[4][0]
+        addr = ip if port is None else u'{ip}:{port}'.format(ip=ip, port=port)
+        if addr not in addrs:
+            addrs.append(addr)
+    return addrs
+
+
+class EndpointNode(object):
+    """EndpointPool中的一个访问节点,记录并发数,健康状态以及延迟统计"""
+    def __init__(self, address):
+        self.address = to_unicode(address)
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.ewma_latency = None
+
+    def is_healthy(self, now):
+        return self.ejected_until <= now
+
+    def rewrite_url(self, url):
+        """将url中的host替换为节点的ip:port"""
+        parts = urlsplit(url)
+        return urlunsplit((parts.scheme, self.address, parts.path, parts.query, parts.fragment))
+
+    def to_dict(self, now):
+        return {
+            'address': self.address,
+            'healthy': self.is_healthy(now),
+            'outstanding': self.outstanding,
+            'requests': self.requests,
+            'failures': self.failures,
+            'ejections': self.ejections,
+            'consecutive_failures': self.consecutive_failures,
+            'avg_latency_ms': self.total_latency * 1000 / self.requests if self.requests else 0,
+            'ewma_latency_ms': self.ewma_latency * 1000 if self.ewma_latency is not None else 0,
+            'max_latency_ms': self.max_latency * 1000
+        }
+
+
+class EndpointPool(object):
+    """多个ip:port组成的访问节点池,send_request每次请求从中选择一个节点
+
+    节点连续失败failure_threshold次后被摘除cooldown秒,冷却结束后重新参与调度,再次失败立即被摘除;
+    所有节点都被摘除时选择最早恢复的节点,不会因为健康检查导致请求无法发出
+
+    .. code-block:: python
+
+        pool = EndpointPool(['10.0.0.1', '10.0.0.2:8080'], strategy='least_outstanding')
+        config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, IP=pool)  # 获取配置对象
+        client = CosS3Client(config)
+        print (client.get_endpoint_stats())
+    """
+    ROUND_ROBIN = 'round_robin'
+    LEAST_OUTSTANDING = 'least_outstanding'
+
+    def __init__(self, endpoints=None, resolver=None, strategy=ROUND_ROBIN, failure_threshold=3, cooldown=30,
+                 refresh_interval=60, default_port=None):
+        """
+        :param endpoints(list): ip或者ip:port的列表.
+        :param resolver(function): 返回ip或者ip:port列表的函数,例如resolve_host,每refresh_interval秒重新调用一次.
+        :param strategy(string): 负载均衡策略,round_robin为轮询,least_outstanding为选择当前并发请求最少的节点.
+        :param failure_threshold(int): 连续失败多少次后摘除节点.
+        :param cooldown(float): 节点被摘除的时间,单位为s.
+        :param refresh_interval(float): 调用resolver更新节点列表的间隔,单位为s.
+        :param default_port(int): 没有指定端口的节点使用的端口.
+        """
+        if strategy not in (self.ROUND_ROBIN, self.LEAST_OUTSTANDING):
+            raise CosClientError('strategy can be only set to round_robin/least_outstanding')
+        if not endpoints and resolver is None:
+            raise CosClientError('endpoints or resolver is required')
+        self._lock = threading.Lock()
+        self._strategy = strategy
+        self._failure_threshold = failure_threshold
+        self._cooldown = cooldown
+        self._refresh_interval = refresh_interval
+        self._default_port = default_port
+        self._resolver = resolver
+        self._resolved_time = 0
+        self._index = 0
+        self._nodes = []
+        if endpoints:
+            self._set_addresses(endpoints)
+        else:
+            self._refresh()
+
+    def _format_address(self, address):
+        address = to_unicode(address)
+        if self._default_port is not None and u':' not in address:
+            address = u'{ip}:{port}'.format(ip=address, port=self._default_port)
+        return address
+
+    def _set_addresses(self, addresses):
+        """更新节点列表,已经存在的节点保留统计信息"""
+        old_nodes = dict((node.address, node) for node in self._nodes)
+        nodes = []
+        for address in addresses:
+            address = self._format_address(address)
+            if address not in old_nodes:
+                old_nodes[address] = EndpointNode(address)
+            if old_nodes[address] not in nodes:
+                nodes.append(old_nodes[address])
+        self._nodes = nodes
+
+    def _refresh(self):
+        self._resolved_time = time.time()
+        addresses = self._resolver()
+        if not addresses:
+            if not self._nodes:
+                raise CosClientError('resolver returned no endpoint')
+            return
+        self._set_addresses(addresses)
+
+    def acquire(self):
+        """选择一个节点发起请求,请求结束后需要调用release
+
+        :return(EndpointNode): 选中的节点.
+        """
+        now = time.time()
+        if self._resolver is not None and now - self._resolved_time >= self._refresh_interval:
+            with self._lock:
+                if now - self._resolved_time >= self._refresh_interval:
+                    try:
+                        self._refresh()
+                    except Exception:
+                        if not self._nodes:
+                            raise
+        with self._lock:
+            healthy = [node for node in self._nodes if node.is_healthy(now)]
+            if not healthy:
+                node = min(self._nodes, key=lambda n: n.ejected_until)
+            elif self._strategy == self.LEAST_OUTSTANDING:
+                # 并发数相同时轮询,避免流量集中在第一个节点
+                self._index += 1
+                start = self._index % len(healthy)
+                ordered = healthy[start:] + healthy[:start]
+                node = min(ordered, key=lambda n: n.outstanding)
+            else:
+                node = healthy[self._index % len(healthy)]
+                self._index += 1
+            node.outstanding += 1
+            return node
+
+    def release(self, node, success, latency):
+        """记录请求结果,连续失败的节点被摘除一段时间
+
+        :param node(EndpointNode): acquire返回的节点.
+        :param success(bool): 请求是否成功,网络错误和5xx认为是失败.
+        :param latency(float): 请求耗时,单位为s.
+        """
+        with self._lock:
+            node.outstanding -= 1
+            node.requests += 1
+            node.total_latency += latency
+            node.max_latency = max(node.max_latency, latency)
+            if node.ewma_latency is None:
+                node.ewma_latency = latency
+            else:
+                node.ewma_latency = 0.8 * node.ewma_latency + 0.2 * latency
+            if success:
+                node.consecutive_failures = 0
+                return
+            node.failures += 1
+            node.consecutive_failures += 1
+            if node.consecutive_failures >= self._failure_threshold:
+                node.ejected_until = time.time() + self._cooldown
+                node.ejections += 1
+
+    def rewrite_urls(self, url):
+        """将url中的host替换为每个健康节点的ip:port,用于预热连接"""
+        now = time.time()
+        with self._lock:
+            nodes = [node for node in self._nodes if node.is_healthy(now)] or list(self._nodes)
+        return [node.rewrite_url(url) for node in nodes]
+
+    def get_stats(self):
+        """获取每个节点的统计信息
+
+        :return(list): 每个节点的地址,健康状态,并发数,请求数,失败数,被摘除次数以及平均,EWMA,最大延迟(ms).
+        """
+        now = time.time()
+        with self._lock:
+            return [node.to_dict(now) for node in self._nodes]
@@ -1,6 +1,6 @@
 # -*- coding=utf-8
 
-import xml.dom.minidom
+from . import cos_xml
 
 
 class CosException(Exception):
@@ -11,26 +11,12 @@ class CosException(Exception):
 def digest_xml(data):
     msg = dict()
     try:
-        tree = xml.dom.minidom.parseString(data)
-        root = tree.documentElement
-
-        result = root.getElementsByTagName('Code')
-        msg['code'] = result[0].childNodes[0].nodeValue
-
-        result = root.getElementsByTagName('Message')
-        msg['message'] = result[0].childNodes[0].nodeValue
-
-        result = root.getElementsByTagName('Resource')
-        msg['resource'] = result[0].childNodes[0].nodeValue
-
-        result = root.getElementsByTagName('RequestId')
-        msg['requestid'] = result[0].childNodes[0].nodeValue
-
-        result = root.getElementsByTagName('TraceId')
-        if result:
-            msg['traceid'] = result[0].childNodes[0].nodeValue
-        else:
-            msg['traceid'] = 'Unknown'
+        texts = cos_xml.find_texts(cos_xml.fromstring(data), ['Code', 'Message', 'Resource', 'RequestId', 'TraceId'])
+        for key, name in (('code', 'Code'), ('message', 'Message'), ('resource', 'Resource'), ('requestid', 'RequestId')):
+            if texts.get(name) is None:
+                return "Response Error Msg Is INVALID"
+            msg[key] = texts[name]
+        msg['traceid'] = texts.get('TraceId') or 'Unknown'
         return msg
     except Exception as e:
         return "Response Error Msg Is INVALID"
@@ -42,6 +28,23 @@ class CosClientError(CosException):
         CosException.__init__(self, message)
 
 
+class CosCircuitOpenError(CosClientError):
+    """访问节点的熔断器处于打开状态,请求没有发出直接失败"""
+    def __init__(self, endpoint, retry_after):
+        CosClientError.__init__(self, 'circuit breaker is open for {endpoint}, retry after {retry_after:.1f}s'.format(
+            endpoint=endpoint, retry_after=retry_after))
+        self._endpoint = endpoint
+        self._retry_after = retry_after
+
+    def get_endpoint(self):
+        """获取被熔断的节点"""
+        return self._endpoint
+
+    def get_retry_after(self):
+        """获取熔断器进入半开状态还需要等待的时间,单位为s"""
+        return self._retry_after
+
+
 class CosServiceError(CosException):
     """COS Server端错误，可以获取特定的错误信息"""
     def __init__(self, method, message, status_code):
@@ -0,0 +1,224 @@
+# -*- coding=utf-8
+
+import logging
+import threading
+import time
+from collections import deque
+from six.moves.queue import Queue, Empty
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy(object):
+    """读请求的对冲策略,请求在一定时间内没有收到响应头时再发起一个相同的请求,先返回的请求生效
+
+    对冲等待时间取最近读请求首字节耗时的percentile分位数,对冲请求占全部请求的比例不超过max_hedge_ratio,
+    避免服务端整体变慢时请求量翻倍
+
+    .. code-block:: python
+
+        config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+        client = CosS3Client(config, hedge_policy=HedgePolicy(percentile=0.95, max_hedge_ratio=0.05))
+        response = client.head_object(Bucket='bucket', Key='test.txt')
+        print (client.get_hedge_metrics())
+    """
+    def __init__(self, percentile=0.95, initial_delay=0.05, min_delay=0.005, max_delay=2, max_hedge_ratio=0.05,
+                 operations=('get_object', 'head_object'), window=1000, min_samples=20, max_workers=32):
+        """
+        :param percentile(float): 对冲等待时间取首字节耗时的分位数.
+        :param initial_delay(float): 样本数不足min_samples时的对冲等待时间,单位为s.
+        :param min_delay(float): 对冲等待时间的下限,单位为s.
+        :param max_delay(float): 对冲等待时间的上限,单位为s.
+        :param max_hedge_ratio(float): 对冲请求占全部请求的最大比例.
+        :param operations(tuple): 开启对冲的接口,只应包含没有副作用的读接口.
+        :param window(int): 统计首字节耗时的样本数.
+        :param min_samples(int): 使用分位数作为等待时间需要的最少样本数.
+        :param max_workers(int): 发送读请求的线程数上限,线程空闲时复用,没有空闲线程时在调用线程中发送且不对冲.
+        """
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.operations = tuple(operations)
+        self.min_samples = min_samples
+        self._window = window
+        self.executor = _Executor(max_workers)
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self._delay = None
+        self._window_calls = 0
+        self._window_hedged = 0
+        self._metrics = {
+            'calls': 0,
+            'hedged': 0,
+            'hedge_wins': 0,
+            'primary_wins': 0,
+            'ratio_limited': 0
+        }
+
+    def get_delay(self):
+        """发起对冲请求前的等待时间,单位为s"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.initial_delay
+            if self._delay is None:  # 新增样本后才重新计算分位数
+                samples = sorted(self._samples)
+                index = min(int(len(samples) * self.percentile), len(samples) - 1)
+                self._delay = min(max(samples[index], self.min_delay), self.max_delay)
+            return self._delay
+
+    def add_sample(self, latency):
+        """记录一次读请求收到响应头的耗时"""
+        with self._lock:
+            self._samples.append(latency)
+            if len(self._samples) % 50 == 0 or len(self._samples) <= self.min_samples:
+                self._delay = None
+
+    def allow_hedge(self):
+        """判断是否还可以发起对冲请求,超过max_hedge_ratio时不再对冲
+
+        允许时预占一个对冲名额,对冲请求没有发出时需要调用release_hedge归还
+        """
+        with self._lock:
+            if self._window_hedged + 1 > self.max_hedge_ratio * max(self._window_calls, 1):
+                self._metrics['ratio_limited'] += 1
+                return False
+            self._window_hedged += 1
+            return True
+
+    def release_hedge(self):
+        """归还allow_hedge预占的对冲名额"""
+        with self._lock:
+            self._window_hedged = max(self._window_hedged - 1, 0)
+
+    def record_call(self, hedged, hedge_won):
+        """记录一次调用,hedged表示是否实际发出了对冲请求"""
+        with self._lock:
+            self._metrics['calls'] += 1
+            self._window_calls += 1
+            if self._window_calls >= self._window:  # 按窗口衰减,比例限制只看最近的请求
+                self._window_calls //= 2
+                self._window_hedged //= 2
+            if hedged:
+                self._metrics['hedged'] += 1
+                self._metrics['hedge_wins' if hedge_won else 'primary_wins'] += 1
+
+    def get_metrics(self):
+        """获取对冲统计
+
+        :return(dict): 调用次数,对冲次数,对冲请求先返回的次数,原请求先返回的次数,因比例限制没有对冲的次数以及当前的等待时间.
+        """
+        delay = self.get_delay()
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['delay'] = delay
+        return metrics
+
+
+class _Executor(object):
+    """复用线程的有界线程池,只在有空闲线程或者线程数未达到上限时接受任务"""
+    def __init__(self, max_workers):
+        self._max_workers = max_workers
+        self._tasks = Queue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._idle = 0
+
+    def submit(self, func, *args):
+        """提交任务,没有可用线程时返回False,不排队等待"""
+        with self._lock:
+            if self._idle > 0:
+                self._idle -= 1
+            elif self._workers < self._max_workers:
+                self._workers += 1
+                t = threading.Thread(target=self._work)
+                t.daemon = True
+                t.start()
+            else:
+                return False
+            self._tasks.put((func, args))  # 每个任务都对应一个预留的线程,队列中的任务不会等待
+        return True
+
+    def _work(self):
+        while True:
+            func, args = self._tasks.get()
+            try:
+                func(*args)
+            except Exception:
+                logger.exception('hedge task failed')
+            with self._lock:
+                self._idle += 1
+
+
+def _close_quietly(res):
+    try:
+        res.close()
+    except Exception:
+        pass
+
+
+def hedged_call(policy, send):
+    """发起请求,超过对冲等待时间没有返回时再发起一个相同的请求,返回先成功的结果,后返回的响应被关闭
+
+    两个请求都在policy的线程池中发送,线程池已满时在当前线程发送原请求且不对冲
+
+    :param policy(HedgePolicy): 对冲策略.
+    :param send(function): 发起请求的函数,参数为请求序号(0为原请求,1为对冲请求),返回requests的Response.
+    :return(Response): 先返回的响应,两个请求都失败时抛出原请求的异常.
+    """
+    results = Queue()
+    state = {'done': False}
+    lock = threading.Lock()
+
+    def run(index):
+        if state['done']:  # 等待线程期间另一个请求已经返回
+            return
+        start = time.time()
+        try:
+            res, error = send(index), None
+        except Exception as e:
+            res, error = None, e
+        if index == 0 and error is None:
+            policy.add_sample(time.time() - start)
+        with lock:
+            if state['done']:  # 已经有请求返回,关闭后返回的响应以释放连接
+                if res is not None:
+                    _close_quietly(res)
+                return
+            results.put((index, res, error))
+
+    if not policy.executor.submit(run, 0):
+        start = time.time()
+        try:
+            res = send(0)
+        finally:
+            policy.record_call(False, False)
+        policy.add_sample(time.time() - start)
+        return res
+    hedged = False
+    try:
+        index, res, error = results.get(timeout=policy.get_delay())
+    except Empty:
+        index = None
+        if policy.allow_hedge():
+            hedged = policy.executor.submit(run, 1)
+            if not hedged:  # 线程池已满,没有发出对冲请求
+                policy.release_hedge()
+    if index is None:
+        index, res, error = results.get()
+    if error is not None and hedged:  # 先返回的请求失败,等待另一个请求
+        first_error = error
+        index, res, error = results.get()
+        if error is not None:
+            error = first_error if index == 1 else error
+    with lock:
+        state['done'] = True
+        while not results.empty():
+            other = results.get_nowait()
+            if other[1] is not None:
+                _close_quietly(other[1])
+    policy.record_call(hedged, index == 1 and error is None)
+    if error is not None:
+        raise error
+    return res
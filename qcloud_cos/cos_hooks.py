@@ -0,0 +1,114 @@
+# -*- coding=utf-8
+
+import copy
+import logging
+import threading
+import time
+from requests.utils import super_len
+from .cos_exception import CosClientError
+
+logger = logging.getLogger(__name__)
+
+# send_request各个阶段触发的事件
+HOOK_EVENTS = (
+    'before_sign',          # 签名前
+    'after_sign',           # 签名后,timings['sign']为签名耗时
+    'before_send',          # 每次发起请求前,attempt为第几次请求
+    'response_headers',     # 收到响应头,timings['connect']为新建连接耗时,timings['ttfb']为首字节耗时
+    'response_body_done',   # 响应body读取完成,timings['body']为读取耗时,stream方式下载时不触发
+    'parsed',               # 返回的xml解析完成,timings['parse']为解析耗时,LazyResponse时在第一次访问结果时触发
+    'retry',                # 重试前,retry_delay为退避等待时间
+    'error',                # 调用最终失败,error为抛出的异常
+)
+
+
+class HookContext(object):
+    """一次调用在各个事件之间传递的上下文,handler可以在extra中保存自己的数据,例如tracing的span"""
+    def __init__(self, operation, method, url, bucket, request_headers, data=None, stream=False):
+        self.operation = operation
+        self.method = method
+        self.url = url
+        self.bucket = bucket
+        self.request_headers = request_headers
+        self.stream = stream
+        self.bytes_sent = super_len(data) if data is not None else 0
+        self.bytes_received = 0
+        self.attempt = 0
+        self.status_code = None
+        self.response_headers = None
+        self.retry_delay = 0
+        self.error = None
+        self.start_time = time.time()
+        self.timings = dict()
+        self.extra = dict()
+
+    def elapsed(self):
+        """从调用开始到现在的耗时,单位为s"""
+        return time.time() - self.start_time
+
+    def copy(self):
+        """复制上下文给对冲请求使用,timings和extra不与原请求共享"""
+        context = copy.copy(self)
+        context.timings = dict(self.timings)
+        context.extra = dict(self.extra)
+        return context
+
+
+class Hooks(object):
+    """CosS3Client的事件注册表,没有注册handler时send_request不创建HookContext,几乎没有额外开销"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = dict()
+        self.enabled = False
+
+    def register(self, event, handler):
+        """注册事件的handler,handler的参数为(event, HookContext)
+
+        :param event(string): 事件名称,见HOOK_EVENTS.
+        :param handler(function): 事件触发时调用的函数.
+        """
+        if event not in HOOK_EVENTS:
+            raise CosClientError('unknown hook event: ' + str(event))
+        with self._lock:
+            handlers = list(self._handlers.get(event, []))
+            handlers.append(handler)
+            self._handlers[event] = handlers
+            self.enabled = True
+
+    def unregister(self, event, handler):
+        with self._lock:
+            # 每次取self.method都会生成新的绑定方法,用==比较,__self__和__func__相同即视为同一个handler
+            handlers = [h for h in self._handlers.get(event, []) if h != handler]
+            if handlers:
+                self._handlers[event] = handlers
+            else:
+                self._handlers.pop(event, None)
+            self.enabled = bool(self._handlers)
+
+    def emit(self, event, context):
+        """触发事件,handler抛出的异常只记录日志,不影响请求"""
+        for handler in self._handlers.get(event, ()):
+            try:
+                handler(event, context)
+            except Exception as e:
+                logger.warning('hook %s for %s failed: %s', handler, event, e)
+
+
+class TimedAuth(object):
+    """包装CosS3Auth,在签名前后触发before_sign和after_sign"""
+    def __init__(self, auth, hooks, context):
+        self._auth = auth
+        self._hooks = hooks
+        self._context = context
+
+    def with_context(self, context):
+        """使用同一个签名对象,在另一个上下文中触发事件"""
+        return TimedAuth(self._auth, self._hooks, context)
+
+    def __call__(self, r):
+        self._hooks.emit('before_sign', self._context)
+        start = time.time()
+        r = self._auth(r)
+        self._context.timings['sign'] = time.time() - start
+        self._hooks.emit('after_sign', self._context)
+        return r
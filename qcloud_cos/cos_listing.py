@@ -0,0 +1,315 @@
+# -*- coding=utf-8
+
+import array
+import calendar
+import csv
+import time
+import six
+from collections import namedtuple
+from six import string_types
+from six.moves.urllib.parse import unquote
+from .cos_comm import to_bytes
+from . import cos_xml
+
+# 列举结果中的单个文件,size为int,last_modified为返回的ISO 8601格式时间
+ObjectRecord = namedtuple('ObjectRecord', ['key', 'size', 'etag', 'last_modified', 'storage_class'])
+
+
+class _ListTags(object):
+    """带命名空间的节点名称,解析时直接比较完整的名称"""
+    def __init__(self, ns):
+        self.contents = ns + 'Contents'
+        self.common_prefixes = ns + 'CommonPrefixes'
+        self.prefix = ns + 'Prefix'
+        self.is_truncated = ns + 'IsTruncated'
+        self.next_marker = ns + 'NextMarker'
+        self.key = ns + 'Key'
+        self.size = ns + 'Size'
+        self.etag = ns + 'ETag'
+        self.last_modified = ns + 'LastModified'
+        self.storage_class = ns + 'StorageClass'
+
+
+class ListObjectsStream(object):
+    """流式解析list_objects的返回结果,边接收边解析,迭代得到ObjectRecord
+
+    每个Contents解析完成后立即返回并从根节点上移除,内存占用与单页的文件数无关;
+    迭代结束后可以获取is_truncated,next_marker和common_prefixes.
+    迭代结束时自动关闭连接,不迭代或者提前结束时需要调用close或者使用with语句,否则连接不会放回连接池
+
+    .. code-block:: python
+
+        with client.list_objects_stream(Bucket='bucket', Prefix='dir/') as stream:
+            for record in stream:
+                print(record.key, record.size)
+        if stream.is_truncated:
+            print(stream.next_marker)
+    """
+    def __init__(self, response, decode=True):
+        """
+        :param response(Response): stream方式发送的list_objects请求的响应.
+        :param decode(bool): 是否对key等字段进行url decode.
+        """
+        self._response = response
+        self._decode = decode
+        self._consumed = False
+        self._closed = False
+        self.is_truncated = False
+        self.next_marker = ''
+        self.common_prefixes = list()
+
+    def __iter__(self):
+        if self._closed:
+            raise ValueError('ListObjectsStream is closed')
+        if self._consumed:
+            raise ValueError('ListObjectsStream can only be iterated once')
+        self._consumed = True
+        return self._parse()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """关闭响应,释放连接,可以重复调用"""
+        if not self._closed:
+            self._closed = True
+            self._response.close()
+
+    def _unquote(self, value):
+        if self._decode and value:
+            return unquote(value)
+        return value
+
+    def _parse(self):
+        raw = self._response.raw
+        raw.decode_content = True
+        root = None
+        last_key = None
+        try:
+            # start事件只用于获取根节点,Contents等需要的节点名称不会出现在其他层级,不需要记录深度
+            for event, elem in cos_xml.iterparse(raw, ('start', 'end')):
+                if event == 'start':
+                    if root is None:
+                        root = elem
+                        tags = _ListTags(elem.tag[:elem.tag.find('}') + 1])
+                    continue
+                tag = elem.tag
+                if tag == tags.contents:
+                    fields = dict([(child.tag, child.text) for child in elem])
+                    last_key = self._unquote(fields.get(tags.key))
+                    yield ObjectRecord(last_key, int(fields.get(tags.size) or 0), fields.get(tags.etag),
+                                       fields.get(tags.last_modified), fields.get(tags.storage_class))
+                    root.clear()  # 需要的字段都在各自的end事件中读取过,已经解析的节点全部从根节点上移除
+                elif tag == tags.common_prefixes:
+                    for child in elem:
+                        if child.tag == tags.prefix:
+                            self.common_prefixes.append(self._unquote(child.text))
+                    root.clear()
+                elif tag == tags.is_truncated:
+                    self.is_truncated = elem.text == 'true'
+                elif tag == tags.next_marker:
+                    self.next_marker = self._unquote(elem.text) or ''
+        finally:
+            self.close()
+        if self.is_truncated and not self.next_marker:
+            # 没有设置Delimiter时不返回NextMarker,从本页最后一个key继续列举
+            self.next_marker = last_key or ''
+
+
+# 列整体存储的文件记录,mtime为unix时间戳
+ListingRecord = namedtuple('ListingRecord', ['key', 'size', 'mtime', 'storage_class'])
+
+_INT64 = 'l' if six.PY2 else 'q'  # python2的array没有q,64位linux下l为8字节
+
+
+def parse_last_modified(value):
+    """将2019-01-01T00:00:00.000Z格式的时间转换为unix时间戳,同一天的日期部分只计算一次"""
+    day = value[:10]
+    base = _day_cache.get(day)
+    if base is None:
+        base = calendar.timegm((int(day[:4]), int(day[5:7]), int(day[8:10]), 0, 0, 0))
+        if len(_day_cache) >= 4096:
+            _day_cache.clear()
+        _day_cache[day] = base
+    return base + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+
+
+_day_cache = dict()
+
+
+class ObjectListing(object):
+    """按列存储的文件列表,用于在内存中保存整个存储桶的列举结果
+
+    key按utf-8编码连续存放,size和mtime存放在array中,storage class只保存编号,
+    每个文件的开销约为key的长度加17个字节,dict形式的列举结果每个文件需要数百字节
+
+    .. code-block:: python
+
+        listing = client.list_all_objects(Bucket='bucket', Prefix='logs/')
+        big = listing.filter(min_size=1024 * 1024, modified_before=time.time() - 86400 * 30)
+        print(len(big), big.total_size())
+        big.sort(by='size', reverse=True).to_csv('big_files.csv')
+    """
+    def __init__(self):
+        self._keys = bytearray()
+        self._offsets = array.array(_INT64, [0])  # 第i个key为_keys[_offsets[i]:_offsets[i+1]]
+        self.sizes = array.array(_INT64)
+        self.mtimes = array.array(_INT64)
+        self._classes = array.array('B')
+        self._class_names = list()
+        self._class_index = dict()
+        self._key_sorted = True  # key是否有序,有序时按前缀过滤使用二分查找
+        self._last_key = None
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        return ListingRecord(self.get_key(index), self.sizes[index], self.mtimes[index], self._class_names[self._classes[index]])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def get_key(self, index):
+        return self._key_bytes(index).decode('utf-8')
+
+    def _key_bytes(self, index):
+        return bytes(self._keys[self._offsets[index]:self._offsets[index + 1]])
+
+    def append(self, key, size, last_modified, storage_class):
+        """
+        :param key(string): 文件名.
+        :param size(int): 文件大小.
+        :param last_modified(string|int): ISO 8601格式的时间或者unix时间戳.
+        :param storage_class(string): 存储类型.
+        """
+        key = to_bytes(key)
+        if self._key_sorted and self._last_key is not None and key < self._last_key:
+            self._key_sorted = False
+        self._last_key = key
+        self._keys += key
+        self._offsets.append(len(self._keys))
+        self.sizes.append(int(size))
+        if isinstance(last_modified, string_types):
+            last_modified = parse_last_modified(last_modified)
+        self.mtimes.append(int(last_modified))
+        index = self._class_index.get(storage_class)
+        if index is None:
+            index = self._class_index[storage_class] = len(self._class_names)
+            self._class_names.append(storage_class)
+        self._classes.append(index)
+
+    def extend(self, records):
+        """添加list_objects_stream返回的ObjectRecord"""
+        for record in records:
+            self.append(record.key, record.size, record.last_modified, record.storage_class)
+
+    def total_size(self):
+        return sum(self.sizes)
+
+    def filter(self, prefix=None, min_size=None, max_size=None, modified_after=None, modified_before=None, storage_class=None):
+        """按条件过滤,返回新的ObjectListing
+
+        :param prefix(string): key的前缀.
+        :param min_size(int): 文件大小不小于min_size.
+        :param max_size(int): 文件大小不大于max_size.
+        :param modified_after(int): 修改时间不早于该时间戳.
+        :param modified_before(int): 修改时间早于该时间戳.
+        :param storage_class(string): 存储类型.
+        :return(ObjectListing): 满足所有条件的文件,保持原来的顺序.
+        """
+        indexes = range(len(self))
+        if prefix:
+            indexes = self._prefix_range(to_bytes(prefix))
+        # 每个条件对整列做一次筛选
+        if min_size is not None:
+            sizes = self.sizes
+            indexes = [i for i in indexes if sizes[i] >= min_size]
+        if max_size is not None:
+            sizes = self.sizes
+            indexes = [i for i in indexes if sizes[i] <= max_size]
+        if modified_after is not None:
+            mtimes = self.mtimes
+            indexes = [i for i in indexes if mtimes[i] >= modified_after]
+        if modified_before is not None:
+            mtimes = self.mtimes
+            indexes = [i for i in indexes if mtimes[i] < modified_before]
+        if storage_class is not None:
+            code = self._class_index.get(storage_class)
+            classes = self._classes
+            indexes = [i for i in indexes if classes[i] == code]
+        return self._take(indexes, self._key_sorted)
+
+    def _prefix_range(self, prefix):
+        if not self._key_sorted:
+            return [i for i in range(len(self)) if self._key_bytes(i).startswith(prefix)]
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_bytes(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = lo
+        hi = len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_bytes(mid)[:len(prefix)] <= prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return range(start, lo)
+
+    def sort(self, by='key', reverse=False):
+        """排序,返回新的ObjectListing
+
+        :param by(string): 排序字段,'key'|'size'|'mtime'.
+        :param reverse(bool): 是否降序.
+        """
+        if by == 'key':
+            column = self._key_bytes
+        elif by == 'size':
+            column = self.sizes.__getitem__
+        elif by == 'mtime':
+            column = self.mtimes.__getitem__
+        else:
+            raise ValueError('sort by must be key, size or mtime')
+        indexes = sorted(range(len(self)), key=column, reverse=reverse)
+        return self._take(indexes, by == 'key' and not reverse)
+
+    def _take(self, indexes, key_sorted):
+        listing = ObjectListing()
+        keys, offsets = self._keys, self._offsets
+        new_keys, new_offsets = listing._keys, listing._offsets
+        for i in indexes:
+            new_keys += keys[offsets[i]:offsets[i + 1]]
+            new_offsets.append(len(new_keys))
+        listing.sizes = array.array(_INT64, [self.sizes[i] for i in indexes])
+        listing.mtimes = array.array(_INT64, [self.mtimes[i] for i in indexes])
+        listing._classes = array.array('B', [self._classes[i] for i in indexes])
+        listing._class_names = list(self._class_names)
+        listing._class_index = dict(self._class_index)
+        listing._key_sorted = key_sorted
+        if len(listing):
+            listing._last_key = listing._key_bytes(len(listing) - 1)
+        return listing
+
+    def to_csv(self, path):
+        """导出为utf-8编码的csv文件,列为key,size,last_modified,storage_class"""
+        if six.PY2:
+            fp = open(path, 'wb')
+        else:
+            fp = open(path, 'w', newline='', encoding='utf-8')
+        with fp:
+            writer = csv.writer(fp)
+            writer.writerow(['key', 'size', 'last_modified', 'storage_class'])
+            for i in range(len(self)):
+                key = self._key_bytes(i) if six.PY2 else self.get_key(i)
+                mtime = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(self.mtimes[i]))
+                writer.writerow([key, self.sizes[i], mtime, self._class_names[self._classes[i]]])
@@ -0,0 +1,201 @@
+# -*- coding=utf-8
+
+import bisect
+import threading
+from .cos_exception import CosServiceError
+
+# 默认的延迟分桶,单位为s
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class LatencyHistogram(object):
+    """固定分桶的延迟直方图,由MetricsRegistry加锁保护"""
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为+Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """按分桶估算分位数,返回所在分桶的上界,落在+Inf分桶时返回最大的分桶上界"""
+        if self.count == 0:
+            return 0
+        rank = q * self.count
+        total = 0
+        for i, n in enumerate(self.counts):
+            total += n
+            if total >= rank and n:
+                return self.buckets[min(i, len(self.buckets) - 1)]
+        return self.buckets[-1]
+
+    def to_dict(self):
+        cumulative = []
+        total = 0
+        for le, n in zip(self.buckets + ('+Inf',), self.counts):
+            total += n
+            cumulative.append((le, total))
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': cumulative,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99)
+        }
+
+
+class _OperationMetrics(object):
+    def __init__(self, buckets):
+        self.count = 0
+        self.errors = dict()
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram(buckets)
+
+
+class MetricsRegistry(object):
+    """按操作统计调用次数,错误码,重试次数,收发字节数和延迟直方图,通过CosS3Client的hook收集
+
+    .. code-block:: python
+
+        config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+        client = CosS3Client(config)
+        metrics = client.enable_metrics()
+        client.put_object(Bucket='bucket', Body=b'abc', Key='test.txt')
+        print (metrics.snapshot()['put_object'])
+        print (metrics.render_prometheus())
+    """
+    def __init__(self, namespace='cos_sdk', buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        :param namespace(string): prometheus指标名称的前缀.
+        :param buckets(tuple): 延迟直方图的分桶上界,单位为s.
+        """
+        self._namespace = namespace
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._operations = dict()
+
+    def _get(self, operation):
+        metrics = self._operations.get(operation)
+        if metrics is None:
+            metrics = self._operations[operation] = _OperationMetrics(self._buckets)
+        return metrics
+
+    def attach(self, client):
+        """在client上注册收集指标的hook,多个client可以共用一个MetricsRegistry"""
+        client.register_hook('response_headers', self._on_response_headers)
+        client.register_hook('response_body_done', self._on_response_body_done)
+        client.register_hook('retry', self._on_retry)
+        client.register_hook('error', self._on_error)
+
+    def detach(self, client):
+        client.unregister_hook('response_headers', self._on_response_headers)
+        client.unregister_hook('response_body_done', self._on_response_body_done)
+        client.unregister_hook('retry', self._on_retry)
+        client.unregister_hook('error', self._on_error)
+
+    def _record(self, ctx, error_code=None):
+        latency = ctx.elapsed()
+        bytes_received = ctx.bytes_received
+        if ctx.stream and ctx.response_headers is not None:  # stream方式下载的body由调用方读取,按Content-Length统计
+            bytes_received = int(ctx.response_headers.get('Content-Length', 0))
+        with self._lock:
+            metrics = self._get(ctx.operation)
+            metrics.count += 1
+            metrics.bytes_sent += ctx.bytes_sent * ctx.attempt
+            metrics.bytes_received += bytes_received
+            metrics.latency.observe(latency)
+            if error_code is not None:
+                metrics.errors[error_code] = metrics.errors.get(error_code, 0) + 1
+
+    def _on_response_headers(self, event, ctx):
+        if ctx.stream and ctx.status_code < 400:
+            self._record(ctx)
+
+    def _on_response_body_done(self, event, ctx):
+        if ctx.status_code < 400:
+            self._record(ctx)
+
+    def _on_retry(self, event, ctx):
+        with self._lock:
+            self._get(ctx.operation).retries += 1
+
+    def _on_error(self, event, ctx):
+        if isinstance(ctx.error, CosServiceError):
+            code = ctx.error.get_error_code()
+            if ctx.method == 'HEAD':  # HEAD请求没有body,使用状态码
+                code = str(ctx.error.get_status_code())
+        else:
+            code = 'ClientError'
+        self._record(ctx, code)
+
+    def snapshot(self):
+        """获取当前的统计
+
+        :return(dict): key为操作名,value包括count,errors(错误码到次数),retries,bytes_sent,bytes_received以及latency直方图.
+        """
+        result = dict()
+        with self._lock:
+            for operation, metrics in self._operations.items():
+                result[operation] = {
+                    'count': metrics.count,
+                    'errors': dict(metrics.errors),
+                    'retries': metrics.retries,
+                    'bytes_sent': metrics.bytes_sent,
+                    'bytes_received': metrics.bytes_received,
+                    'latency': metrics.latency.to_dict()
+                }
+        return result
+
+    def reset(self):
+        with self._lock:
+            self._operations = dict()
+
+    def render_prometheus(self):
+        """按prometheus text format输出统计,可以直接作为/metrics接口的返回
+
+        :return(string): prometheus格式的文本.
+        """
+        ns = self._namespace
+        snapshot = self.snapshot()
+        operations = sorted(snapshot)
+        lines = []
+
+        def counter(name, doc, field):
+            lines.append('# HELP {ns}_{name} {doc}'.format(ns=ns, name=name, doc=doc))
+            lines.append('# TYPE {ns}_{name} counter'.format(ns=ns, name=name))
+            for op in operations:
+                lines.append('{ns}_{name}{{operation="{op}"}} {value}'.format(ns=ns, name=name, op=op, value=snapshot[op][field]))
+
+        counter('requests_total', 'Number of SDK calls.', 'count')
+        counter('retries_total', 'Number of retried requests.', 'retries')
+        counter('bytes_sent_total', 'Request body bytes sent.', 'bytes_sent')
+        counter('bytes_received_total', 'Response body bytes received.', 'bytes_received')
+
+        lines.append('# HELP {ns}_errors_total Number of failed SDK calls by error code.'.format(ns=ns))
+        lines.append('# TYPE {ns}_errors_total counter'.format(ns=ns))
+        for op in operations:
+            for code, value in sorted(snapshot[op]['errors'].items()):
+                lines.append('{ns}_errors_total{{operation="{op}",code="{code}"}} {value}'.format(
+                    ns=ns, op=op, code=_escape_label(code), value=value))
+
+        lines.append('# HELP {ns}_request_duration_seconds Latency of SDK calls.'.format(ns=ns))
+        lines.append('# TYPE {ns}_request_duration_seconds histogram'.format(ns=ns))
+        for op in operations:
+            latency = snapshot[op]['latency']
+            for le, value in latency['buckets']:
+                lines.append('{ns}_request_duration_seconds_bucket{{operation="{op}",le="{le}"}} {value}'.format(
+                    ns=ns, op=op, le=le, value=value))
+            lines.append('{ns}_request_duration_seconds_sum{{operation="{op}"}} {value}'.format(ns=ns, op=op, value=repr(latency['sum'])))
+            lines.append('{ns}_request_duration_seconds_count{{operation="{op}"}} {value}'.format(ns=ns, op=op, value=latency['count']))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,123 @@
+# -*- coding=utf-8
+
+import sys
+import threading
+import six
+from six.moves import queue
+from .cos_exception import CosClientError
+
+# 支持自动翻页的列举操作,返回结果中下一页的marker字段到请求参数的映射
+PAGINATED_OPERATIONS = {
+    'list_objects': (('NextMarker', 'Marker'),),
+    'list_objects_versions': (('NextKeyMarker', 'KeyMarker'), ('NextVersionIdMarker', 'VersionIdMarker')),
+    'list_multipart_uploads': (('NextKeyMarker', 'KeyMarker'), ('NextUploadIdMarker', 'UploadIdMarker')),
+    'list_parts': (('NextPartNumberMarker', 'PartNumberMarker'),),
+}
+
+_END = object()
+
+
+def next_page_markers(operation, page):
+    """根据一页的结果计算下一页的marker参数
+
+    :param operation(string): 列举操作名称,PAGINATED_OPERATIONS中的一个.
+    :param page(dict): 这一页的结果.
+    :return(dict): 下一页的marker参数,已经是最后一页时返回None.
+    """
+    if page.get('IsTruncated') != 'true':
+        return None
+    markers = dict()
+    for field, param in PAGINATED_OPERATIONS[operation]:
+        markers[param] = page.get(field) or ''
+    if operation == 'list_objects' and not markers['Marker'] and page.get('Contents'):
+        # 没有设置Delimiter时不返回NextMarker,从本页最后一个key继续列举
+        markers['Marker'] = page['Contents'][-1]['Key']
+    return markers
+
+
+class Paginator(object):
+    """依次获取列举结果的每一页,调用方处理当前页时由后台线程预取后面的页
+
+    每次迭代都从第一页重新开始;提前结束迭代时后台线程在放入下一页前退出
+
+    .. code-block:: python
+
+        paginator = client.paginate('list_objects', Bucket='bucket', Prefix='logs/', Prefetch=2)
+        for page in paginator:
+            print(len(page.get('Contents', [])))
+        for content in paginator.items('Contents'):
+            print(content['Key'])
+    """
+    def __init__(self, fetch, next_markers, markers=None, prefetch=1):
+        """
+        :param fetch(function): 获取一页,marker参数以关键字参数传入,返回这一页的结果.
+        :param next_markers(function): 参数为一页的结果,返回下一页的marker参数,已经是最后一页时返回None.
+        :param markers(dict): 第一页的marker参数.
+        :param prefetch(int): 最多预取的页数,包括正在获取的页,不包括调用方正在处理的页;为0时不使用后台线程,处理完一页后再获取下一页.
+        """
+        self._fetch = fetch
+        self._next_markers = next_markers
+        self._markers = markers or dict()
+        self._prefetch = prefetch
+
+    def __iter__(self):
+        if self._prefetch > 0:
+            return self._prefetch_pages()
+        return self._pages()
+
+    def items(self, *fields):
+        """依次返回每一页中指定字段的所有条目
+
+        :param fields(string): 条目所在的字段,如list_objects的'Contents'.
+        """
+        for page in self:
+            for field in fields:
+                for item in page.get(field, ()):
+                    yield item
+
+    def _pages(self):
+        markers = self._markers
+        while markers is not None:
+            page = self._fetch(**markers)
+            # 在返回这一页之前计算下一页的marker,预取时页面只会被一个线程访问
+            next_markers = self._next_markers(page)
+            if next_markers is not None and next_markers == markers:
+                raise CosClientError('list result is truncated but marker does not change: {0}'.format(markers))
+            yield page
+            markers = next_markers
+
+    def _prefetch_pages(self):
+        pages = queue.Queue()
+        slots = threading.Semaphore(self._prefetch)  # 后台线程获取每一页前占用一个名额,调用方取走一页后归还
+        stopped = threading.Event()
+        thread = threading.Thread(target=self._produce, args=(pages, slots, stopped))
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                page, exc_info = pages.get()
+                if exc_info is not None:
+                    six.reraise(*exc_info)
+                if page is _END:
+                    return
+                slots.release()
+                yield page
+        finally:
+            stopped.set()
+            slots.release()  # 唤醒等待名额的后台线程,使其退出
+
+    def _produce(self, pages, slots, stopped):
+        try:
+            page_iter = self._pages()
+            while True:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                try:
+                    page = next(page_iter)
+                except StopIteration:
+                    pages.put((_END, None))
+                    return
+                pages.put((page, None))
+        except Exception:
+            pages.put((None, sys.exc_info()))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+from logging import getLogger
+from six import string_types
+from .cos_threadpool import SimpleThreadPool
+logger = getLogger(__name__)
+
+_worker_client = None  # 每个子进程独立的CosS3Client,拥有自己的session和连接池
+
+
+class _ResultList(object):
+    """add_task参数中的占位符,子进程中替换为本进程的结果列表,结果在wait_completion后合并"""
+    pass
+
+
+RESULT_LIST = _ResultList()
+
+
+def _init_worker(conf, retry):
+    global _worker_client
+    from .cos_client import CosS3Client
+    _worker_client = CosS3Client(conf, retry=retry)
+
+
+def _run_batch(batch):
+    """在子进程中用线程池执行一批任务,返回线程池的统计和结果列表"""
+    num_threads, tasks = batch
+    results = list()
+    pool = SimpleThreadPool(num_threads)
+    for method, args, kwargs in tasks:
+        args = tuple(results if isinstance(arg, _ResultList) else arg for arg in args)
+        pool.add_task(getattr(_worker_client, method), *args, **kwargs)
+    pool.wait_completion()
+    detail = list()
+    for succ, fail, ret in pool.get_result()['detail']:
+        # 异常对象不一定可以序列化,转为字符串返回
+        detail.append((succ, fail, [str(r) if isinstance(r, Exception) else r for r in ret]))
+    return detail, results
+
+
+class SimpleProcessPool(object):
+    """多进程执行CosS3Client的方法,每个进程使用独立的session签名并发送请求,不受GIL的限制
+
+    接口与SimpleThreadPool一致,add_task传入方法名,参数需要可以序列化;
+    参数中的RESULT_LIST在子进程中替换为结果列表,所有进程的结果合并到get_result()['results']
+    """
+    def __init__(self, conf, retry=1, num_processes=None, num_threads=5):
+        """
+        :param conf(CosConfig): 子进程使用的配置.
+        :param retry(int): 子进程中请求失败的重试次数.
+        :param num_processes(int): 进程数,默认为cpu核数.
+        :param num_threads(int): 每个进程并发执行任务的线程数.
+        """
+        self._conf = conf
+        self._retry = retry
+        self._num_processes = num_processes or multiprocessing.cpu_count()
+        self._num_threads = num_threads
+        self._tasks = list()
+        self._detail = None
+        self._results = None
+
+    def add_task(self, method, *args, **kwargs):
+        """
+        :param method(string|function): CosS3Client的方法名,也可以直接传入client的方法.
+        """
+        if not isinstance(method, string_types):
+            method = method.__name__
+        self._tasks.append((method, args, kwargs))
+
+    def wait_completion(self):
+        num_processes = max(min(self._num_processes, len(self._tasks)), 1)
+        # 按顺序轮流分配,每个进程的分块大小接近
+        batches = [(self._num_threads, self._tasks[i::num_processes]) for i in range(num_processes)]
+        pool = multiprocessing.Pool(num_processes, _init_worker, (self._conf, self._retry))
+        try:
+            outputs = pool.map(_run_batch, batches)
+        finally:
+            pool.close()
+            pool.join()
+        self._detail = list()
+        self._results = list()
+        for detail, results in outputs:
+            self._detail.extend(detail)
+            self._results.extend(results)
+        self._tasks = list()
+
+    def get_result(self):
+        assert self._detail is not None
+        succ_all = all([tp[1] == 0 for tp in self._detail])
+        return {'success_all': succ_all, 'detail': self._detail, 'results': self._results}
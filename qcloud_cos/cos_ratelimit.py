@@ -0,0 +1,115 @@
+# -*- coding=utf-8
+
+import io
+import threading
+import time
+from six import binary_type
+from requests.utils import super_len
+
+
+class RateLimiter(object):
+    """线程安全的令牌桶,限制多个线程上传和下载的总带宽
+
+    .. code-block:: python
+
+        limiter = RateLimiter(10 * 1024 * 1024)  # 总带宽限制为10MB/s
+        client = CosS3Client(config, rate_limiter=limiter)
+        # upload_file的所有线程共用同一个限速
+        response = client.upload_file(Bucket='bucket', LocalFilePath='local.txt', Key='test.txt', MAXThread=10)
+        # 也可以对单次调用限速
+        response = client.get_object(Bucket='bucket', Key='test.txt', RateLimiter=RateLimiter(1024 * 1024))
+    """
+    def __init__(self, rate, burst=None):
+        """
+        :param rate(int): 带宽限制,单位为Byte/s.
+        :param burst(int): 令牌桶容量,即空闲后允许瞬时发送的字节数,默认为rate.
+        """
+        self._lock = threading.Lock()
+        self._rate = float(rate)
+        self._burst = float(burst if burst is not None else rate)
+        self._tokens = self._burst
+        self._last = time.time()
+        self._total_bytes = 0
+        self._total_wait = 0.0
+
+    def set_rate(self, rate, burst=None):
+        """运行中调整带宽限制"""
+        with self._lock:
+            self._refill(time.time())
+            self._rate = float(rate)
+            self._burst = float(burst if burst is not None else rate)
+            self._tokens = min(self._tokens, self._burst)
+
+    def _refill(self, now):
+        self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def consume(self, size):
+        """获取size字节的令牌,令牌不足时预支并等待,等待时间与预支的字节数成正比
+
+        :param size(int): 需要发送或接收的字节数.
+        """
+        if size <= 0:
+            return
+        with self._lock:
+            self._refill(time.time())
+            self._tokens -= size
+            self._total_bytes += size
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0
+            self._total_wait += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def get_stats(self):
+        """获取限速统计
+
+        :return(dict): rate为当前的带宽限制,bytes为经过限速的字节数,wait为累计等待的时间(s).
+        """
+        with self._lock:
+            return {'rate': self._rate, 'bytes': self._total_bytes, 'wait': self._total_wait}
+
+
+class ThrottledBody(object):
+    """按RateLimiter限速读取的请求body,保留原body的位置,重试时可以seek回退"""
+    def __init__(self, data, limiter):
+        if isinstance(data, binary_type):
+            data = io.BytesIO(data)
+        self._data = data
+        self._limiter = limiter
+        self._len = data.tell() + super_len(data)  # super_len返回剩余的长度
+
+    def __len__(self):
+        return self._len
+
+    def read(self, size=-1):
+        chunk = self._data.read(size)
+        self._limiter.consume(len(chunk))
+        return chunk
+
+    def tell(self):
+        return self._data.tell()
+
+    def seek(self, offset, whence=0):
+        return self._data.seek(offset, whence)
+
+
+class ThrottledStream(object):
+    """按RateLimiter限速的下载流,其它属性直接访问原始的流"""
+    def __init__(self, raw, limiter):
+        self._raw = raw
+        self._limiter = limiter
+
+    def read(self, *args, **kwargs):
+        chunk = self._raw.read(*args, **kwargs)
+        self._limiter.consume(len(chunk))
+        return chunk
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+
+def throttled_iter(chunks, limiter):
+    """按RateLimiter限速的迭代器"""
+    for chunk in chunks:
+        limiter.consume(len(chunk))
+        yield chunk
@@ -0,0 +1,144 @@
+# -*- coding=utf-8
+
+import random
+import threading
+from requests.exceptions import ConnectionError, Timeout, ChunkedEncodingError, SSLError
+from .cos_comm import get_id_from_xml
+
+
+class RetryBudget(object):
+    """重试令牌桶,每次重试消耗令牌,请求成功后归还令牌
+
+    服务端故障时所有请求都会失败,令牌很快被耗尽,之后的请求不再重试直接失败,避免重试放大服务端的压力
+    """
+    def __init__(self, capacity=500, retry_cost=5, timeout_cost=10, success_refund=1):
+        """
+        :param capacity(int): 令牌桶容量.
+        :param retry_cost(int): 每次重试消耗的令牌数.
+        :param timeout_cost(int): 超时后重试消耗的令牌数.
+        :param success_refund(int): 请求成功后归还的令牌数.
+        """
+        self._lock = threading.Lock()
+        self._capacity = capacity
+        self._tokens = capacity
+        self._retry_cost = retry_cost
+        self._timeout_cost = timeout_cost
+        self._success_refund = success_refund
+
+    def acquire(self, timeout=False):
+        """获取一次重试的令牌,令牌不足时返回False"""
+        cost = self._timeout_cost if timeout else self._retry_cost
+        with self._lock:
+            if self._tokens < cost:
+                return False
+            self._tokens -= cost
+            return True
+
+    def refund(self):
+        with self._lock:
+            self._tokens = min(self._capacity, self._tokens + self._success_refund)
+
+    def available(self):
+        with self._lock:
+            return self._tokens
+
+
+class RetryPolicy(object):
+    """send_request使用的重试策略,可以继承并重写is_retryable_*和get_delay来定制
+
+    .. code-block:: python
+
+        config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, Token=token)  # 获取配置对象
+        policy = RetryPolicy(max_retries=5, base_delay=0.2, max_delay=10)
+        client = CosS3Client(config, retry_policy=policy)
+        print (client.get_retry_metrics())
+    """
+    # 连接被重置,超时等网络错误可以重试,证书校验失败重试也不会成功
+    retryable_exceptions = (ConnectionError, Timeout, ChunkedEncodingError)
+    terminal_exceptions = (SSLError,)
+    retryable_status = (408, 429, 500, 502, 503, 504)
+    retryable_error_codes = ('SlowDown', 'RequestTimeout', 'InternalError', 'ServiceUnavailable')
+
+    def __init__(self, max_retries=1, base_delay=0.1, max_delay=10, budget=None):
+        """
+        :param max_retries(int): 单次调用的最大重试次数.
+        :param base_delay(float): 指数退避的基础等待时间,单位为s.
+        :param max_delay(float): 单次等待时间的上限,单位为s.
+        :param budget(RetryBudget): 重试令牌桶,为空时创建默认的令牌桶.
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget if budget is not None else RetryBudget()
+        self._lock = threading.Lock()
+        self._metrics = {
+            'calls': 0,
+            'attempts': 0,
+            'retries': 0,
+            'failures': 0,
+            'budget_exhausted': 0,
+            'attempts_per_call': {}
+        }
+
+    def is_retryable_exception(self, exception):
+        """判断请求抛出的异常是否可以重试"""
+        if isinstance(exception, self.terminal_exceptions):
+            return False
+        return isinstance(exception, self.retryable_exceptions)
+
+    def is_retryable_response(self, status_code, body=None):
+        """判断服务端返回的错误是否可以重试,4xx中只有SlowDown等错误码可以重试"""
+        if status_code in self.retryable_status:
+            return True
+        if 400 <= status_code < 500 and body:
+            try:
+                return get_id_from_xml(body, 'Code') in self.retryable_error_codes
+            except Exception:
+                return False
+        return False
+
+    def allow_retry(self, attempt, timeout=False):
+        """判断第attempt次请求失败后是否还可以重试,会消耗令牌桶中的令牌
+
+        :param attempt(int): 已经发起的请求次数,从1开始.
+        :param timeout(bool): 失败是否由超时引起,超时的重试消耗更多令牌.
+        """
+        if attempt > self.max_retries:
+            return False
+        if not self.budget.acquire(timeout):
+            with self._lock:
+                self._metrics['budget_exhausted'] += 1
+            return False
+        return True
+
+    def get_delay(self, attempt):
+        """第attempt次请求失败后的等待时间,指数退避加上full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def record_call(self, attempts, success):
+        """记录一次调用的结果
+
+        :param attempts(int): 这次调用发起的请求次数.
+        :param success(bool): 调用是否成功.
+        """
+        if success:
+            self.budget.refund()
+        with self._lock:
+            self._metrics['calls'] += 1
+            self._metrics['attempts'] += attempts
+            self._metrics['retries'] += attempts - 1
+            if not success:
+                self._metrics['failures'] += 1
+            histogram = self._metrics['attempts_per_call']
+            histogram[attempts] = histogram.get(attempts, 0) + 1
+
+    def get_metrics(self):
+        """获取重试统计
+
+        :return(dict): 调用次数,请求次数,重试次数,失败次数,令牌不足的次数以及每次调用请求次数的分布.
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics['attempts_per_call'] = dict(self._metrics['attempts_per_call'])
+        metrics['budget_available'] = self.budget.available()
+        return metrics
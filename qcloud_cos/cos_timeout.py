@@ -0,0 +1,86 @@
+# -*- coding=utf-8
+
+import re
+import threading
+from requests.utils import super_len
+
+# 统计吞吐量需要的最小传输大小,太小的请求耗时主要是网络延迟
+MIN_THROUGHPUT_SAMPLE_SIZE = 1024 * 1024
+
+
+def get_transfer_size(headers, data=None):
+    """获取请求需要传输的数据量,用于计算超时时间
+
+    上传时为body的大小,下载和拷贝时为Range和x-cos-copy-source-range指定的范围,无法确定时返回0
+    """
+    if data is not None:
+        try:
+            return super_len(data)
+        except Exception:
+            return 0
+    for name in ('Range', 'x-cos-copy-source-range'):
+        value = headers.get(name)
+        if value:
+            m = re.match(r'bytes=(\d+)-(\d+)$', value.strip())
+            if m:
+                return int(m.group(2)) - int(m.group(1)) + 1
+    return 0
+
+
+class TimeoutPolicy(object):
+    """按传输数据量计算的超时时间,小请求使用较短的超时快速发现失效的连接,大文件传输不会因为超时被中断
+
+    读超时 = read_timeout + 数据量 / 吞吐量下限,吞吐量下限取min_throughput和实际观测吞吐量的一半中较小的值
+
+    .. code-block:: python
+
+        policy = TimeoutPolicy(connect_timeout=3, read_timeout=10, min_throughput=1024 * 1024)
+        config = CosConfig(Region=region, SecretId=secret_id, SecretKey=secret_key, TimeoutPolicy=policy)  # 获取配置对象
+        client = CosS3Client(config)
+    """
+    def __init__(self, connect_timeout=5, read_timeout=15, min_throughput=256 * 1024, max_read_timeout=3600):
+        """
+        :param connect_timeout(float): 建立连接的超时时间,单位为s.
+        :param read_timeout(float): 没有数据传输时的读超时时间,单位为s.
+        :param min_throughput(int): 吞吐量下限,单位为Byte/s.
+        :param max_read_timeout(float): 读超时时间的上限,单位为s.
+        """
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.min_throughput = min_throughput
+        self.max_read_timeout = max_read_timeout
+        self._lock = threading.Lock()
+        self._observed_throughput = None
+
+    def get_throughput_floor(self):
+        """计算超时时间使用的吞吐量下限,链路比min_throughput慢时按照实际吞吐量放宽超时"""
+        with self._lock:
+            observed = self._observed_throughput
+        if observed is None:
+            return self.min_throughput
+        return min(self.min_throughput, observed / 2)
+
+    def get_timeout(self, size=0, min_read_timeout=None):
+        """
+        :param size(int): 请求需要传输的字节数.
+        :param min_read_timeout(float): 接口显式指定的超时时间,作为读超时的下限,如complete_multipart_upload服务端处理时间较长.
+        :return(tuple): requests使用的(连接超时, 读超时).
+        """
+        read_timeout = self.read_timeout
+        if size > 0:
+            read_timeout += float(size) / max(self.get_throughput_floor(), 1)
+        read_timeout = min(read_timeout, self.max_read_timeout)
+        if min_read_timeout is not None:
+            read_timeout = max(read_timeout, min_read_timeout)
+        return (self.connect_timeout, read_timeout)
+
+    def record_transfer(self, size, cost):
+        """记录一次上传的数据量和耗时,更新观测到的吞吐量"""
+        if size < MIN_THROUGHPUT_SAMPLE_SIZE or cost <= 0:
+            return
+        throughput = size / cost
+        with self._lock:
+            if self._observed_throughput is None:
+                self._observed_throughput = throughput
+            else:
+                self._observed_throughput = 0.8 * self._observed_throughput + 0.2 * throughput
@@ -0,0 +1,233 @@
+# -*- coding=utf-8
+"""解析返回xml使用的后端,以及生成请求xml使用的XmlWriter
+
+解析默认使用标准库的ElementTree,安装了lxml时可以切换为lxml.
+lxml解析更快,但是遍历节点时需要为每个节点创建python对象,转换为dict的整体耗时反而比ElementTree长,
+因此默认不使用;环境变量COS_XML_BACKEND可以指定为lxml或xml.etree,也可以调用set_xml_backend切换
+"""
+
+import numbers
+import os
+import threading
+from six import text_type, binary_type
+
+try:
+    import xml.etree.cElementTree as _etree  # python2中使用C实现
+except ImportError:
+    import xml.etree.ElementTree as _etree
+
+try:
+    from lxml import etree as _lxml
+except ImportError:
+    _lxml = None
+
+
+def _to_bytes(data):
+    """lxml不接受带encoding声明的unicode字符串,统一转为utf-8编码"""
+    if isinstance(data, text_type):
+        return data.encode('utf-8')
+    return data
+
+
+class EtreeBackend(object):
+    name = 'xml.etree'
+
+    def fromstring(self, data):
+        return _etree.fromstring(_to_bytes(data))
+
+    def iterparse(self, source, events=('end',)):
+        return _etree.iterparse(source, events)
+
+
+class LxmlBackend(object):
+    name = 'lxml'
+
+    def __init__(self):
+        self._local = threading.local()  # lxml的parser不能在多个线程中同时使用
+
+    def _parser(self):
+        parser = getattr(self._local, 'parser', None)
+        if parser is None:
+            parser = self._local.parser = _lxml.XMLParser(
+                remove_comments=True, remove_pis=True, resolve_entities=False, no_network=True)
+        return parser
+
+    def fromstring(self, data):
+        return _lxml.fromstring(_to_bytes(data), self._parser())
+
+    def iterparse(self, source, events=('end',)):
+        return _lxml.iterparse(source, events=events, remove_comments=True, remove_pis=True, resolve_entities=False, no_network=True)
+
+
+_backends = {EtreeBackend.name: EtreeBackend}
+if _lxml is not None:
+    _backends[LxmlBackend.name] = LxmlBackend
+_backend = None
+
+
+def set_xml_backend(name):
+    """切换解析xml使用的后端
+
+    :param name(string): 'lxml'|'xml.etree'.
+    """
+    global _backend
+    if name not in _backends:
+        raise ValueError('xml backend {0} is not available'.format(name))
+    _backend = _backends[name]()
+
+
+def get_xml_backend():
+    """当前使用的后端名称"""
+    return _backend.name
+
+
+def fromstring(data):
+    return _backend.fromstring(data)
+
+
+def iterparse(source, events=('end',)):
+    """增量解析,默认只返回end事件"""
+    return _backend.iterparse(source, events)
+
+
+def local_name(tag):
+    """去掉节点名称中的命名空间"""
+    return tag[tag.find('}') + 1:]
+
+
+def find_texts(root, names):
+    """获取root下每个名称第一次出现的节点的文本,不区分命名空间
+
+    :param root(Element): 根节点.
+    :param names(list): 节点名称.
+    :return(dict): 名称到文本的映射,不存在的名称不包含在结果中.
+    """
+    texts = dict()
+    for element in root.iter():
+        if element is root:
+            continue
+        name = local_name(element.tag)
+        if name in names and name not in texts:
+            texts[name] = element.text
+    return texts
+
+
+set_xml_backend(os.environ.get('COS_XML_BACKEND') or EtreeBackend.name)
+
+
+XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8" ?>'
+
+_ESCAPES = (('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&apos;'))
+
+
+def escape(text):
+    """转义xml文本中的特殊字符,不含特殊字符时直接返回"""
+    for char, entity in _ESCAPES:
+        if char in text:
+            text = text.replace(char, entity)
+    return text
+
+
+def to_text(value):
+    """将节点的值转换为文本,bool转换为true/false,None转换为空"""
+    if isinstance(value, text_type):
+        return value
+    if isinstance(value, bool):
+        return u'true' if value else u'false'
+    if value is None:
+        return u''
+    if isinstance(value, binary_type):
+        return value.decode('utf-8')
+    if isinstance(value, numbers.Number):
+        return text_type(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError('unsupported xml value type: {0}'.format(type(value).__name__))
+
+
+class XmlWriter(object):
+    """将请求的xml直接写入bytearray,不构造中间的节点对象
+
+    .. code-block:: python
+
+        writer = XmlWriter('Delete')
+        writer.element('Quiet', 'true')
+        for key in keys:
+            writer.start('Object')
+            writer.element('Key', key)
+            writer.end('Object')
+        body = writer.finish()
+    """
+    def __init__(self, root):
+        """
+        :param root(string): 根节点名称.
+        """
+        self._root = root
+        self._tags = dict()  # 节点名称到编码后的开始,结束标签的缓存
+        self._buf = bytearray(XML_DECLARATION)
+        self.start(root)
+
+    def _tag(self, tag):
+        tags = self._tags.get(tag)
+        if tags is None:
+            name = tag.encode('utf-8') if isinstance(tag, text_type) else tag
+            tags = self._tags[tag] = (b'<' + name + b'>', b'</' + name + b'>')
+        return tags
+
+    def start(self, tag):
+        self._buf += self._tag(tag)[0]
+
+    def end(self, tag):
+        self._buf += self._tag(tag)[1]
+
+    def text(self, value):
+        """写入转义后的文本"""
+        self._buf += escape(to_text(value)).encode('utf-8')
+
+    def element(self, tag, value):
+        """写入只包含文本的节点"""
+        start, end = self._tag(tag)
+        buf = self._buf
+        buf += start
+        buf += escape(to_text(value)).encode('utf-8')
+        buf += end
+
+    def value(self, tag, value, list_tags=(), parent_child=False):
+        """按dict的结构写入节点
+
+        :param tag(string): 节点名称.
+        :param value: 节点的值,dict的每个key为一个子节点,list的每个元素为一个节点.
+        :param list_tags(set): 值为list时不额外包一层父节点的节点名称,list的每个元素直接作为一个同名节点.
+        :param parent_child(bool): 值为list时父节点名称为tag,子节点名称为tag去掉最后一个字符.
+        """
+        if isinstance(value, dict):
+            self.start(tag)
+            for k, v in value.items():
+                self.value(k, v, list_tags, parent_child)
+            self.end(tag)
+        elif isinstance(value, (list, tuple, set)):
+            if parent_child:
+                self.start(tag)
+                for item in value:
+                    self.value(tag[:-1], item, list_tags, parent_child)
+                self.end(tag)
+            elif tag in list_tags:
+                if not value:
+                    self.element(tag, None)
+                for item in value:
+                    self.value(tag, item, list_tags, parent_child)
+            else:
+                self.start(tag)
+                for item in value:
+                    self.value(tag, item, list_tags, parent_child)
+                self.end(tag)
+        else:
+            self.element(tag, value)
+
+    def finish(self):
+        """结束根节点并返回xml
+
+        :return(bytes): utf-8编码的xml.
+        """
+        self.end(self._root)
+        return bytes(self._buf)
@@ -1,16 +1,32 @@
 # -*- coding=utf-8
 import os
 import uuid
+from .cos_ratelimit import ThrottledStream, throttled_iter
 
 
 class StreamBody():
-    def __init__(self, rt):
+    def __init__(self, rt, rate_limiter=None):
         self._rt = rt
+        self._rate_limiter = rate_limiter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """关闭响应,body已经读完时连接放回连接池,没有读完时断开连接"""
+        self._rt.close()
 
     def get_raw_stream(self):
+        if self._rate_limiter is not None:
+            return ThrottledStream(self._rt.raw, self._rate_limiter)
         return self._rt.raw
 
     def get_stream(self, chunk_size=1024):
+        if self._rate_limiter is not None:
+            return throttled_iter(self._rt.iter_content(chunk_size=chunk_size), self._rate_limiter)
         return self._rt.iter_content(chunk_size=chunk_size)
 
     def get_stream_to_file(self, file_name, auto_decompress=False):
@@ -29,13 +45,14 @@ class StreamBody():
         tmp_file_name = "{file_name}_{uuid}".format(file_name=file_name, uuid=uuid.uuid4().hex)
         with open(tmp_file_name, 'wb') as fp:
             if use_encoding and not auto_decompress:
-                chunk = self._rt.raw.read(1024)
+                raw = self.get_raw_stream()
+                chunk = raw.read(1024)
                 while chunk:
                     file_len += len(chunk)
                     fp.write(chunk)
-                    chunk = self._rt.raw.read(1024)
+                    chunk = raw.read(1024)
             else:
-                for chunk in self._rt.iter_content(chunk_size=1024):
+                for chunk in self.get_stream(chunk_size=1024):
                     if chunk:
                         file_len += len(chunk)
                         fp.write(chunk)
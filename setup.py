@@ -24,5 +24,9 @@ setup(
     description='cos-python-sdk-v5',
     long_description=long_description(),
     packages=find_packages(),
-    install_requires=requirements()
+    install_requires=requirements(),
+    extras_require={
+        'async': ['aiohttp'],
+        'lxml': ['lxml']
+    }
 )
@@ -0,0 +1,454 @@
+# -*- coding=utf-8
+"""SDK性能基准测试,使用本地模拟的COS服务,不依赖真实的存储桶
+
+用法: python ut/benchmark.py [case ...],不指定case时运行全部
+
+xml_writer中与优化前dicttoxml实现的对比需要另外安装dicttoxml(pip install dicttoxml),SDK本身不再依赖它,未安装时跳过这部分对比
+"""
+import sys
+import time
+import requests
+try:
+    from dicttoxml import dicttoxml
+except ImportError:
+    dicttoxml = None
+from cos_stub_server import StubServer
+from qcloud_cos import CosConfig
+from qcloud_cos import CosS3Client
+from qcloud_cos.cos_threadpool import SimpleThreadPool
+
+test_bucket = 'cos-python-v5-bench-1250000000'
+cases = []
+
+
+def case(func):
+    cases.append(func)
+    return func
+
+
+def make_config(server, **kwargs):
+    return CosConfig(
+        Region='ap-guangzhou',
+        SecretId='SECRET_ID',
+        SecretKey='SECRET_KEY',
+        Scheme='http',
+        IP='127.0.0.1',
+        Port=server.port,
+        **kwargs
+    )
+
+
+def report(name, count, cost, unit='req/s'):
+    value = cost * 1000000 / count if unit == 'us/req' else count / cost  # us/req输出单次调用的耗时
+    print('{name:<48} {value:>12.1f} {unit} ({count} in {cost:.2f}s)'.format(
+        name=name, value=value, unit=unit, count=count, cost=cost))
+
+
+@case
+def async_vs_threaded(requests_num=2000, concurrency=64):
+    """同样的并发度下,线程池+CosS3Client与AsyncCosS3Client的每秒请求数"""
+    server = StubServer().start()
+    conf = make_config(server)
+    client = CosS3Client(conf)
+    client.put_object(Bucket=test_bucket, Body=b'x' * 1024, Key='bench')
+
+    for op in ('head_object', 'get_object'):
+        pool = SimpleThreadPool(concurrency)
+        start = time.time()
+        for i in range(requests_num):
+            if op == 'head_object':
+                pool.add_task(client.head_object, Bucket=test_bucket, Key='bench')
+            else:
+                pool.add_task(lambda: client.get_object(Bucket=test_bucket, Key='bench')['Body'].get_raw_stream().read())
+        pool.wait_completion()
+        report('threaded %s x%d' % (op, concurrency), requests_num, time.time() - start)
+
+    if sys.version_info < (3, 5):
+        server.stop()
+        return
+    import asyncio
+    from qcloud_cos.cos_async_client import AsyncCosS3Client
+
+    async def run(op):
+        sem = asyncio.Semaphore(concurrency)
+        async with AsyncCosS3Client(conf) as async_client:
+            async def one():
+                async with sem:
+                    if op == 'head_object':
+                        await async_client.head_object(Bucket=test_bucket, Key='bench')
+                    else:
+                        rt = await async_client.get_object(Bucket=test_bucket, Key='bench')
+                        await rt['Body'].read()
+            start = time.time()
+            await asyncio.gather(*[one() for i in range(requests_num)])
+            report('asyncio %s x%d' % (op, concurrency), requests_num, time.time() - start)
+
+    loop = asyncio.new_event_loop()
+    for op in ('head_object', 'get_object'):
+        loop.run_until_complete(run(op))
+    loop.close()
+    server.stop()
+
+
+@case
+def metrics_overhead(requests_num=3000):
+    """串行head_object,对比不注册hook和开启MetricsRegistry时的每秒请求数"""
+    server = StubServer().start()
+    client = CosS3Client(make_config(server))
+    client.put_object(Bucket=test_bucket, Body=b'x', Key='bench')
+    for name in ('no hooks', 'metrics enabled'):
+        if name == 'metrics enabled':
+            client.enable_metrics()
+        start = time.time()
+        for i in range(requests_num):
+            client.head_object(Bucket=test_bucket, Key='bench')
+        report('head_object, %s' % name, requests_num, time.time() - start)
+    server.stop()
+
+
+class LocalSession(requests.Session):
+    """不发起网络请求的session,只构造请求并签名,用于统计SDK自身的开销"""
+    def request(self, method, url, data=None, headers=None, auth=None, **kwargs):
+        requests.Request(method, url, data=data, headers=headers, auth=auth).prepare()
+        res = requests.Response()
+        res.status_code = 200
+        res.headers['ETag'] = '"bench"'
+        res._content = b''
+        return res
+
+
+@case
+def request_overhead(requests_num=20000):
+    """不发送请求时,构造url,headers并签名的单次调用耗时(us)"""
+    conf = CosConfig(Region='ap-guangzhou', SecretId='SECRET_ID', SecretKey='SECRET_KEY')
+    client = CosS3Client(conf, session=LocalSession())
+    start = time.time()
+    for i in range(requests_num):
+        conf.uri(bucket=test_bucket, path='bench')
+    report('CosConfig.uri', requests_num, time.time() - start, 'us/req')
+    for op in ('head_object', 'put_object', 'get_object'):
+        start = time.time()
+        for i in range(requests_num):
+            if op == 'put_object':
+                client.put_object(Bucket=test_bucket, Body=b'x', Key='bench')
+            else:
+                getattr(client, op)(Bucket=test_bucket, Key='bench')
+        report(op, requests_num, time.time() - start, 'us/req')
+
+
+@case
+def sign_throughput(requests_num=50000):
+    """每秒可以计算的签名数,对比构造Request签名,每次重新计算sign_key和复用sign_key"""
+    from requests import Request
+    from qcloud_cos.cos_auth import CosS3Auth, CosSigner
+    conf = CosConfig(Region='ap-guangzhou', SecretId='SECRET_ID', SecretKey='SECRET_KEY')
+    client = CosS3Client(conf)
+    headers = {'Host': conf.get_host(test_bucket), 'Content-Type': 'text/plain', 'x-cos-meta-a': 'b'}
+    start = time.time()
+    for i in range(requests_num):
+        CosS3Auth(conf, 'bench')(Request('PUT', 'http://localhost/bench', headers=dict(headers)))
+    report('CosS3Auth with Request', requests_num, time.time() - start, 'sig/s')
+    start = time.time()
+    for i in range(requests_num):
+        client.get_auth('PUT', test_bucket, 'bench', Headers=headers)
+    report('get_auth', requests_num, time.time() - start, 'sig/s')
+    for window in (0, 600):
+        signer = CosSigner('SECRET_ID', 'SECRET_KEY', key_time_window=window)
+        name = 'CosSigner.sign, %s' % ('new sign_key per second' if window == 0 else 'sign_key reused')
+        start = time.time()
+        for i in range(requests_num):
+            signer.sign('PUT', 'bench', headers=headers)
+        report(name, requests_num, time.time() - start, 'sig/s')
+
+
+@case
+def presigned_urls(keys_num=1000000):
+    """批量生成预签名url的速度,对比逐个调用get_presigned_url"""
+    conf = CosConfig(Region='ap-guangzhou', SecretId='SECRET_ID', SecretKey='SECRET_KEY')
+    client = CosS3Client(conf)
+    keys = ['media/%08d.mp4' % i for i in range(keys_num)]
+    start = time.time()
+    for key in keys:
+        client.get_presigned_download_url(test_bucket, key)
+    report('get_presigned_download_url', keys_num, time.time() - start, 'url/s')
+    start = time.time()
+    for url in client.get_presigned_urls(test_bucket, keys):
+        pass
+    report('get_presigned_urls', keys_num, time.time() - start, 'url/s')
+
+
+def legacy_xml_to_dict(data):
+    """优化前的xml_to_dict,转换为字符串后eval"""
+    import xml.etree.ElementTree
+    from qcloud_cos.xml2dict import Xml2Dict
+    from qcloud_cos.cos_comm import XML_NAMESPACES
+    xmlstr = str(Xml2Dict(xml.etree.ElementTree.fromstring(data)))
+    for ns in XML_NAMESPACES:
+        xmlstr = xmlstr.replace(ns, "")
+    return eval(xmlstr)
+
+
+def make_list_responses(entries=1000):
+    """构造list_objects,list_parts和list_multipart_uploads返回的xml"""
+    head = '<?xml version="1.0" encoding="UTF-8"?><{0} xmlns="http://www.qcloud.com/document/product/436/7751">'
+    owner = '<Owner><ID>1250000000</ID><DisplayName>1250000000</DisplayName></Owner>'
+    objects = head.format('ListBucketResult') + (
+        '<Name>%s</Name><Prefix></Prefix><Marker></Marker><MaxKeys>1000</MaxKeys><Delimiter></Delimiter>'
+        '<IsTruncated>true</IsTruncated><NextMarker>dir/%08d.jpg</NextMarker>' % (test_bucket, entries - 1))
+    objects += ''.join(['<Contents><Key>dir/%08d.jpg</Key><LastModified>2020-01-01T00:00:00.000Z</LastModified>'
+                        '<ETag>&quot;d41d8cd98f00b204e9800998ecf8427e&quot;</ETag><Size>%d</Size>%s'
+                        '<StorageClass>STANDARD</StorageClass></Contents>' % (i, i * 1024, owner) for i in range(entries)])
+    objects += '</ListBucketResult>'
+    parts = head.format('ListPartsResult') + (
+        '<Bucket>%s</Bucket><Encoding-type>url</Encoding-type><Key>big</Key><UploadId>1585130821cbb7df1d</UploadId>'
+        '%s%s<PartNumberMarker>0</PartNumberMarker><NextPartNumberMarker>%d</NextPartNumberMarker>'
+        '<StorageClass>Standard</StorageClass><MaxParts>1000</MaxParts><IsTruncated>false</IsTruncated>' % (
+            test_bucket, owner.replace('Owner', 'Initiator'), owner, entries))
+    parts += ''.join(['<Part><PartNumber>%d</PartNumber><LastModified>2020-01-01T00:00:00.000Z</LastModified>'
+                      '<ETag>&quot;d41d8cd98f00b204e9800998ecf8427e&quot;</ETag><Size>1048576</Size></Part>' % (i + 1) for i in range(entries)])
+    parts += '</ListPartsResult>'
+    uploads = head.format('ListMultipartUploadsResult') + (
+        '<Bucket>%s</Bucket><Encoding-Type></Encoding-Type><KeyMarker></KeyMarker><UploadIdMarker></UploadIdMarker>'
+        '<NextKeyMarker></NextKeyMarker><NextUploadIdMarker></NextUploadIdMarker><MaxUploads>1000</MaxUploads>'
+        '<IsTruncated>false</IsTruncated><Prefix></Prefix><Delimiter></Delimiter>' % test_bucket)
+    uploads += ''.join(['<Upload><Key>big/%08d</Key><UploadId>1585130821cbb7df1d%08d</UploadId><StorageClass>Standard</StorageClass>'
+                        '%s%s<Initiated>2020-01-01T00:00:00.000Z</Initiated></Upload>' % (i, i, owner.replace('Owner', 'Initiator'), owner)
+                        for i in range(entries)])
+    uploads += '</ListMultipartUploadsResult>'
+    return [('list_objects', objects.encode('utf-8')), ('list_parts', parts.encode('utf-8')),
+            ('list_multipart_uploads', uploads.encode('utf-8'))]
+
+
+def make_config_responses():
+    """构造get_bucket_acl,get_bucket_cors,get_bucket_lifecycle以及错误信息的xml"""
+    ns = 'xmlns="http://www.qcloud.com/document/product/436/7751"'
+    grant = ('<Grant><Grantee xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:type="CanonicalUser">'
+             '<ID>qcs::cam::uin/100000000001:uin/100000000001</ID><DisplayName>qcs::cam::uin/100000000001:uin/100000000001</DisplayName>'
+             '</Grantee><Permission>FULL_CONTROL</Permission></Grant>')
+    acl = ('<AccessControlPolicy %s><Owner><ID>qcs::cam::uin/100000000001:uin/100000000001</ID>'
+           '<DisplayName>qcs::cam::uin/100000000001:uin/100000000001</DisplayName></Owner>'
+           '<AccessControlList>%s</AccessControlList></AccessControlPolicy>' % (ns, grant * 10))
+    rule = ('<CORSRule><ID>%d</ID><AllowedOrigin>http://www.qq.com</AllowedOrigin><AllowedMethod>GET</AllowedMethod>'
+            '<AllowedMethod>PUT</AllowedMethod><AllowedHeader>x-cos-meta-test</AllowedHeader><ExposeHeader>x-cos-meta-test1</ExposeHeader>'
+            '<MaxAgeSeconds>500</MaxAgeSeconds></CORSRule>')
+    cors = '<CORSConfiguration %s>%s</CORSConfiguration>' % (ns, ''.join([rule % i for i in range(20)]))
+    rule = ('<Rule><ID>%d</ID><Filter><Prefix>logs/%d/</Prefix></Filter><Status>Enabled</Status>'
+            '<Transition><Days>30</Days><StorageClass>STANDARD_IA</StorageClass></Transition>'
+            '<Expiration><Days>365</Days></Expiration></Rule>')
+    lifecycle = '<LifecycleConfiguration %s>%s</LifecycleConfiguration>' % (ns, ''.join([rule % (i, i) for i in range(50)]))
+    error = ('<?xml version="1.0" encoding="UTF-8"?><Error><Code>NoSuchKey</Code><Message>The specified key does not exist.</Message>'
+             '<Resource>%s.cos.ap-guangzhou.myqcloud.com/test</Resource><RequestId>NWU5MjQ2OTNfMzFiNjBiMGFfNzNhM18yNTEwY2Y=</RequestId>'
+             '<TraceId>OGVmYzZiMmQzYjA2OWNhODk0NTRkMTBiOWVmMDAxODc0OWRkZjk0ZDM1NmI1M2E2MTRlY2MzZDhmNmI5MWI1OTBjYzE4NTk=</TraceId></Error>' % test_bucket)
+    return [('get_bucket_acl', acl.encode('utf-8')), ('get_bucket_cors', cors.encode('utf-8')),
+            ('get_bucket_lifecycle', lifecycle.encode('utf-8')), ('error', error)]
+
+
+@case
+def xml_backends(seconds=0.5):
+    """每种返回结果在各个xml后端下的解析速度"""
+    from qcloud_cos import cos_xml
+    from qcloud_cos.cos_comm import xml_to_dict
+    from qcloud_cos.cos_exception import digest_xml
+    from qcloud_cos.cos_xml import LxmlBackend
+
+    def run(name, func):
+        count = 0
+        start = time.time()
+        while time.time() - start < seconds:
+            func()
+            count += 1
+        report(name, count, time.time() - start, 'op/s')
+
+    backends = ['xml.etree'] + (['lxml'] if cos_xml._lxml is not None else [])
+    current = cos_xml.get_xml_backend()
+    try:
+        for name, data in make_list_responses() + make_config_responses():
+            parse = digest_xml if name == 'error' else xml_to_dict
+            results = []
+            for backend in backends:
+                cos_xml.set_xml_backend(backend)
+                results.append(parse(data))
+                run('parse %s, %s' % (name, backend), lambda: parse(data))
+            assert all([r == results[0] for r in results])
+    finally:
+        cos_xml.set_xml_backend(current)
+
+
+def legacy_dict_to_xml(data):
+    """优化前的dict_to_xml,通过minidom构造节点"""
+    import xml.dom.minidom
+    doc = xml.dom.minidom.Document()
+    root = doc.createElement('CompleteMultipartUpload')
+    doc.appendChild(root)
+    for i in data['Part']:
+        node = doc.createElement('Part')
+        for name in ('PartNumber', 'ETag'):
+            child = doc.createElement(name)
+            child.appendChild(doc.createTextNode(str(i[name])))
+            node.appendChild(child)
+        root.appendChild(node)
+    return doc.toxml('utf-8')
+
+
+def legacy_format_xml(data, root, lst=list(), parent_child=False):
+    """优化前的format_xml,通过dicttoxml转换后替换重复的标签"""
+    item_func = (lambda x: x[:-1]) if parent_child else (lambda x: x)
+    xml_config = dicttoxml(data, item_func=item_func, custom_root=root, attr_type=False)
+    for i in lst:
+        xml_config = xml_config.replace(i.encode('utf-8') * 2, i.encode('utf-8'))
+    return xml_config
+
+
+@case
+def xml_writer(seconds=0.5):
+    """请求body的序列化速度,对比优化前的minidom和dicttoxml"""
+    from qcloud_cos.cos_comm import format_xml, dict_to_xml
+
+    def run(name, func):
+        count = 0
+        start = time.time()
+        while time.time() - start < seconds:
+            func()
+            count += 1
+        report(name, count, time.time() - start, 'op/s')
+
+    parts = {'Part': [{'PartNumber': i + 1, 'ETag': '"d41d8cd98f00b204e9800998ecf8427e"'} for i in range(10000)]}
+    assert dict_to_xml(parts).split(b'?>')[1] == legacy_dict_to_xml(parts).split(b'?>')[1]
+    run('complete_multipart_upload 10000 parts, minidom', lambda: legacy_dict_to_xml(parts))
+    run('complete_multipart_upload 10000 parts, XmlWriter', lambda: dict_to_xml(parts))
+
+    delete = {'Object': [{'Key': 'dir/%08d' % i} for i in range(1000)], 'Quiet': 'true'}
+    cors = {'CORSRule': [{'ID': str(i), 'AllowedOrigin': ['http://www.qq.com'], 'AllowedMethod': ['GET', 'PUT'],
+                          'AllowedHeader': ['x-cos-meta-test'], 'ExposeHeader': ['x-cos-meta-test1'], 'MaxAgeSeconds': 500} for i in range(20)]}
+    cors_lst = ['<CORSRule>', '</CORSRule>', '<AllowedOrigin>', '</AllowedOrigin>', '<AllowedMethod>', '</AllowedMethod>',
+                '<AllowedHeader>', '</AllowedHeader>', '<ExposeHeader>', '</ExposeHeader>']
+    if dicttoxml is None:
+        print('dicttoxml is not installed, skip comparing with the legacy format_xml (pip install dicttoxml)')
+    for name, kwargs in (('delete_objects 1000 keys', dict(data=delete, root='Delete', lst=['<Object>', '</Object>'])),
+                         ('put_bucket_cors 20 rules', dict(data=cors, root='CORSConfiguration', lst=cors_lst))):
+        if dicttoxml is not None:
+            assert format_xml(**kwargs) == legacy_format_xml(**kwargs)
+            run('%s, dicttoxml' % name, lambda: legacy_format_xml(**kwargs))
+        run('%s, XmlWriter' % name, lambda: format_xml(**kwargs))
+
+
+@case
+def xml_parse(pages=50):
+    """解析1000条记录的列举结果,对比优化前通过str()和eval()转换的方式"""
+    from qcloud_cos.cos_comm import xml_to_dict
+    for name, data in make_list_responses():
+        assert xml_to_dict(data) == legacy_xml_to_dict(data)
+        for func, label in ((legacy_xml_to_dict, 'eval'), (xml_to_dict, 'direct')):
+            start = time.time()
+            for i in range(pages):
+                func(data)
+            report('%s, %s' % (name, label), pages, time.time() - start, 'page/s')
+
+
+@case
+def list_stream(pages=50, keys_num=1000):
+    """列举1000个文件的一页,对比list_objects构造完整dict和list_objects_stream流式解析"""
+    server = StubServer().start()
+    client = CosS3Client(make_config(server))
+    client.put_object(Bucket=test_bucket, Body=b'', Key='dir/%08d' % 0)
+    objects = server.buckets[test_bucket].objects
+    for i in range(1, keys_num):
+        objects['dir/%08d' % i] = objects['dir/%08d' % 0]
+    for name in ('list_objects', 'list_objects_stream'):
+        first = 0
+        start = time.time()
+        for i in range(pages):
+            page_start = time.time()
+            if name == 'list_objects':
+                items = iter(client.list_objects(Bucket=test_bucket)['Contents'])
+            else:
+                items = iter(client.list_objects_stream(Bucket=test_bucket))
+            next(items)
+            first += time.time() - page_start  # 拿到第一个文件的耗时
+            for item in items:
+                pass
+        report(name, pages * keys_num, time.time() - start, 'key/s')
+        report(name + ', first key', pages, first, 'us/req')
+    server.stop()
+
+
+@case
+def listing_memory(keys_num=1000000):
+    """保存整个存储桶的列举结果占用的内存,对比list_objects返回的dict列表和ObjectListing"""
+    if sys.version_info < (3, 4):
+        return
+    import tracemalloc
+    from qcloud_cos import ObjectListing
+    from qcloud_cos.cos_listing import ObjectRecord
+
+    def records():
+        for i in range(keys_num):
+            yield ObjectRecord(u'logs/2020/%08d.log' % i, i % 100000, '"d41d8cd98f00b204e9800998ecf8427e"',
+                               '2020-01-%02dT00:00:00.000Z' % (i % 28 + 1), 'STANDARD')
+
+    tracemalloc.start()
+    contents = [{'Key': r.key, 'Size': str(r.size), 'ETag': r.etag, 'LastModified': r.last_modified, 'StorageClass': r.storage_class,
+                 'Owner': {'ID': '1250000000', 'DisplayName': '1250000000'}} for r in records()]
+    print('{0:<48} {1:>12.1f} bytes/key'.format('list of dicts', tracemalloc.get_traced_memory()[0] / float(keys_num)))
+    del contents
+    tracemalloc.stop()
+    tracemalloc.start()
+    listing = ObjectListing()
+    listing.extend(records())
+    print('{0:<48} {1:>12.1f} bytes/key'.format('ObjectListing', tracemalloc.get_traced_memory()[0] / float(keys_num)))
+    tracemalloc.stop()
+    start = time.time()
+    listing = ObjectListing()
+    listing.extend(records())
+    report('ObjectListing.extend', keys_num, time.time() - start, 'key/s')
+    start = time.time()
+    result = listing.filter(prefix=u'logs/2020/0005', min_size=50000)
+    report('filter prefix+size (%d matched)' % len(result), keys_num, time.time() - start, 'key/s')
+    start = time.time()
+    listing.sort(by='size', reverse=True)
+    report('sort by size', keys_num, time.time() - start, 'key/s')
+
+
+@case
+def lazy_response(requests_num=200, keys_num=1000):
+    """调用list_objects但不读取结果时,LazyResponse省去的解析耗时"""
+    server = StubServer().start()
+    client = CosS3Client(make_config(server))
+    client.put_object(Bucket=test_bucket, Body=b'', Key='dir/%08d' % 0)
+    objects = server.buckets[test_bucket].objects
+    for i in range(1, keys_num):
+        objects['dir/%08d' % i] = objects['dir/%08d' % 0]
+    lazy_client = CosS3Client(make_config(server, LazyResponse=True))
+    for name, c in (('eager', client), ('LazyResponse', lazy_client)):
+        start = time.time()
+        for i in range(requests_num):
+            c.list_objects(Bucket=test_bucket)
+        report('list_objects %d keys, %s' % (keys_num, name), requests_num, time.time() - start)
+    server.stop()
+
+
+@case
+def paginator(pages=10, keys_num=200, rtt=0.02, work=0.02):
+    """自动翻页列举,每次请求和每页的处理各耗时20ms,对比不同的预取页数"""
+    server = StubServer().start()
+    client = CosS3Client(make_config(server))
+    client.put_object(Bucket=test_bucket, Body=b'', Key='dir/%08d' % 0)
+    objects = server.buckets[test_bucket].objects
+    for i in range(1, pages * keys_num):
+        objects['dir/%08d' % i] = objects['dir/%08d' % 0]
+    server.delay = rtt
+    for prefetch in (0, 1, 2):
+        start = time.time()
+        for page in client.paginate('list_objects', Bucket=test_bucket, MaxKeys=keys_num, Prefetch=prefetch):
+            assert len(page['Contents']) == keys_num
+            time.sleep(work)  # 调用方处理这一页
+        report('list_objects %d pages, Prefetch=%d' % (pages, prefetch), pages, time.time() - start, 'page/s')
+    server.stop()
+
+
+if __name__ == '__main__':
+    selected = sys.argv[1:]
+    for func in cases:
+        if not selected or func.__name__ in selected:
+            print('== ' + func.__name__ + ': ' + func.__doc__)
+            func()
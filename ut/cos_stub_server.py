@@ -0,0 +1,259 @@
+# -*- coding=utf-8
+"""本地模拟的COS服务,只实现SDK测试需要的接口,用于离线测试和性能对比"""
+import hashlib
+import threading
+import time
+import uuid
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib.parse import urlparse, parse_qs, quote, unquote
+from xml.sax.saxutils import escape
+import xml.etree.ElementTree
+
+XMLNS = 'http://www.qcloud.com/document/product/436/7751'
+FAULT_CODES = {403: 'AccessDenied', 404: 'NoSuchKey', 503: 'SlowDown'}
+
+
+class _Bucket(object):
+    def __init__(self):
+        self.objects = dict()   # key -> (data, headers)
+        self.uploads = dict()   # uploadid -> (key, {part_num: data})
+
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # 响应头和body分两次写入,避免小响应等待延迟确认
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.on_connection()
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            data = b''
+            while True:
+                size = int(self.rfile.readline().strip().split(b';')[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return data
+                data += self.rfile.read(size)
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else b''
+
+    def _reply(self, status, body=b'', headers=None):
+        self.send_response(status)
+        headers = dict(headers or {})
+        length = headers.pop('Content-Length', '0')
+        for k in headers:
+            self.send_header(k, headers[k])
+        self.send_header('x-cos-request-id', uuid.uuid4().hex)
+        if self.command == 'HEAD':
+            self.send_header('Content-Length', length)
+            self.end_headers()
+            return
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, code):
+        body = ('<?xml version="1.0" encoding="UTF-8"?><Error><Code>{code}</Code><Message>{code}</Message>'
+                '<Resource>{res}</Resource><RequestId>stub</RequestId><TraceId>stub</TraceId></Error>').format(code=code, res=escape(self.path))
+        self._reply(status, body.encode('utf-8'), {'Content-Type': 'application/xml'})
+
+    def _xml(self, root, inner):
+        body = u'<?xml version="1.0" encoding="UTF-8"?><{root} xmlns="{ns}">{inner}</{root}>'.format(root=root, ns=XMLNS, inner=inner)
+        self._reply(200, body.encode('utf-8'), {'Content-Type': 'application/xml'})
+
+    def _dispatch(self):
+        server = self.server
+        server.on_request(self)
+        url = urlparse(self.path)
+        params = dict((k, v[0]) for k, v in parse_qs(url.query, keep_blank_values=True).items())
+        key = unquote(url.path[1:])
+        bucket_name = self.headers.get('Host', '').split('.')[0]
+        body = self._read_body() if self.command in ('PUT', 'POST') else b''
+        server.received.append((self.command, key, params, len(body)))
+        delay = server.delay
+        with server.lock:
+            if server.delays:
+                delay = server.delays.pop(0)
+        if delay:
+            time.sleep(delay)
+        with server.lock:
+            if server.faults:
+                fault = server.faults.pop(0)
+                if fault == 'reset':
+                    self.close_connection = True
+                    self.connection.close()
+                    return
+                if fault is not None:
+                    return self._error(fault, FAULT_CODES.get(fault, 'InternalError'))
+        if not self.headers.get('Authorization') and 'q-signature' not in params and not server.anonymous:
+            return self._error(403, 'AccessDenied')
+        bucket = server.buckets.setdefault(bucket_name, _Bucket())
+        if key:
+            return self._object(bucket, key, params, body)
+        return self._bucket(bucket, params, body)
+
+    def _object(self, bucket, key, params, body):
+        if self.command == 'PUT' and 'partNumber' in params:
+            if params['uploadId'] not in bucket.uploads:
+                return self._error(404, 'NoSuchUpload')
+            bucket.uploads[params['uploadId']][1][int(params['partNumber'])] = body
+            return self._reply(200, headers={'ETag': '"%s"' % hashlib.md5(body).hexdigest()})
+        if self.command == 'PUT':
+            headers = dict((k, v) for k, v in self.headers.items() if k.lower().startswith('x-cos-meta-'))
+            headers['Content-Type'] = self.headers.get('Content-Type', 'application/octet-stream')
+            headers['ETag'] = '"%s"' % hashlib.md5(body).hexdigest()
+            bucket.objects[key] = (body, headers)
+            return self._reply(200, headers={'ETag': headers['ETag']})
+        if self.command == 'POST' and 'uploads' in params:
+            uploadid = uuid.uuid4().hex
+            bucket.uploads[uploadid] = (key, dict())
+            return self._xml('InitiateMultipartUploadResult', u'<Bucket>b</Bucket><Key>{key}</Key><UploadId>{id}</UploadId>'.format(
+                key=escape(key), id=uploadid))
+        if self.command == 'POST' and 'uploadId' in params:
+            if params['uploadId'] not in bucket.uploads:
+                return self._error(404, 'NoSuchUpload')
+            upload_key, parts = bucket.uploads.pop(params['uploadId'])
+            root = xml.etree.ElementTree.fromstring(body)
+            numbers = [int(p.find('PartNumber').text) for p in root.findall('Part')]
+            data = b''.join(parts[n] for n in numbers)
+            etag = '"%s-%d"' % (hashlib.md5(data).hexdigest(), len(numbers))
+            bucket.objects[upload_key] = (data, {'ETag': etag, 'Content-Type': 'application/octet-stream'})
+            return self._xml('CompleteMultipartUploadResult', u'<Location>stub</Location><Key>{key}</Key><ETag>{etag}</ETag>'.format(
+                key=escape(upload_key), etag=escape(etag)))
+        if self.command == 'DELETE' and 'uploadId' in params:
+            bucket.uploads.pop(params['uploadId'], None)
+            return self._reply(204)
+        if self.command == 'GET' and 'uploadId' in params:
+            if params['uploadId'] not in bucket.uploads:
+                return self._error(404, 'NoSuchUpload')
+            parts = bucket.uploads[params['uploadId']][1]
+            inner = u''.join(u'<Part><PartNumber>{n}</PartNumber><ETag>"{etag}"</ETag><Size>{size}</Size></Part>'.format(
+                n=n, etag=hashlib.md5(parts[n]).hexdigest(), size=len(parts[n])) for n in sorted(parts))
+            return self._xml('ListPartsResult', u'<Key>{key}</Key><UploadId>{id}</UploadId><IsTruncated>false</IsTruncated>{inner}'.format(
+                key=quote(key.encode('utf-8')), id=params['uploadId'], inner=inner))
+        if self.command == 'DELETE':
+            bucket.objects.pop(key, None)
+            return self._reply(204)
+        if key not in bucket.objects:
+            return self._error(404, 'NoSuchKey')
+        data, headers = bucket.objects[key]
+        headers = dict(headers)
+        if self.headers.get('If-Match') and self.headers['If-Match'] != headers['ETag']:
+            return self._error(412, 'PreconditionFailed')
+        if self.command == 'HEAD':
+            headers['Content-Length'] = str(len(data))
+            return self._reply(200, headers=headers)
+        if 'Range' in self.headers:
+            first, last = self.headers['Range'].split('=')[1].split('-')
+            data = data[int(first):int(last) + 1]
+            return self._reply(206, data, headers)
+        return self._reply(200, data, headers)
+
+    def _bucket(self, bucket, params, body):
+        if self.command == 'PUT' and not params:
+            return self._reply(200)
+        if self.command == 'DELETE' and not params:
+            return self._reply(204)
+        if self.command == 'HEAD':
+            return self._reply(200)
+        if self.command == 'POST' and 'delete' in params:
+            root = xml.etree.ElementTree.fromstring(body)
+            inner = u''
+            for obj in root.findall('Object'):
+                key = obj.find('Key').text
+                bucket.objects.pop(key, None)
+                inner += u'<Deleted><Key>{key}</Key></Deleted>'.format(key=escape(key))
+            return self._xml('DeleteResult', inner)
+        if self.command == 'GET' and 'uploads' in params:
+            inner = u''.join(u'<Upload><Key>{key}</Key><UploadId>{id}</UploadId></Upload>'.format(
+                key=quote(v[0].encode('utf-8')), id=k) for k, v in sorted(bucket.uploads.items()))
+            return self._xml('ListMultipartUploadsResult', u'<IsTruncated>false</IsTruncated>' + inner)
+        if self.command == 'GET':
+            prefix = params.get('prefix', '')
+            marker = params.get('marker', '')
+            max_keys = int(params.get('max-keys', 1000))
+            keys = sorted(k for k in bucket.objects if k.startswith(prefix) and k > marker)
+            common_prefixes = []
+            delimiter = params.get('delimiter', '')
+            if delimiter:
+                for k in [k for k in keys if delimiter in k[len(prefix):]]:
+                    keys.remove(k)
+                    common_prefix = k[:k.index(delimiter, len(prefix)) + len(delimiter)]
+                    if common_prefix not in common_prefixes:
+                        common_prefixes.append(common_prefix)
+            truncated = len(keys) > max_keys
+            keys = keys[:max_keys]
+            inner = u'<Name>b</Name><Prefix>{prefix}</Prefix><Marker>{marker}</Marker><MaxKeys>{max_keys}</MaxKeys><IsTruncated>{trunc}</IsTruncated>'.format(
+                prefix=quote(prefix.encode('utf-8')), marker=quote(marker.encode('utf-8')), max_keys=max_keys, trunc='true' if truncated else 'false')
+            if truncated:
+                inner += u'<NextMarker>{0}</NextMarker>'.format(quote(keys[-1].encode('utf-8')))
+            for k in keys:
+                data, headers = bucket.objects[k]
+                inner += (u'<Contents><Key>{key}</Key><LastModified>2019-01-01T00:00:00.000Z</LastModified><ETag>{etag}</ETag>'
+                          u'<Size>{size}</Size><Owner><ID>1</ID><DisplayName>1</DisplayName></Owner><StorageClass>STANDARD</StorageClass></Contents>').format(
+                    key=quote(k.encode('utf-8')), etag=escape(headers['ETag']), size=len(data))
+            for p in common_prefixes:
+                inner += u'<CommonPrefixes><Prefix>{0}</Prefix></CommonPrefixes>'.format(quote(p.encode('utf-8')))
+            return self._xml('ListBucketResult', inner)
+        return self._error(400, 'InvalidRequest')
+
+    do_GET = do_PUT = do_POST = do_DELETE = do_HEAD = _dispatch
+
+
+class StubServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """带故障注入的COS模拟服务
+
+    faults: 依次返回给后续请求的错误状态码, 'reset'表示直接断开连接, None表示正常处理
+    delay: 每个请求的处理延时,单位为s
+    delays: 依次作用于后续请求的处理延时,单位为s,优先于delay
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(self, host='127.0.0.1', port=0):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), StubHandler)
+        self.lock = threading.Lock()
+        self.buckets = dict()
+        self.faults = list()
+        self.received = list()
+        self.delay = 0
+        self.delays = list()
+        self.anonymous = False
+        self.connections = 0
+        self.requests = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def on_connection(self):
+        with self.lock:
+            self.connections += 1
+
+    def on_request(self, handler):
+        with self.lock:
+            self.requests += 1
+
+    def start(self):
+        t = threading.Thread(target=self.serve_forever)
+        t.daemon = True
+        t.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    server = StubServer(port=8080)
+    print('cos stub server listening on 127.0.0.1:%d' % server.port)
+    server.serve_forever()
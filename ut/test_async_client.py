@@ -0,0 +1,120 @@
+# -*- coding=utf-8
+import asyncio
+import os
+from cos_stub_server import StubServer
+from qcloud_cos import CosConfig
+from qcloud_cos import CosServiceError
+from qcloud_cos.cos_async_client import AsyncCosS3Client
+
+test_bucket = 'cos-python-v5-async-1250000000'
+server = None
+conf = None
+
+
+def setup_module():
+    global server, conf
+    server = StubServer().start()
+    conf = CosConfig(
+        Region='ap-guangzhou',
+        SecretId='SECRET_ID',
+        SecretKey='SECRET_KEY',
+        Scheme='http',
+        IP='127.0.0.1',
+        Port=server.port
+    )
+
+
+def teardown_module():
+    server.stop()
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_async_put_get_head_delete_object():
+    """异步简单上传下载删除"""
+    async def main():
+        async with AsyncCosS3Client(conf) as client:
+            rt = await client.put_object(Bucket=test_bucket, Body=b'hello async', Key='async/test.txt', ContentType='text/plain')
+            assert rt['ETag'] == '"49ff09a8c3bd899d190d10e9f068fb2b"'
+            rt = await client.head_object(Bucket=test_bucket, Key='async/test.txt')
+            assert rt['Content-Length'] == '11'
+            rt = await client.get_object(Bucket=test_bucket, Key='async/test.txt')
+            assert await rt['Body'].read() == b'hello async'
+            rt = await client.get_object(Bucket=test_bucket, Key='async/test.txt')
+            await rt['Body'].get_stream_to_file('async_test.local')
+            with open('async_test.local', 'rb') as fp:
+                assert fp.read() == b'hello async'
+            os.remove('async_test.local')
+            await client.delete_object(Bucket=test_bucket, Key='async/test.txt')
+            try:
+                await client.head_object(Bucket=test_bucket, Key='async/test.txt')
+                assert False
+            except CosServiceError as e:
+                assert e.get_status_code() == 404
+    run(main())
+
+
+def test_async_concurrent_list_delete_objects():
+    """异步并发上传后列出并批量删除"""
+    async def main():
+        async with AsyncCosS3Client(conf) as client:
+            await asyncio.gather(*[client.put_object(Bucket=test_bucket, Body=b'x' * i, Key='list/%03d' % i) for i in range(50)])
+            rt = await client.list_objects(Bucket=test_bucket, Prefix='list/', MaxKeys=20)
+            assert rt['IsTruncated'] == 'true'
+            assert len(rt['Contents']) == 20
+            assert rt['NextMarker'] == 'list/019'
+            rt = await client.delete_objects(Bucket=test_bucket, Delete={'Object': [{'Key': 'list/%03d' % i} for i in range(50)]})
+            assert len(rt['Deleted']) == 50
+            rt = await client.list_objects(Bucket=test_bucket, Prefix='list/')
+            assert 'Contents' not in rt
+    run(main())
+
+
+def test_async_multipart_upload():
+    """异步分块上传"""
+    async def main():
+        async with AsyncCosS3Client(conf) as client:
+            rt = await client.create_multipart_upload(Bucket=test_bucket, Key='multipart.txt')
+            uploadid = rt['UploadId']
+            parts = await asyncio.gather(*[
+                client.upload_part(Bucket=test_bucket, Key='multipart.txt', Body=str(i) * 1024, PartNumber=i, UploadId=uploadid)
+                for i in range(1, 4)])
+            rt = await client.list_parts(Bucket=test_bucket, Key='multipart.txt', UploadId=uploadid)
+            assert len(rt['Part']) == 3
+            lst = [{'PartNumber': i + 1, 'ETag': part['ETag']} for i, part in enumerate(parts)]
+            rt = await client.complete_multipart_upload(Bucket=test_bucket, Key='multipart.txt', UploadId=uploadid, MultipartUpload={'Part': lst})
+            assert 'ETag' in rt
+            rt = await client.get_object(Bucket=test_bucket, Key='multipart.txt')
+            assert await rt['Body'].read() == b'1' * 1024 + b'2' * 1024 + b'3' * 1024
+    run(main())
+
+
+def test_async_retry_on_server_error():
+    """服务端返回5xx时异步客户端重试"""
+    async def main():
+        async with AsyncCosS3Client(conf, retry=2) as client:
+            server.faults = [500, 503]
+            rt = await client.put_object(Bucket=test_bucket, Body=b'retry', Key='retry.txt')
+            assert 'ETag' in rt
+            server.faults = [500, 500, 500]
+            try:
+                await client.head_object(Bucket=test_bucket, Key='retry.txt')
+                assert False
+            except CosServiceError as e:
+                assert e.get_status_code() == 500
+    run(main())
+
+
+if __name__ == "__main__":
+    setup_module()
+    test_async_put_get_head_delete_object()
+    test_async_concurrent_list_delete_objects()
+    test_async_multipart_upload()
+    test_async_retry_on_server_error()
+    teardown_module()
@@ -0,0 +1,1036 @@
+# -*- coding=utf-8
+import os
+import io
+import time
+import pickle
+import itertools
+import requests
+from cos_stub_server import StubServer
+from qcloud_cos import CosConfig
+from qcloud_cos import CosS3Client
+from qcloud_cos import CosServiceError
+from qcloud_cos import CosClientError
+from qcloud_cos import RetryPolicy
+from qcloud_cos.cos_retry import RetryBudget
+from qcloud_cos.cos_endpoint import EndpointPool
+from qcloud_cos.cos_dns import DnsCache
+from qcloud_cos.cos_metrics import MetricsRegistry
+from qcloud_cos.cos_hedge import HedgePolicy
+from qcloud_cos.cos_timeout import TimeoutPolicy, get_transfer_size
+from qcloud_cos.cos_ratelimit import RateLimiter
+from qcloud_cos.cos_breaker import CircuitBreaker
+from qcloud_cos.cos_exception import CosCircuitOpenError
+from qcloud_cos.cos_auth import CosSigner
+
+test_bucket = 'cos-python-v5-transport-1250000000'
+server = None
+
+
+def setup_module():
+    global server
+    server = StubServer().start()
+
+
+def teardown_module():
+    server.stop()
+
+
+def make_client(**kwargs):
+    client_kwargs = dict()
+    for k in ('retry', 'session', 'retry_policy', 'hedge_policy', 'rate_limiter', 'circuit_breaker'):
+        if k in kwargs:
+            client_kwargs[k] = kwargs.pop(k)
+    kwargs.setdefault('IP', '127.0.0.1')
+    kwargs.setdefault('Port', server.port)
+    conf = CosConfig(
+        Region='ap-guangzhou',
+        SecretId='SECRET_ID',
+        SecretKey='SECRET_KEY',
+        Scheme='http',
+        **kwargs
+    )
+    return CosS3Client(conf, **client_kwargs)
+
+
+def test_connection_pool_resize_keeps_idle_connections():
+    """扩大连接池时保留已有的空闲连接,urllib3内部结构不可用时只对之后新建的连接池生效"""
+    from qcloud_cos.cos_adapter import _grow_manager
+    client = make_client(PoolMaxSize=2)
+    client.put_object(Bucket=test_bucket, Body=b'resize', Key='resize')
+    before = client.get_connection_stats()
+    assert client._adapter.resize(4)
+    assert not client._adapter.resize(3)
+    client.head_object(Bucket=test_bucket, Key='resize')
+    client.head_object(Bucket=test_bucket, Key='resize')
+    after = client.get_connection_stats()
+    assert after['pool_maxsize'] == 4
+    assert after['new_connections'] == before['new_connections']
+    assert after['reused_connections'] == before['reused_connections'] + 2
+
+    class Manager(object):
+        pools = object()
+        connection_pool_kw = {'maxsize': 2}
+    manager = Manager()
+    _grow_manager(manager, 4)
+    assert manager.connection_pool_kw['maxsize'] == 4
+
+
+def test_connection_pool_resize_for_upload_file():
+    """upload_file自动扩大连接池,并发上传时连接可以被复用"""
+    client = make_client(PoolMaxSize=2)
+    file_name = 'transport_pool_test'
+    with open(file_name, 'wb') as fp:
+        fp.write(b'x' * 1024 * 1024 * 24)
+    response = client.upload_file(Bucket=test_bucket, Key=file_name, LocalFilePath=file_name, PartSize=1, MAXThread=8)
+    os.remove(file_name)
+    assert 'ETag' in response
+    stats = client.get_connection_stats()
+    assert stats['pool_maxsize'] == 8
+    # 每个线程最多新建一个连接,加上上传前的查询请求
+    assert stats['new_connections'] <= 8 + 1
+    assert stats['reused_connections'] == stats['requests'] - stats['new_connections']
+    for i in range(10):
+        client.head_object(Bucket=test_bucket, Key=file_name)
+    assert client.get_connection_stats()['new_connections'] == stats['new_connections']
+
+
+def test_connection_stats_with_custom_session():
+    """使用自定义session时不统计连接"""
+    import requests
+    client = make_client(session=requests.session())
+    client.put_object(Bucket=test_bucket, Body=b'custom', Key='custom_session')
+    assert client.get_connection_stats() is None
+
+
+def test_retry_server_error_with_backoff():
+    """5xx和SlowDown退避后重试,统计每次调用的请求次数"""
+    client = make_client(retry_policy=RetryPolicy(max_retries=3, base_delay=0.01))
+    server.faults = [503, 500, 'reset']
+    response = client.put_object(Bucket=test_bucket, Body=b'retry', Key='retry')
+    assert 'ETag' in response
+    metrics = client.get_retry_metrics()
+    assert metrics['calls'] == 1
+    assert metrics['retries'] == 3
+    assert metrics['attempts_per_call'] == {4: 1}
+
+
+def test_no_retry_on_terminal_error():
+    """403,404等错误不重试"""
+    client = make_client(retry_policy=RetryPolicy(max_retries=3, base_delay=0.01))
+    server.faults = [403]
+    received = len(server.received)
+    try:
+        client.put_object(Bucket=test_bucket, Body=b'retry', Key='retry')
+        assert False
+    except CosServiceError as e:
+        assert e.get_status_code() == 403
+    assert len(server.received) == received + 1
+    try:
+        client.get_object(Bucket=test_bucket, Key='not_exist_key')
+        assert False
+    except CosServiceError as e:
+        assert e.get_status_code() == 404
+    assert len(server.received) == received + 2
+    assert client.get_retry_metrics()['failures'] == 2
+
+
+def test_retry_budget_exhausted():
+    """令牌桶耗尽后不再重试"""
+    policy = RetryPolicy(max_retries=5, base_delay=0.01, budget=RetryBudget(capacity=10, retry_cost=5))
+    client = make_client(retry_policy=policy)
+    server.faults = [500] * 10
+    for i in range(2):
+        try:
+            client.head_object(Bucket=test_bucket, Key='retry')
+            assert False
+        except CosServiceError as e:
+            assert e.get_status_code() == 500
+    metrics = client.get_retry_metrics()
+    # 第一次调用消耗完令牌,第二次调用不再重试
+    assert metrics['attempts_per_call'] == {3: 1, 1: 1}
+    assert metrics['budget_exhausted'] == 2
+    server.faults = []
+    client.head_object(Bucket=test_bucket, Key='retry')
+    assert client.get_retry_metrics()['budget_available'] == 1
+
+
+class NonSeekableStream(object):
+    """模拟socket等只能读取一次的流"""
+    def __init__(self, data):
+        self._fp = io.BytesIO(data)
+
+    def read(self, size=-1):
+        return self._fp.read(size)
+
+
+def test_retry_rewind_file_body():
+    """重试时文件body回退到起始位置,重新发送完整的内容"""
+    client = make_client(retry_policy=RetryPolicy(max_retries=2, base_delay=0.01))
+    body = io.BytesIO(b'header' + b'x' * 1024 * 64)
+    body.read(6)  # 从当前位置开始上传
+    server.faults = [500, 503]
+    received = len(server.received)
+    client.put_object(Bucket=test_bucket, Body=body, Key='rewind_file')
+    assert [r[3] for r in server.received[received:]] == [1024 * 64] * 3
+    response = client.get_object(Bucket=test_bucket, Key='rewind_file')
+    assert response['Body'].get_raw_stream().read() == b'x' * 1024 * 64
+
+
+def test_retry_non_seekable_body():
+    """不支持seek的流默认不重试,配置RetryBufferSize后缓存内容用于重试"""
+    data = b'y' * 1024 * 64
+    client = make_client(retry_policy=RetryPolicy(max_retries=2, base_delay=0.01))
+    server.faults = [500]
+    try:
+        client.put_object(Bucket=test_bucket, Body=NonSeekableStream(data), Key='rewind_stream')
+        assert False
+    except CosServiceError as e:
+        assert e.get_status_code() == 500
+
+    client = make_client(RetryBufferSize=1024, retry_policy=RetryPolicy(max_retries=2, base_delay=0.01))
+    server.faults = [500, 'reset']
+    received = len(server.received)
+    client.put_object(Bucket=test_bucket, Body=NonSeekableStream(data), Key='rewind_stream')
+    assert [r[3] for r in server.received[received:]] == [len(data)] * 3
+    response = client.get_object(Bucket=test_bucket, Key='rewind_stream')
+    assert response['Body'].get_raw_stream().read() == data
+
+
+def test_upload_file_part_retry():
+    """upload_file的分块直接从文件读取,重试后内容完整"""
+    client = make_client(retry_policy=RetryPolicy(max_retries=2, base_delay=0.01))
+    file_name = 'transport_part_retry_test'
+    data = os.urandom(1024 * 1024 * 3)
+    with open(file_name, 'wb') as fp:
+        fp.write(data)
+    server.faults = [None, None, 500]  # 前两个请求为查询和初始化分块上传
+    client.upload_file(Bucket=test_bucket, Key=file_name, LocalFilePath=file_name, PartSize=1, MAXThread=1, EnableMD5=True)
+    os.remove(file_name)
+    response = client.get_object(Bucket=test_bucket, Key=file_name)
+    assert response['Body'].get_raw_stream().read() == data
+
+
+def test_endpoint_pool_round_robin_and_eject():
+    """多个ip之间轮询,连续失败的ip被摘除,重试使用其他ip"""
+    backup = StubServer().start()
+    backup.buckets = server.buckets
+    try:
+        pool = EndpointPool(['127.0.0.1:%d' % server.port, '127.0.0.1:%d' % backup.port], failure_threshold=2, cooldown=60)
+        client = make_client(IP=pool, Port=None, retry_policy=RetryPolicy(max_retries=2, base_delay=0.01))
+        client.put_object(Bucket=test_bucket, Body=b'pool', Key='endpoint_pool')
+        requests = (server.requests, backup.requests)
+        for i in range(10):
+            client.head_object(Bucket=test_bucket, Key='endpoint_pool')
+        assert server.requests - requests[0] == 5
+        assert backup.requests - requests[1] == 5
+
+        backup.faults = [500] * 10
+        for i in range(6):
+            client.head_object(Bucket=test_bucket, Key='endpoint_pool')
+        stats = dict((s['address'], s) for s in client.get_endpoint_stats())
+        backup_stats = stats['127.0.0.1:%d' % backup.port]
+        assert not backup_stats['healthy']
+        assert backup_stats['failures'] == 2
+        assert backup_stats['ejections'] == 1
+        assert stats['127.0.0.1:%d' % server.port]['healthy']
+        assert len(backup.faults) == 8
+    finally:
+        backup.stop()
+
+
+def test_endpoint_pool_least_outstanding():
+    """least_outstanding策略优先选择并发请求少的ip,所有ip都被摘除时仍然可以发起请求"""
+    pool = EndpointPool(['10.0.0.1', '10.0.0.2'], strategy='least_outstanding', failure_threshold=1, default_port=80)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    pool.release(first, True, 0.01)
+    assert pool.acquire() is first
+    pool.release(second, False, 0.01)
+    pool.release(first, False, 0.01)
+    assert pool.acquire().address in ('10.0.0.1:80', '10.0.0.2:80')
+    assert first.rewrite_url('http://bucket.cos.ap-guangzhou.myqcloud.com/key?acl') == 'http://%s/key?acl' % first.address
+
+
+def test_dns_cache_prefetch_and_reuse():
+    """DnsCache预先解析存储桶域名,新建连接时使用缓存的ip"""
+    lookups = []
+
+    def resolver(host, timeout):
+        lookups.append(host)
+        return ['127.0.0.1'], 0.3
+
+    dns_cache = DnsCache(min_ttl=0, resolver=resolver)
+    for i in range(3):  # 模拟每个任务创建一个新的client
+        client = make_client(IP=None, Port=None, Endpoint='cos.stub.local:%d' % server.port, DnsCache=dns_cache,
+                             DnsPrefetchBuckets=[test_bucket])
+        client.put_object(Bucket=test_bucket, Body=b'dns', Key='dns_cache')
+    host = test_bucket + '.cos.stub.local'
+    assert lookups == [host]
+    stats = dns_cache.get_stats()
+    assert stats['misses'] == 0
+    assert stats['hits'] == 3
+
+    # 过期后返回旧的ip,同时在后台重新解析
+    time.sleep(0.35)
+    client = make_client(IP=None, Port=None, Endpoint='cos.stub.local:%d' % server.port, DnsCache=dns_cache)
+    client.head_object(Bucket=test_bucket, Key='dns_cache')
+    for i in range(100):
+        if dns_cache.get_stats()['refreshes'] == 1:
+            break
+        time.sleep(0.01)
+    assert dns_cache.get_stats()['stale_hits'] == 1
+    assert lookups == [host, host]
+
+
+def test_dns_cache_ttl_bounds_and_stale_on_error():
+    """ttl限制在[min_ttl, max_ttl]之间,解析失败时使用过期的记录"""
+    answers = [(['10.0.0.1'], 1), (['10.0.0.2'], 100000)]
+
+    def resolver(host, timeout):
+        if not answers:
+            raise IOError('resolver timeout')
+        return answers.pop(0)
+
+    dns_cache = DnsCache(min_ttl=0.05, max_ttl=0.1, max_stale=60, resolver=resolver)
+    assert dns_cache.resolve('a.example.com') == ['10.0.0.1']
+    time.sleep(0.12)
+    # 解析失败时仍然返回旧的记录
+    dns_cache.invalidate('b.example.com')
+    assert dns_cache._lookup('a.example.com') == ['10.0.0.2']
+    time.sleep(0.12)
+    assert dns_cache._lookup('a.example.com') == ['10.0.0.2']
+    assert dns_cache.get_stats()['errors'] == 1
+
+
+def test_request_hooks():
+    """hook按顺序触发,上下文中包含操作名,各阶段耗时以及收发的字节数"""
+    client = make_client(retry_policy=RetryPolicy(max_retries=2, base_delay=0.01))
+    events = []
+
+    def handler(event, ctx):
+        events.append((event, ctx.operation, ctx.attempt))
+    for event in ('before_sign', 'after_sign', 'before_send', 'response_headers', 'response_body_done', 'parsed', 'retry', 'error'):
+        client.register_hook(event, handler)
+    contexts = []
+
+    def on_body_done(event, ctx):
+        contexts.append(ctx)
+    client.register_hook('response_body_done', on_body_done)
+
+    server.faults = [500]
+    client.put_object(Bucket=test_bucket, Body=b'h' * 100, Key='hooks')
+    assert [e[0] for e in events] == ['before_send', 'before_sign', 'after_sign', 'response_headers', 'response_body_done', 'retry',
+                                      'before_send', 'before_sign', 'after_sign', 'response_headers', 'response_body_done']
+    assert events[-1] == ('response_body_done', 'put_object', 2)
+    ctx = contexts[-1]
+    assert ctx.bytes_sent == 100
+    assert ctx.status_code == 200
+    assert set(['sign', 'connect', 'ttfb', 'body']) <= set(ctx.timings)
+
+    del events[:]
+    client.list_objects(Bucket=test_bucket, Prefix='hooks')
+    assert events[-1] == ('parsed', 'list_objects', 1)
+    assert contexts[-1].bytes_received > 0
+    assert 'parse' in contexts[-1].timings
+
+    del events[:]
+    try:
+        client.head_object(Bucket=test_bucket, Key='hooks_not_exist')
+        assert False
+    except CosServiceError:
+        pass
+    assert events[-1] == ('error', 'head_object', 1)
+
+    # 内部辅助函数发起的请求使用对应接口的操作名
+    del events[:]
+    client._inner_head_object({'Bucket': test_bucket, 'Key': 'hooks', 'Region': 'ap-guangzhou'})
+    assert events[-1] == ('response_body_done', 'head_object', 1)
+
+    # 取消注册后不再创建上下文
+    for event in ('before_sign', 'after_sign', 'before_send', 'response_headers', 'response_body_done', 'parsed', 'retry', 'error'):
+        client.unregister_hook(event, handler)
+    client.unregister_hook('response_body_done', on_body_done)
+    assert not client._hooks.enabled
+    del events[:]
+    client.get_object(Bucket=test_bucket, Key='hooks')
+    assert events == []
+
+
+def test_metrics_registry():
+    """按操作统计调用次数,错误码,重试次数,字节数和延迟,并输出prometheus格式"""
+    client = make_client(retry_policy=RetryPolicy(max_retries=2, base_delay=0.01))
+    metrics = client.enable_metrics(MetricsRegistry(namespace='cos_test'))
+    server.faults = [503]
+    client.put_object(Bucket=test_bucket, Body=b'm' * 1000, Key='metrics')
+    response = client.get_object(Bucket=test_bucket, Key='metrics')
+    response['Body'].get_raw_stream().read()
+    client.list_objects(Bucket=test_bucket, Prefix='metrics')
+    for i in range(2):
+        try:
+            client.get_object(Bucket=test_bucket, Key='metrics_not_exist')
+        except CosServiceError:
+            pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot['put_object']['count'] == 1
+    assert snapshot['put_object']['retries'] == 1
+    assert snapshot['put_object']['bytes_sent'] == 2000
+    assert snapshot['get_object']['count'] == 3
+    assert snapshot['get_object']['errors'] == {'NoSuchKey': 2}
+    assert snapshot['get_object']['bytes_received'] > 1000  # 包括错误返回的xml
+    assert snapshot['list_objects']['latency']['count'] == 1
+    assert snapshot['list_objects']['latency']['buckets'][-1] == ('+Inf', 1)
+
+    text = metrics.render_prometheus()
+    assert 'cos_test_requests_total{operation="get_object"} 3' in text
+    assert 'cos_test_errors_total{operation="get_object",code="NoSuchKey"} 2' in text
+    assert 'cos_test_request_duration_seconds_bucket{operation="put_object",le="+Inf"} 1' in text
+    assert '# TYPE cos_test_request_duration_seconds histogram' in text
+
+    # detach之后不再统计,没有其他hook时关闭hook
+    metrics.detach(client)
+    assert not client._hooks.enabled
+    client.put_object(Bucket=test_bucket, Body=b'm', Key='metrics')
+    assert metrics.snapshot() == snapshot
+
+
+def test_warm_up():
+    """warm_up预先建立连接,之后的并发请求复用这些连接"""
+    from qcloud_cos.cos_threadpool import SimpleThreadPool
+    client = make_client(PoolMaxSize=2)
+    connections = server.connections
+    result = client.warm_up(Bucket=test_bucket, connections=6)
+    assert result == {'requested': 6, 'established': 6, 'already_connected': 0, 'failed': 0}
+    for i in range(100):  # 服务端异步处理新连接
+        if server.connections == connections + 6:
+            break
+        time.sleep(0.01)
+    assert server.connections == connections + 6
+    assert client.get_connection_stats()['pool_maxsize'] == 6
+    result = client.warm_up(Bucket=test_bucket, connections=6)
+    assert result['already_connected'] == 6
+    assert server.connections == connections + 6
+
+    client.put_object(Bucket=test_bucket, Body=b'warm', Key='warm_up')
+    pool = SimpleThreadPool(6)
+    for i in range(30):
+        pool.add_task(client.head_object, Bucket=test_bucket, Key='warm_up')
+    pool.wait_completion()
+    assert pool.get_result()['success_all']
+    assert server.connections == connections + 6
+
+
+def test_hedged_read():
+    """读请求超过对冲等待时间没有返回时发起对冲请求,先返回的生效"""
+    policy = HedgePolicy(initial_delay=0.05, max_hedge_ratio=1)
+    client = make_client(hedge_policy=policy)
+    client.put_object(Bucket=test_bucket, Body=b'hedge', Key='hedge')
+    server.delays = [1]
+    start = time.time()
+    response = client.get_object(Bucket=test_bucket, Key='hedge')
+    assert response['Body'].get_raw_stream().read() == b'hedge'
+    assert time.time() - start < 0.5
+    client.head_object(Bucket=test_bucket, Key='hedge')
+    metrics = client.get_hedge_metrics()
+    assert metrics['calls'] == 2
+    assert metrics['hedged'] == 1
+    assert metrics['hedge_wins'] == 1
+
+    # 对冲请求使用独立的上下文,发送请求的线程在调用之间复用
+    contexts = []
+    client.register_hook('after_sign', lambda event, ctx: contexts.append(ctx))
+    server.delays = [0.3]
+    client.head_object(Bucket=test_bucket, Key='hedge')
+    assert len(contexts) == 2 and contexts[0] is not contexts[1]
+    assert contexts[0].operation == contexts[1].operation == 'head_object'
+    time.sleep(0.4)
+    workers = policy.executor._workers
+    for i in range(5):
+        client.head_object(Bucket=test_bucket, Key='hedge')
+    assert policy.executor._workers == workers
+
+    # 写请求不对冲
+    server.delays = [0.2]
+    received = len(server.received)
+    client.put_object(Bucket=test_bucket, Body=b'hedge', Key='hedge')
+    assert len(server.received) == received + 1
+
+    # 超过对冲比例后不再对冲
+    client = make_client(hedge_policy=HedgePolicy(initial_delay=0.01, max_hedge_ratio=0))
+    server.delays = [0.1]
+    client.head_object(Bucket=test_bucket, Key='hedge')
+    assert client.get_hedge_metrics()['ratio_limited'] == 1
+    assert client.get_hedge_metrics()['hedged'] == 0
+
+    # 线程池已满没有发出对冲请求时,不计入对冲次数和对冲比例
+    policy = HedgePolicy(initial_delay=0.01, max_hedge_ratio=1, max_workers=1)
+    client = make_client(hedge_policy=policy)
+    server.delays = [0.1]
+    received = len(server.received)
+    client.head_object(Bucket=test_bucket, Key='hedge')
+    assert len(server.received) == received + 1
+    assert client.get_hedge_metrics()['hedged'] == 0
+    assert policy._window_hedged == 0
+
+
+def test_timeout_policy():
+    """小请求使用较短的读超时,大的上传按照数据量放宽读超时"""
+    policy = TimeoutPolicy(connect_timeout=1, read_timeout=0.2, min_throughput=1024 * 1024)
+    assert policy.get_timeout() == (1, 0.2)
+    assert policy.get_timeout(1024 * 1024 * 10) == (1, 10.2)
+    assert policy.get_timeout(0, 1200) == (1, 1200)  # 接口指定的超时时间作为下限
+    assert get_transfer_size({'Range': 'bytes=0-1023'}) == 1024
+    assert get_transfer_size({'x-cos-copy-source-range': 'bytes=100-199'}) == 100
+    assert get_transfer_size({}, io.BytesIO(b'x' * 10)) == 10
+    policy.record_transfer(1024 * 1024 * 4, 8)  # 链路只有512KB/s
+    assert policy.get_throughput_floor() == 256 * 1024
+
+    client = make_client(TimeoutPolicy=TimeoutPolicy(read_timeout=0.2, min_throughput=1024 * 1024), retry=0)
+    client.put_object(Bucket=test_bucket, Body=b'x' * 1024 * 1024, Key='timeout')
+    server.delays = [0.5]
+    try:
+        client.head_object(Bucket=test_bucket, Key='timeout')
+        assert False
+    except CosClientError:
+        pass
+    server.delays = [0.5]
+    client.put_object(Bucket=test_bucket, Body=b'x' * 1024 * 1024, Key='timeout')
+    # complete_multipart_upload的body很小,但服务端处理时间长,使用接口指定的超时时间
+    upload_id = client.create_multipart_upload(Bucket=test_bucket, Key='timeout')['UploadId']
+    etag = client.upload_part(Bucket=test_bucket, Key='timeout', UploadId=upload_id, PartNumber=1, Body=b'x')['ETag']
+    server.delays = [0.5]
+    client.complete_multipart_upload(Bucket=test_bucket, Key='timeout', UploadId=upload_id,
+                                     MultipartUpload={'Part': [{'PartNumber': 1, 'ETag': etag}]})
+
+
+def test_rate_limiter():
+    """上传和下载按照令牌桶限速,多次调用共用同一个限速,TrafficLimit透传给服务端"""
+    limiter = RateLimiter(1024 * 1024, burst=64 * 1024)
+    client = make_client(rate_limiter=limiter)
+    headers = []
+    client.register_hook('before_send', lambda event, ctx: headers.append(dict(ctx.request_headers)))
+    start = time.time()
+    client.put_object(Bucket=test_bucket, Body=b'x' * 512 * 1024, Key='throttle', TrafficLimit='8388608')
+    assert time.time() - start >= 0.4
+    assert headers[-1]['x-cos-traffic-limit'] == b'8388608'
+    assert limiter.get_stats()['bytes'] == 512 * 1024
+
+    # 单次调用指定的限速覆盖客户端的限速
+    start = time.time()
+    response = client.get_object(Bucket=test_bucket, Key='throttle', RateLimiter=RateLimiter(2 * 1024 * 1024, burst=64 * 1024))
+    data = response['Body'].get_raw_stream().read()
+    assert len(data) == 512 * 1024
+    assert 0.2 <= time.time() - start < 0.4
+    assert limiter.get_stats()['bytes'] == 512 * 1024
+
+    # 重试时重新发送的数据同样被限速
+    server.faults = [500]
+    client.put_object(Bucket=test_bucket, Body=io.BytesIO(b'x' * 64 * 1024), Key='throttle')
+    assert limiter.get_stats()['bytes'] == 640 * 1024
+
+
+def test_circuit_breaker():
+    """错误率超过阈值后熔断,请求不再发出;等待后放行探测请求,成功后恢复"""
+    breaker = CircuitBreaker(failure_rate=0.5, window=10, min_requests=6, open_timeout=0.3)
+    client = make_client(retry=0, circuit_breaker=breaker)
+    client.put_object(Bucket=test_bucket, Body=b'breaker', Key='breaker')
+    try:
+        client.head_object(Bucket=test_bucket, Key='not_exist')  # 404不是节点的错误
+    except CosServiceError:
+        pass
+    server.faults = [500, 500, 500]
+    for i in range(3):
+        try:
+            client.head_object(Bucket=test_bucket, Key='breaker')
+            assert False
+        except CosServiceError:
+            pass
+    assert client.get_circuit_state(test_bucket)['state'] == 'closed'
+    server.faults = [502]
+    try:
+        client.head_object(Bucket=test_bucket, Key='breaker')
+    except CosServiceError:
+        pass
+    assert client.is_circuit_open(test_bucket)
+
+    # 熔断器打开时直接失败,请求不会发出
+    received = len(server.received)
+    try:
+        client.get_object(Bucket=test_bucket, Key='breaker')
+        assert False
+    except CosCircuitOpenError as e:
+        assert isinstance(e, CosClientError)
+        assert 0 < e.get_retry_after() <= 0.3
+    assert len(server.received) == received
+    assert client.get_circuit_state(test_bucket)['rejected'] == 1
+
+    # 探测请求失败后重新打开
+    time.sleep(0.35)
+    assert client.get_circuit_state(test_bucket)['state'] == 'half_open'
+    server.faults = ['reset']
+    try:
+        client.head_object(Bucket=test_bucket, Key='breaker')
+        assert False
+    except CosClientError as e:
+        assert not isinstance(e, CosCircuitOpenError)
+    assert client.is_circuit_open(test_bucket)
+    assert client.get_circuit_state(test_bucket)['trips'] == 2
+
+    # 探测请求成功后关闭
+    time.sleep(0.35)
+    client.head_object(Bucket=test_bucket, Key='breaker')
+    assert client.get_circuit_state(test_bucket)['state'] == 'closed'
+    assert list(client.get_circuit_state().keys()) == [u'127.0.0.1:%d' % server.port]
+
+
+def test_config_uri_cache():
+    """存储桶的url前缀和Host被缓存,修改ip后重新计算,非法的存储桶名称仍然报错"""
+    conf = CosConfig(Appid='1250000000', Region='ap-guangzhou', SecretId='SECRET_ID', SecretKey='SECRET_KEY')
+    for i in range(2):
+        assert conf.uri('test', '/a b/c') == u'https://test-1250000000.cos.ap-guangzhou.myqcloud.com/a%20b/c'
+        assert conf.uri('test') == u'https://test-1250000000.cos.ap-guangzhou.myqcloud.com/'
+        assert conf.get_host('test') == u'test-1250000000.cos.ap-guangzhou.myqcloud.com'
+    assert conf.uri('test', 'k', endpoint='cos.ap-beijing.myqcloud.com') == u'https://test-1250000000.cos.ap-beijing.myqcloud.com/k'
+    conf.set_ip_port('127.0.0.1', 8080)
+    assert conf.uri('test', 'k') == u'https://127.0.0.1:8080/k'
+    for bucket in ('bad_bucket', None, ['test']):
+        try:
+            conf.uri(bucket, 'k')
+            assert False
+        except CosClientError:
+            pass
+
+
+def test_process_pool_transfer():
+    """多进程分块上传和下载,子进程使用复制的配置,结果合并到父进程"""
+    conf = CosConfig(Region='ap-guangzhou', SecretId='SECRET_ID', SecretKey='SECRET_KEY', IP=['127.0.0.1:1', '127.0.0.2'],
+                     Port=80, TimeoutPolicy=TimeoutPolicy(read_timeout=3))
+    copied = pickle.loads(pickle.dumps(conf))
+    assert [node['address'] for node in copied._endpoint_pool.get_stats()] == [u'127.0.0.1:1', u'127.0.0.2:80']
+    assert copied._timeout_policy.read_timeout == 3
+
+    client = make_client()
+    file_name = 'transport_process_test'
+    data = os.urandom(1024 * 1024 * 21 + 100)
+    with open(file_name, 'wb') as fp:
+        fp.write(data)
+    try:
+        client.upload_file(Bucket=test_bucket, Key=file_name, LocalFilePath=file_name, PartSize=2, MAXThread=2, MAXProcess=2)
+        assert server.buckets[test_bucket].objects[file_name][0] == data
+
+        for process in (None, 2):
+            os.remove(file_name)
+            client.download_file(Bucket=test_bucket, Key=file_name, DestFilePath=file_name, PartSize=4, MAXProcess=process)
+            with open(file_name, 'rb') as fp:
+                assert fp.read() == data
+
+        # 下载过程中文件被修改时分块的ETag校验失败
+        try:
+            client.download_file(Bucket=test_bucket, Key=file_name, DestFilePath=file_name, PartSize=4, IfMatch='"changed"')
+            assert False
+        except CosClientError:
+            pass
+        with open(file_name, 'rb') as fp:
+            assert fp.read() == data
+
+        # 分块写入本地文件失败时关闭响应,不占用连接
+        bodies = []
+        get_object = client.get_object
+
+        def capture(*args, **kwargs):
+            response = get_object(*args, **kwargs)
+            bodies.append(response['Body'])
+            return response
+        client.get_object = capture
+        try:
+            client._download_part(test_bucket, file_name, 'transport_not_exist_dir/part', 0, 1024, 1)
+            assert False
+        except IOError:
+            pass
+        assert bodies[0]._rt.raw.closed
+    finally:
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+
+def test_signer():
+    """sign_key在同一个时间窗口内复用,get_auth与不构造Request的签名结果一致,更换秘钥后重新计算"""
+    signer = CosSigner('SECRET_ID', 'SECRET_KEY', key_time_window=600)
+    key_time = signer.get_key_time(100)
+    start, end = [int(t) for t in key_time.split(';')]
+    assert start <= time.time() - 60 and end >= time.time() + 100
+    assert (end - start) == 600 + 100 + 60 and (start + 60) % 600 == 0
+    auth = signer.sign('PUT', 'a b', {'Prefix': 'x'}, {'Content-Type': 'text/plain'}, 100)
+    sign_key = signer._sign_key
+    assert signer.sign('PUT', 'a b', {'Prefix': 'x'}, {'Content-Type': 'text/plain'}, 100) == auth
+    assert signer._sign_key is sign_key
+    assert 'q-header-list=content-type&q-url-param-list=prefix' in auth
+
+    conf = CosConfig(Region='ap-guangzhou', SecretId='SECRET_ID', SecretKey='SECRET_KEY')
+    client = CosS3Client(conf)
+    auth = client.get_auth('GET', test_bucket, 'a b', Params={'Prefix': 'x'})
+    key_time = auth.split('q-key-time=')[1].split('&')[0]
+    assert auth == signer.sign('GET', 'a b', {'Prefix': 'x'}, key_time=key_time)
+    conf.set_credential('SECRET_ID', 'OTHER_KEY')
+    assert client.get_auth('GET', test_bucket, 'a b', Params={'Prefix': 'x'}) != auth
+
+    # 签名后的请求正常发送
+    client = make_client()
+    client.put_object(Bucket=test_bucket, Key='signer', Body=b'data')
+    assert client.get_object(Bucket=test_bucket, Key='signer')['Body'].get_raw_stream().read() == b'data'
+
+
+def test_presigned_urls():
+    """批量生成的预签名url与逐个生成的结果一致,Keys可以是生成器"""
+    conf = CosConfig(Region='ap-guangzhou', SecretId='SECRET_ID', SecretKey='SECRET_KEY')
+    client = CosS3Client(conf)
+    keys = ['a b.txt', '/dir/./c', u'中文']
+    params = {'response-content-type': 'text/plain'}
+    urls = list(client.get_presigned_urls(test_bucket, (k for k in keys), Params=params))
+    assert len(urls) == len(keys)
+    for key, url in zip(keys, urls):
+        key_time = url.split('q-key-time=')[1].split('&')[0]
+        sign = conf.get_credential().signer.sign('GET', key, params, key_time=key_time)
+        assert url == conf.uri(test_bucket, key) + '?' + sign + '&response-content-type=text%2Fplain'
+    # Bucket在调用时检查,Key在迭代时逐个检查
+    try:
+        client.get_presigned_urls('', ['a'])
+        assert False
+    except CosClientError:
+        pass
+    urls = client.get_presigned_urls(test_bucket, ['a', ''])
+    assert next(urls).startswith(conf.uri(test_bucket, 'a') + '?')
+    try:
+        next(urls)
+        assert False
+    except CosClientError:
+        pass
+    # 无限的Keys只按需读取
+    keys = ('key%d' % i for i in itertools.count())
+    urls = list(itertools.islice(client.get_presigned_urls(test_bucket, keys), 3))
+    assert [url.split('?')[0] for url in urls] == [conf.uri(test_bucket, 'key%d' % i) for i in range(3)]
+
+    client = make_client()
+    client.put_object(Bucket=test_bucket, Key='presigned', Body=b'data')
+    for url in client.get_presigned_urls(test_bucket, ['presigned'] * 2):
+        assert requests.get(url, headers={'Host': client._conf.get_host(test_bucket)}).content == b'data'
+
+
+def test_credential_provider():
+    """后台线程在临时秘钥过期前刷新,刷新过程中签名继续使用旧秘钥,token与签名来自同一组秘钥"""
+    from qcloud_cos import Credential, RefreshingCredentialProvider
+    from qcloud_cos.cos_auth import CosS3Auth
+    from requests import Request
+    fetched = []
+
+    def fetch():
+        if fetched:
+            time.sleep(0.5)  # 模拟较慢的STS请求
+        fetched.append(1)
+        index = len(fetched)
+        return Credential('ID%d' % index, 'KEY%d' % index, 'TOKEN%d' % index, int(time.time()) + 301)
+
+    provider = RefreshingCredentialProvider(fetch, refresh_ahead=300, retry_interval=1)
+    try:
+        conf = CosConfig(Region='ap-guangzhou', CredentialProvider=provider)
+        r = CosS3Auth(conf, 'k')(Request('GET', 'http://localhost/k', headers={}))
+        assert r.headers['x-cos-security-token'] == 'TOKEN1' and 'q-ak=ID1&' in r.headers['Authorization']
+
+        time.sleep(1.2)  # 后台刷新进行中
+        start = time.time()
+        assert provider.get_credential().secret_id == u'ID1'
+        assert time.time() - start < 0.1
+        time.sleep(0.6)
+        r = CosS3Auth(conf, 'k')(Request('GET', 'http://localhost/k', headers={}))
+        assert r.headers['x-cos-security-token'] == 'TOKEN2' and 'q-ak=ID2&' in r.headers['Authorization']
+
+        client = make_client(CredentialProvider=provider)
+        client.put_object(Bucket=test_bucket, Key='credential', Body=b'data')
+    finally:
+        provider.close()
+
+    # 没有实现get_credential的子类不能实例化
+    from qcloud_cos.cos_credential import CredentialProvider
+
+    class IncompleteProvider(CredentialProvider):
+        pass
+    try:
+        IncompleteProvider()
+        assert False
+    except TypeError:
+        pass
+
+    conf = CosConfig(Region='ap-guangzhou', SecretId='ID', SecretKey='KEY', Token='TOKEN')
+    conf.set_credential('ID2', 'KEY2')
+    r = CosS3Auth(conf, 'k')(Request('GET', 'http://localhost/k', headers={}))
+    assert 'x-cos-security-token' not in r.headers and 'q-ak=ID2&' in r.headers['Authorization']
+
+
+def test_xml_to_dict():
+    """直接解析xml,去掉命名空间,同名节点合并为list,带属性的节点转换为dict"""
+    from qcloud_cos.cos_comm import xml_to_dict
+    data = b'''<?xml version="1.0" encoding="UTF-8"?>
+<AccessControlPolicy xmlns="http://www.qcloud.com/document/product/436/7751">
+<Owner><ID>qcs::cam::uin/1:uin/1</ID><DisplayName>qcs::cam::uin/1:uin/1</DisplayName></Owner>
+<AccessControlList>
+<Grant><Grantee xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:type="Group"><URI>http://cam.qcloud.com/groups/global/AllUsers</URI></Grantee>
+<Permission>READ</Permission></Grant>
+<Grant><Grantee xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:type="CanonicalUser"><ID>1</ID></Grantee><Permission>WRITE</Permission></Grant>
+<Grant><Grantee xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:type="CanonicalUser"><ID>2</ID></Grantee><Permission>WRITE</Permission></Grant>
+</AccessControlList>
+<Empty/><Tag id="1">text</Tag>
+</AccessControlPolicy>'''
+    assert xml_to_dict(data, 'type', 'Type') == {
+        'Owner': {'ID': 'qcs::cam::uin/1:uin/1', 'DisplayName': 'qcs::cam::uin/1:uin/1'},
+        'AccessControlList': {'Grant': [
+            {'Grantee': {'Type': 'Group', 'URI': 'http://cam.qcloud.com/groups/global/AllUsers'}, 'Permission': 'READ'},
+            {'Grantee': {'Type': 'CanonicalUser', 'ID': '1'}, 'Permission': 'WRITE'},
+            {'Grantee': {'Type': 'CanonicalUser', 'ID': '2'}, 'Permission': 'WRITE'}]},
+        'Empty': None,
+        'Tag': {'id': '1', 'Tag': 'text'}}
+    assert xml_to_dict(data)['AccessControlList']['Grant'][0]['Grantee']['type'] == 'Group'
+
+
+def test_list_objects_stream():
+    """流式列举的结果与list_objects一致,key进行url decode,迭代结束后可以获取分页信息"""
+    client = make_client()
+    bucket = 'cos-python-v5-stream-1250000000'
+    keys = [u'dir/a b', u'dir/中文', u'top1', u'top2', u'top3']
+    for key in keys:
+        client.put_object(Bucket=bucket, Key=key, Body=b'x' * len(key))
+
+    records = []
+    marker = ''
+    while True:
+        stream = client.list_objects_stream(Bucket=bucket, Marker=marker, MaxKeys=2)
+        page = list(stream)
+        assert len(page) <= 2
+        records.extend(page)
+        if not stream.is_truncated:
+            break
+        marker = stream.next_marker
+    assert [r.key for r in records] == keys
+    contents = client.list_objects(Bucket=bucket)['Contents']
+    assert [(r.key, str(r.size), r.etag, r.last_modified, r.storage_class) for r in records] == \
+        [(c['Key'], c['Size'], c['ETag'], c['LastModified'], c['StorageClass']) for c in contents]
+
+    stream = client.list_objects_stream(Bucket=bucket, Delimiter='/')
+    assert [r.key for r in stream] == [u'top1', u'top2', u'top3']
+    assert stream.common_prefixes == [u'dir/'] and not stream.is_truncated
+
+    # 不迭代或者提前结束时通过close和with语句释放连接
+    stream = client.list_objects_stream(Bucket=bucket)
+    stream.close()
+    assert stream._response.raw.closed
+    try:
+        iter(stream)
+        assert False
+    except ValueError:
+        pass
+    with client.list_objects_stream(Bucket=bucket) as stream:
+        assert next(iter(stream)).key == keys[0]
+    assert stream._response.raw.closed
+    stream = client.list_objects_stream(Bucket=bucket, Prefix='dir/', EncodingType='url')
+    assert [r.key for r in stream] == ['dir/a%20b', 'dir/%E4%B8%AD%E6%96%87']
+
+
+def test_object_listing():
+    """整个存储桶的列举结果按列存储,支持按前缀,大小,时间过滤,排序和导出csv"""
+    from qcloud_cos import ObjectListing
+    client = make_client()
+    bucket = 'cos-python-v5-listing-1250000000'
+    keys = [u'a/1', u'a/2', u'a/中文', u'b/1', u'c']
+    for i, key in enumerate(keys):
+        client.put_object(Bucket=bucket, Key=key, Body=b'x' * (i * 10))
+    listing = client.list_all_objects(Bucket=bucket, MaxKeys=2)
+    assert [r.key for r in listing] == keys
+    assert list(listing.sizes) == [0, 10, 20, 30, 40] and listing.total_size() == 100
+    assert listing[0] == (u'a/1', 0, 1546300800, 'STANDARD')
+    assert [r.key for r in listing.filter(prefix=u'a/')] == [u'a/1', u'a/2', u'a/中文']
+    assert [r.key for r in listing.filter(prefix=u'a/', min_size=10, max_size=20)] == [u'a/2', u'a/中文']
+    assert len(listing.filter(prefix='d')) == 0 and len(listing.filter(storage_class='ARCHIVE')) == 0
+    assert [r.key for r in listing.sort(by='size', reverse=True)][:2] == [u'c', u'b/1']
+
+    listing = ObjectListing()
+    listing.append(u'z', 5, '2020-02-29T23:59:59.000Z', 'STANDARD')
+    listing.append(u'y,"q"', 1, 1000, 'STANDARD_IA')
+    listing.append(u'yy', 3, 2000, 'STANDARD_IA')
+    assert listing.mtimes[0] == 1583020799
+    assert [r.key for r in listing.filter(prefix='y')] == [u'y,"q"', u'yy']
+    assert [r.key for r in listing.filter(modified_after=1000, modified_before=2001)] == [u'y,"q"', u'yy']
+    assert [r.key for r in listing.filter(storage_class='STANDARD_IA').sort()] == [u'y,"q"', u'yy']
+    file_name = 'transport_listing.csv'
+    try:
+        listing.sort(by='mtime').to_csv(file_name)
+        with io.open(file_name, encoding='utf-8') as fp:
+            assert fp.read().splitlines() == ['key,size,last_modified,storage_class', u'"y,""q""",1,1970-01-01T00:16:40Z,STANDARD_IA',
+                                              u'yy,3,1970-01-01T00:33:20Z,STANDARD_IA', u'z,5,2020-02-29T23:59:59Z,STANDARD']
+    finally:
+        os.remove(file_name)
+
+
+def test_xml_backends():
+    """各个xml后端解析出的dict和错误信息一致"""
+    from qcloud_cos import cos_xml
+    from qcloud_cos.cos_comm import xml_to_dict, get_id_from_xml
+    from qcloud_cos.cos_exception import digest_xml
+    data = (b'<?xml version="1.0" encoding="UTF-8"?><!-- comment --><ListPartsResult xmlns="http://www.qcloud.com/document/product/436/7751">'
+            b'<Key>a&amp;b</Key><Part><PartNumber>1</PartNumber></Part><Part><PartNumber>2</PartNumber></Part></ListPartsResult>')
+    error = (u'<?xml version="1.0" encoding="UTF-8"?><Error><Code>SlowDown</Code><Message>\u6162</Message><Resource>r</Resource>'
+             u'<RequestId>id</RequestId></Error>')
+    current = cos_xml.get_xml_backend()
+    backends = ['xml.etree'] + (['lxml'] if cos_xml._lxml is not None else [])
+    try:
+        for backend in backends:
+            cos_xml.set_xml_backend(backend)
+            assert xml_to_dict(data) == {'Key': 'a&b', 'Part': [{'PartNumber': '1'}, {'PartNumber': '2'}]}
+            assert digest_xml(error) == {'code': 'SlowDown', 'message': u'\u6162', 'resource': 'r', 'requestid': 'id', 'traceid': 'Unknown'}
+            assert digest_xml('<Error><Code>SlowDown</Code></Error>') == "Response Error Msg Is INVALID"
+            assert get_id_from_xml(error, 'Code') == 'SlowDown'
+    finally:
+        cos_xml.set_xml_backend(current)
+    try:
+        cos_xml.set_xml_backend('unknown')
+        assert False
+    except ValueError:
+        pass
+
+
+def test_lazy_response():
+    """LazyResponse时第一次访问结果才解析xml,解析后的结果与普通dict一致"""
+    client = make_client()
+    lazy_client = make_client(LazyResponse=True)
+    events = []
+    lazy_client.register_hook('parsed', lambda event, ctx: events.append(ctx.operation))
+    client.put_object(Bucket=test_bucket, Key='lazy/a', Body=b'data')
+
+    response = lazy_client.list_objects(Bucket=test_bucket, Prefix='lazy/')
+    assert events == []
+    assert response['Contents'][0]['Key'] == 'lazy/a'
+    assert events == ['list_objects']
+    assert response == client.list_objects(Bucket=test_bucket, Prefix='lazy/')
+    assert pickle.loads(pickle.dumps(response)) == response
+
+    upload_id = lazy_client.create_multipart_upload(Bucket=test_bucket, Key='lazy/b')['UploadId']
+    etag = lazy_client.upload_part(Bucket=test_bucket, Key='lazy/b', Body=b'part', PartNumber=1, UploadId=upload_id)['ETag']
+    response = lazy_client.complete_multipart_upload(Bucket=test_bucket, Key='lazy/b', UploadId=upload_id,
+                                                     MultipartUpload={'Part': [{'PartNumber': 1, 'ETag': etag}]})
+    assert 'ETag' in response
+    assert server.buckets[test_bucket].objects['lazy/b'][0] == b'part'
+
+
+def test_xml_writer():
+    """请求xml直接写入bytes,list标签展开为同名节点,文本转义后可以解析回原来的内容"""
+    from qcloud_cos.cos_comm import format_xml, dict_to_xml, xml_to_dict
+    delete = {'Object': [{'Key': u'a&<b>"\'\u4e2d'}, {'Key': 'c', 'VersionId': 'v'}], 'Quiet': True}
+    body = format_xml(data=delete, root='Delete', lst=['<Object>', '</Object>'])
+    assert body == (b'<?xml version="1.0" encoding="UTF-8" ?><Delete><Object><Key>a&amp;&lt;b&gt;&quot;&apos;\xe4\xb8\xad</Key></Object>'
+                    b'<Object><Key>c</Key><VersionId>v</VersionId></Object><Quiet>true</Quiet></Delete>')
+    assert xml_to_dict(body) == {'Object': [{'Key': u'a&<b>"\'\u4e2d'}, {'Key': 'c', 'VersionId': 'v'}], 'Quiet': 'true'}
+    # 不在lst中的list保留一层同名的父节点,parent_child时子节点名称去掉最后一个字符
+    assert format_xml(data={'Field': ['Size', 'ETag']}, root='R') == b'<?xml version="1.0" encoding="UTF-8" ?><R><Field><Field>Size</Field><Field>ETag</Field></Field></R>'
+    website = {'RoutingRules': [{'Redirect': {'ReplaceKeyWith': '404.html'}}], 'Days': 1, 'Empty': None}
+    assert format_xml(data=website, root='W', parent_child=True) == (
+        b'<?xml version="1.0" encoding="UTF-8" ?><W><RoutingRules><RoutingRule><Redirect><ReplaceKeyWith>404.html</ReplaceKeyWith>'
+        b'</Redirect></RoutingRule></RoutingRules><Days>1</Days><Empty></Empty></W>')
+
+    body = dict_to_xml({'Part': [{'PartNumber': 1, 'ETag': '"e1"'}, {'PartNumber': 2, 'ETag': '"e2"'}]})
+    assert xml_to_dict(body) == {'Part': [{'PartNumber': '1', 'ETag': '"e1"'}, {'PartNumber': '2', 'ETag': '"e2"'}]}
+    try:
+        dict_to_xml({'Part': [{'PartNumber': 1}]})
+        assert False
+    except CosClientError:
+        pass
+
+
+def test_paginator():
+    """自动翻页返回所有条目,预取与不预取的结果一致,提前结束迭代和出错时后台线程退出"""
+    import threading
+    client = make_client()
+    bucket = 'cos-python-v5-paginator-1250000000'
+    keys = [u'dir/a b', u'dir/中文', u'top1', u'top2', u'top3']
+    for key in keys:
+        client.put_object(Bucket=bucket, Key=key, Body=b'x')
+    for prefetch in (0, 1, 3):
+        assert [c['Key'] for c in client.iter_objects(Bucket=bucket, MaxKeys=2, Prefetch=prefetch)] == keys
+    pages = list(client.paginate('list_objects', Bucket=bucket, Delimiter='/', MaxKeys=2))
+    assert [p.get('NextMarker') for p in pages] == ['top2', None]
+    assert pages[0]['CommonPrefixes'] == [{'Prefix': u'dir/'}]
+    assert [c['Key'] for c in client.iter_objects(Bucket=bucket, Marker='top1', MaxKeys=1)] == [u'top2', u'top3']
+
+    threads = threading.active_count()
+    objects = client.iter_objects(Bucket=bucket, MaxKeys=1, Prefetch=1)
+    assert next(objects)['Key'] == keys[0]
+    objects.close()
+    time.sleep(0.3)
+    assert threading.active_count() == threads
+    server.faults = [None, 403]  # 预取第二页时出错,在调用方迭代到该页时抛出
+    objects = client.iter_objects(Bucket=bucket, MaxKeys=1, Prefetch=2)
+    assert next(objects)['Key'] == keys[0]
+    try:
+        next(objects)
+        assert False
+    except CosServiceError as e:
+        assert e.get_status_code() == 403
+
+    # 后台线程最多比调用方多获取prefetch页
+    from qcloud_cos import Paginator
+    fetched = []
+
+    def fetch(Marker=0):
+        fetched.append(Marker)
+        return Marker
+    for prefetch in (1, 2):
+        del fetched[:]
+        for page in Paginator(fetch, lambda page: {'Marker': page + 1} if page < 5 else None, prefetch=prefetch):
+            time.sleep(0.05)
+            assert len(fetched) - (page + 1) <= prefetch
+        assert fetched == list(range(6))
+
+    upload_id = client.create_multipart_upload(Bucket=bucket, Key='mp')['UploadId']
+    client.upload_part(Bucket=bucket, Key='mp', UploadId=upload_id, PartNumber=1, Body=b'part')
+    assert [u['UploadId'] for u in client.iter_multipart_uploads(Bucket=bucket)] == [upload_id]
+    assert [p['PartNumber'] for p in client.iter_parts(Bucket=bucket, Key='mp', UploadId=upload_id)] == ['1']
+    try:
+        client.paginate('list_buckets')
+        assert False
+    except CosClientError:
+        pass
+
+
+if __name__ == "__main__":
+    setup_module()
+    test_connection_pool_resize_keeps_idle_connections()
+    test_connection_pool_resize_for_upload_file()
+    test_connection_stats_with_custom_session()
+    test_retry_server_error_with_backoff()
+    test_no_retry_on_terminal_error()
+    test_retry_budget_exhausted()
+    test_retry_rewind_file_body()
+    test_retry_non_seekable_body()
+    test_upload_file_part_retry()
+    test_endpoint_pool_round_robin_and_eject()
+    test_endpoint_pool_least_outstanding()
+    test_dns_cache_prefetch_and_reuse()
+    test_dns_cache_ttl_bounds_and_stale_on_error()
+    test_request_hooks()
+    test_metrics_registry()
+    test_warm_up()
+    test_hedged_read()
+    test_timeout_policy()
+    test_rate_limiter()
+    test_circuit_breaker()
+    test_config_uri_cache()
+    test_process_pool_transfer()
+    test_signer()
+    test_presigned_urls()
+    test_credential_provider()
+    test_xml_to_dict()
+    test_list_objects_stream()
+    test_object_listing()
+    test_xml_backends()
+    test_lazy_response()
+    test_xml_writer()
+    test_paginator()
+    teardown_module()